@@ -1,17 +1,23 @@
-from flask import Flask, request, send_from_directory
+from flask import Flask, Response, g, request, send_from_directory
 from flask_restful import Api
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.exceptions import HTTPException
+from werkzeug.exceptions import HTTPException, NotFound
 
 # Error handling imports
 from api.exceptions import (
     APIError, handle_api_error, handle_werkzeug_error, handle_generic_error
 )
-from api.utils.logging_config import setup_logging, get_logger, log_request_info, log_response_info
+from api.utils.logging_config import (
+    setup_logging, get_logger, log_request_info, log_response_info, should_log_request
+)
+from api.utils.conditional import add_content_etag
+from api.utils.static_assets import StaticAssets
+from api.utils import metrics as request_metrics
+from api.utils import query_profiler
 
 # Resource imports
-from api.resources.lead import LeadResource
+from api.resources.lead import LeadResource, LeadBatchResource, LeadConversionBatchResource
 from api.resources.customer import CustomerResource
 from api.resources.contact import ContactResource
 from api.resources.trading_volume import TradingVolumeResource, TradingSummaryResource, TradingVolumeTimeSeriesResource, TradingVolumeTopCustomersResource
@@ -25,6 +31,7 @@ from api.resources.activity import (
 )
 from db.db_config import db, get_db_url
 import os
+import time
 
 # Import all models to ensure they're registered with SQLAlchemy
 from api.models.lead import Lead
@@ -32,27 +39,45 @@ from api.models.customer import Customer
 from api.models.contact import Contact
 from api.models.activity import Activity
 from api.models.trading_volume import TradingVolume
-from api.resources.analytics import AvgDailyActivityResource, LeadConversionRateResource, ActivityAnalyticsResource, LeadFunnelResource
-from api.resources.database import DatabaseInitResource
+from api.resources.analytics import AvgDailyActivityResource, LeadConversionRateResource, ActivityAnalyticsResource, LeadFunnelResource, AnalyticsCacheStatsResource
+from api.resources.database import DatabaseInitResource, DatabasePoolStatsResource
+from api.resources.export import ExportResource
+from api.resources.jobs import JobListResource, JobResource
 from api.resources.demo import DemoResource, DemoSessionResource
 
-# Initialize logging
-setup_logging(
-    log_level=os.getenv('LOG_LEVEL', 'INFO'),
-    log_file=os.getenv('LOG_FILE')
-)
 logger = get_logger('api.app')
 
-def create_app():
+_logging_configured = False
+
+def create_app(config=None):
     """
     Application factory function.
     Sets up the Flask app, configures the database, CORS, error handling, and API resources.
+    config overrides app.config before extensions are initialized (e.g. a
+    different SQLALCHEMY_DATABASE_URI for benchmarks).
+
+    Importing this module has no side effects: logging handlers, the database
+    engine and the trading cube are set up here or on first use, so
+    `gunicorn "api.app:create_app()" --preload` builds the app once in the
+    master and forks workers that hold no open connections.
     """
-    app = Flask(__name__)
+    global _logging_configured
+    if not _logging_configured:
+        setup_logging(
+            log_level=os.getenv('LOG_LEVEL', 'INFO'),
+            log_file=os.getenv('LOG_FILE')
+        )
+        _logging_configured = True
+
+    # No Flask static route: /static/* is the React build, served by StaticAssets below
+    app = Flask(__name__, static_folder=None)
     
     # Configuration: Set up the database URI
     app.config['SQLALCHEMY_DATABASE_URI'] = get_db_url()
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
+    if config:
+        app.config.update(config)
     
     # Initialize extensions with specific CORS configuration
     # Allow requests from localhost and 127.0.0.1 for local development
@@ -66,10 +91,10 @@ def create_app():
     CORS(app, resources={
         r"/api/*": {
             "origins": allowed_origins,
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
+            "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "X-SQL-Profile"],
             "supports_credentials": True,
-            "expose_headers": ["Content-Type", "Authorization"],
+            "expose_headers": ["Content-Type", "Authorization", "ETag", "Server-Timing", "X-SQL-Profile"],
             "max_age": 3600
         }
     })
@@ -77,6 +102,17 @@ def create_app():
     db.init_app(app)
     api = Api(app)
 
+    # Per-endpoint latency/DB/size metrics and Server-Timing; registered before the
+    # other request hooks so the measured total includes them
+    request_metrics.init_app(app, api)
+
+    # Opt-in SQL profiler / N+1 detector (SQL_PROFILER=on|header)
+    query_profiler.init_app(app)
+
+    # Optional in-process trading volume cube (TRADING_CUBE_ENABLED=true)
+    from api.services import trading_volume_cube
+    trading_volume_cube.init_app(app)
+
     # Error handlers
     @app.errorhandler(APIError)
     def handle_custom_api_error(error):
@@ -93,14 +129,12 @@ def create_app():
         """Handle unexpected errors."""
         return handle_generic_error(error)
 
-    # Request/Response logging middleware
+    # Request/Response logging middleware. Both lines are written once the status
+    # is known, so successful GETs can be sampled (LOG_REQUEST_SAMPLE_RATE)
     @app.before_request
     def log_request():
-        """Log incoming requests."""
-        try:
-            log_request_info(request, logger)
-        except Exception as e:
-            logger.error(f"Error logging request: {e}")
+        """Mark the request start for the response log line."""
+        g.request_started = time.perf_counter()
 
     @app.after_request
     def log_response(response):
@@ -115,14 +149,21 @@ def create_app():
                 response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
             
             response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-            response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+            response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,PATCH,POST,DELETE,OPTIONS')
             response.headers.add('Access-Control-Allow-Credentials', 'true')
             
-            log_response_info(response, logger)
+            if should_log_request(request.method, response.status_code):
+                started = g.get('request_started')
+                duration_ms = (time.perf_counter() - started) * 1000 if started else None
+                log_request_info(request, logger)
+                log_response_info(response, logger, duration_ms)
         except Exception as e:
             logger.error(f"Error logging response: {e}")
         
         return response
+
+    # Content-hash ETags for GETs that don't set a version-based one (api.utils.conditional)
+    app.after_request(add_content_etag)
     
     # Health check endpoint
     @app.route('/api/health')
@@ -133,6 +174,14 @@ def create_app():
             'message': 'LeadFi API is running'
         }
     
+    # Prometheus scrape target (?format=json for a per-endpoint p50/p95/p99 summary)
+    @app.route('/api/metrics')
+    def metrics_endpoint():
+        """Request metrics for this worker process."""
+        if request.args.get('format') == 'json':
+            return request_metrics.metrics.snapshot()
+        return Response(request_metrics.metrics.render(), content_type=request_metrics.PROMETHEUS_CONTENT_TYPE)
+    
     # Simple test endpoint outside API path
     @app.route('/test-simple')
     def test_simple():
@@ -275,32 +324,6 @@ def create_app():
     
         # REMOVED DUPLICATE STATIC ROUTE - consolidated below
 
-    # Serve React build assets (favicon, logos, manifest)
-    @app.route('/favicon.ico')
-    def serve_favicon():
-        """Serve favicon from React build directory."""
-        return send_from_directory('/app/frontend/build', 'favicon.ico')
-    
-    @app.route('/logo192.png')
-    def serve_logo192():
-        """Serve logo192 from React build directory."""
-        return send_from_directory('/app/frontend/build', 'logo192.png')
-    
-    @app.route('/logo512.png')
-    def serve_logo512():
-        """Serve logo512 from React build directory."""
-        return send_from_directory('/app/frontend/build', 'logo512.png')
-    
-    @app.route('/manifest.json')
-    def serve_manifest():
-        """Serve manifest from React build directory."""
-        return send_from_directory('/app/frontend/build', 'manifest.json')
-    
-    @app.route('/robots.txt')
-    def serve_robots():
-        """Serve robots.txt from React build directory."""
-        return send_from_directory('/app/frontend/build', 'robots.txt')
-    
     # Simple test route to verify file serving works
     @app.route('/api/debug/test-index')
     def test_index():
@@ -498,6 +521,8 @@ def create_app():
     
     # Register resources
     api.add_resource(LeadResource, '/api/leads', '/api/leads/<int:id>')
+    api.add_resource(LeadBatchResource, '/api/leads/batch')
+    api.add_resource(LeadConversionBatchResource, '/api/leads/batch/convert')
     api.add_resource(CustomerResource, '/api/customers', '/api/customers/<string:customer_uid>')
     api.add_resource(ContactResource, '/api/contacts', '/api/contacts/<int:contact_id>')
     api.add_resource(TradingVolumeResource, '/api/trading-volume')
@@ -518,11 +543,20 @@ def create_app():
     api.add_resource(ActivityAnalyticsResource, '/api/analytics/activity-analytics')
     api.add_resource(AvgDailyActivityResource, '/api/analytics/avg-daily-activity')
     api.add_resource(LeadFunnelResource, '/api/analytics/lead-funnel')
+    api.add_resource(AnalyticsCacheStatsResource, '/api/analytics/cache-stats')
     api.add_resource(TradingVolumeTimeSeriesResource, '/api/trading-volume-time-series')
     api.add_resource(TradingVolumeTopCustomersResource, '/api/analytics/trading-volume-top-customers')
+
+    # Bulk export (streamed CSV / NDJSON / Parquet)
+    api.add_resource(ExportResource, '/api/export/<string:entity>')
     
     # Database management resources
     api.add_resource(DatabaseInitResource, '/api/init-db')
+    api.add_resource(DatabasePoolStatsResource, '/api/db-pool-stats')
+
+    # Background jobs (init-db data generation, demo setup)
+    api.add_resource(JobListResource, '/api/jobs')
+    api.add_resource(JobResource, '/api/jobs/<string:job_id>')
     
     # Demo resources
     api.add_resource(DemoResource, '/api/demo')
@@ -567,177 +601,36 @@ def create_app():
             })
         return {'routes': routes}
     
-    # BULLETPROOF Static files route - simple and direct
-    @app.route('/static/<path:filename>')
-    def serve_static_files(filename):
-        """Serve static files - simple bulletproof version."""
-        logger.info("=== STATIC ROUTE HIT ===")
-        return f"Static route called with filename: {filename}"
-    
-    # Alternative static route with more explicit pattern
-    @app.route('/static/js/<filename>')
-    def serve_js_files(filename):
-        """Serve JS files specifically."""
-        logger.info(f"=== JS ROUTE HIT with {filename} ===")
-        from flask import send_from_directory
-        import os
-        
-        js_dir = os.path.join(os.getcwd(), 'frontend', 'build', 'static', 'js')
-        logger.info(f"Serving from: {js_dir}")
-        return send_from_directory(js_dir, filename)
-    
-    @app.route('/static/css/<filename>')
-    def serve_css_files(filename):
-        """Serve CSS files specifically."""
-        logger.info(f"=== CSS ROUTE HIT with {filename} ===")
-        from flask import send_from_directory
-        import os
-        
-        css_dir = os.path.join(os.getcwd(), 'frontend', 'build', 'static', 'css')
-        return send_from_directory(css_dir, filename)
-    
-    @app.route('/static/media/<filename>')
-    def serve_media_files(filename):
-        """Serve media files (fonts, images, etc.) specifically."""
-        logger.info(f"=== MEDIA ROUTE HIT with {filename} ===")
-        from flask import send_from_directory
-        import os
-        
-        media_dir = os.path.join(os.getcwd(), 'frontend', 'build', 'static', 'media')
-        return send_from_directory(media_dir, filename)
-    
-    # Original static function (renamed to avoid conflict)
-    def original_serve_static_files(filename):
-        """Serve static files - simple bulletproof version."""
-        logger.info(f"Serving static file: {filename}")
-        try:
-            # Railway uses /app as working directory
-            if os.path.exists('/app/frontend/build/static'):
-                static_dir = '/app/frontend/build/static'
-                logger.info(f"Using production static dir: {static_dir}")
-            else:
-                # Local development
-                static_dir = os.path.join(os.getcwd(), 'frontend', 'build', 'static')
-                logger.info(f"Using local static dir: {static_dir}")
-            
-            file_path = os.path.join(static_dir, filename)
-            logger.info(f"Looking for file at: {file_path}")
-            
-            if not os.path.exists(file_path):
-                logger.error(f"Static file not found: {file_path}")
-                logger.error(f"Directory contents: {os.listdir(static_dir) if os.path.exists(static_dir) else 'Dir does not exist'}")
-                from flask import abort
-                abort(404)
-                
-            logger.info(f"File found, serving: {file_path}")
-            
-            # Use Flask's send_from_directory for better handling
-            from flask import send_from_directory
-            directory = os.path.dirname(file_path)
-            filename_only = os.path.basename(file_path)
-            
-            return send_from_directory(directory, filename_only)
-            
-        except Exception as e:
-            logger.error(f"Error serving static file {filename}: {e}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            from flask import abort
-            abort(500)
-    
-    # Serve React app in production - MOVED TO BOTTOM TO PREVENT API INTERFERENCE
-    # This was causing all API routes to return 404!
-    # def serve_react_app(path): ... moved below
-    
-    # NOW register the catch-all route AFTER all API routes are registered
-    # This ensures API routes take precedence over the catch-all
+    # React build (index.html, hashed JS/CSS/media) from the in-memory asset index.
+    # Registered last so every API route takes precedence over the catch-all.
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    static_assets = StaticAssets(os.path.join(project_root, 'frontend', 'build'))
+    static_assets.scan()
+    app.extensions['static_assets'] = static_assets
+
     @app.route('/', defaults={'path': ''})
     @app.route('/<path:path>')
     def serve_react_app(path):
-        # Skip ALL API requests - let Flask-RESTful handle them
         if path.startswith('api/'):
-            # This should never be reached if API routes are registered properly
-            from werkzeug.exceptions import NotFound
             raise NotFound()
-            
-        # Get build directory - use absolute path resolution
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        build_dir = os.path.join(project_root, 'frontend', 'build')
-        
-        logger.info(f"Frontend request: path='{path}'")
-        logger.info(f"Build directory: {build_dir}")
-        logger.info(f"Build dir exists: {os.path.exists(build_dir)}")
-        
-        # Ensure build directory exists
-        if not os.path.exists(build_dir):
-            logger.error(f"Build directory not found: {build_dir}")
+        if not static_assets.available:
             return {'error': 'Frontend build not found. Run: cd frontend && npm run build'}, 500
-        
-        # Root path - serve index.html
-        if path == '' or path == '/':
-            index_path = os.path.join(build_dir, 'index.html')
-            logger.info(f"Serving index.html: {index_path}")
-            if os.path.exists(index_path):
-                try:
-                    with open(index_path, 'r') as f:
-                        return f.read(), 200, {'Content-Type': 'text/html'}
-                except Exception as e:
-                    logger.error(f"Error reading index.html: {e}")
-                    return {'error': f'Error reading index.html: {str(e)}'}, 500
-            else:
-                logger.error(f"index.html not found at {index_path}")
-                return {'error': 'index.html not found'}, 404
-        
-        # Try to serve the requested file
-        file_path = os.path.join(build_dir, path)
-        logger.info(f"Checking file: {file_path}")
-        
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            logger.info(f"Serving file: {path}")
-            try:
-                # Read and serve file directly to avoid send_from_directory issues
-                with open(file_path, 'rb') as f:
-                    file_content = f.read()
-                
-                # Determine content type
-                content_type = 'text/plain'
-                if path.endswith('.js'):
-                    content_type = 'application/javascript'
-                elif path.endswith('.css'):
-                    content_type = 'text/css'
-                elif path.endswith('.html'):
-                    content_type = 'text/html'
-                elif path.endswith('.png'):
-                    content_type = 'image/png'
-                elif path.endswith('.ico'):
-                    content_type = 'image/x-icon'
-                elif path.endswith('.json'):
-                    content_type = 'application/json'
-                
-                from flask import Response
-                return Response(file_content, mimetype=content_type)
-                
-            except Exception as e:
-                logger.error(f"Error serving {path}: {e}")
-                return {'error': f'Error serving {path}: {str(e)}'}, 500
-        
-        # File not found - serve index.html for SPA routing (React Router)
-        logger.info(f"File not found, serving index.html for SPA route: {path}")
-        index_path = os.path.join(build_dir, 'index.html')
-        if os.path.exists(index_path):
-            try:
-                with open(index_path, 'r') as f:
-                    return f.read(), 200, {'Content-Type': 'text/html'}
-            except Exception as e:
-                logger.error(f"Error reading index.html fallback: {e}")
-                return {'error': f'Error reading index.html: {str(e)}'}, 500
-        else:
-            return {'error': 'Frontend not found'}, 404
+        return static_assets.serve(path)
     
     logger.info("LeadFi API initialized successfully")
     return app
 
-app = create_app()
+_app = None
+
+def __getattr__(name):
+    # `from api.app import app` (run.py, tests) builds the app on first access
+    # instead of at import time
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -198,6 +198,49 @@ class Activity(db.Model):
         
         return {'is_converted': False}
 
+    @classmethod
+    def preload_related(cls, activities):
+        """
+        Bulk-load the leads and customer info referenced by a page of activities.
+        Uses two IN (...) queries regardless of page size, instead of a lead,
+        contact and customer lookup per activity.
+        Returns: dict with 'leads' (lead_id -> Lead) and
+                 'customer_info' (lead_id -> customer info dict)
+        """
+        from api.models.lead import Lead
+        from api.models.contact import Contact
+        from api.models.customer import Customer
+
+        lead_ids = {activity.lead_id for activity in activities if activity.lead_id}
+        if not lead_ids:
+            return {'leads': {}, 'customer_info': {}}
+
+        leads = {
+            lead.lead_id: lead
+            for lead in Lead.query.filter(Lead.lead_id.in_(lead_ids)).all()
+        }
+
+        rows = db.session.query(
+            Contact.lead_id,
+            Customer.customer_uid,
+            Customer.name
+        ).join(
+            Customer, Customer.customer_uid == Contact.customer_uid
+        ).filter(
+            Contact.lead_id.in_(lead_ids),
+            Contact.is_primary_contact == True
+        ).order_by(Contact.contact_id).all()
+
+        customer_info = {}
+        for row in rows:
+            customer_info.setdefault(row.lead_id, {
+                'customer_uid': row.customer_uid,
+                'customer_name': row.name,
+                'is_converted': True
+            })
+
+        return {'leads': leads, 'customer_info': customer_info}
+
     def to_dict(self, include_related=False):
         customer_info = self.get_customer_info()
         
@@ -19,12 +19,12 @@ class Customer(db.Model):
         lazy='select',
         cascade='all, delete-orphan'
     )
-    # relationship with trading volume (view-based, read-only)
+    # relationship with trading volume (trigger-maintained fact table, read-only)
     trading_volumes = db.relationship(
         'TradingVolume',
         backref=db.backref('customer', lazy=True),
         lazy='select',
-        viewonly=True  # Read-only relationship since it's based on a view
+        viewonly=True  # Read-only relationship since rows are derived from daily_trading_volume
     )
 
     def get_related_leads(self):
@@ -82,7 +82,58 @@ class Customer(db.Model):
                 return lead.bd_in_charge
         return None
 
-    def to_dict(self, include_leads=False):
+    @classmethod
+    def get_primary_lead_info(cls, customer_uids):
+        """
+        Batch-load primary lead status and BD in charge for many customers.
+        Runs a single contact/lead join instead of two queries per customer.
+        Returns: dict of customer_uid -> {'lead_status', 'bd_in_charge'}
+        """
+        from api.models.lead import Lead
+        from api.models.contact import Contact
+
+        if not customer_uids:
+            return {}
+
+        rows = db.session.query(
+            Contact.customer_uid,
+            Lead.status,
+            Lead.bd_in_charge
+        ).join(
+            Lead, Lead.lead_id == Contact.lead_id
+        ).filter(
+            Contact.customer_uid.in_(customer_uids),
+            Contact.is_primary_contact == True
+        ).order_by(Contact.contact_id).all()
+
+        info = {}
+        for row in rows:
+            # Keep the first primary contact, same as the per-row lookup
+            info.setdefault(row.customer_uid, {
+                'lead_status': row.status,
+                'bd_in_charge': row.bd_in_charge
+            })
+        return info
+
+    @classmethod
+    def to_dict_list(cls, customers):
+        """Serialize a page of customers with a constant number of queries"""
+        lead_info = cls.get_primary_lead_info([c.customer_uid for c in customers])
+        return [
+            customer.to_dict(primary_lead=lead_info.get(customer.customer_uid, {}))
+            for customer in customers
+        ]
+
+    def to_dict(self, include_leads=False, primary_lead=None):
+        # primary_lead is preloaded by to_dict_list; otherwise look it up per row
+        if primary_lead is not None:
+            lead_status = primary_lead.get('lead_status')
+            bd_in_charge = primary_lead.get('bd_in_charge')
+        else:
+            lead_status = self.get_primary_lead_status()
+            bd_in_charge = self.get_bd_in_charge()
+
+        date_converted = self.get_date_converted()
         result = {
             'customer_uid': self.customer_uid,
             'name': self.name,
@@ -93,12 +144,12 @@ class Customer(db.Model):
             'date_closed': self.date_closed.isoformat() if self.date_closed else None,
             'date_created': self.date_created.isoformat() if self.date_created else None,
             # Add lead-derived fields
-            'lead_status': self.get_primary_lead_status(),
-            'date_converted': self.get_date_converted().isoformat() if self.get_date_converted() else None,
-            'bd_in_charge': self.get_bd_in_charge()
+            'lead_status': lead_status,
+            'date_converted': date_converted.isoformat() if date_converted else None,
+            'bd_in_charge': bd_in_charge
         }
-        
+
         if include_leads:
             result['related_leads'] = self.get_related_leads()
-            
+
         return result
\ No newline at end of file
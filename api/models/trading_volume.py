@@ -2,9 +2,15 @@ from marshmallow.fields import Method
 from db.db_config import db
 from datetime import datetime
 from sqlalchemy import func, and_, text
+from api.utils.cache import analytics_cache
+from api.utils.counts import count_sql, COUNT_EXACT
+from api.utils.logging_config import get_logger
+
+logger = get_logger('api.models.trading_volume')
+
 
 class TradingVolume(db.Model):
-    __tablename__ = 'v_trading_volume_detail'
+    __tablename__ = 'trading_volume_fact'
 
     customer_uid = db.Column(db.Integer, db.ForeignKey('customer.customer_uid'), primary_key=True)
     date = db.Column(db.Date, primary_key=True)
@@ -17,11 +23,35 @@ class TradingVolume(db.Model):
     bd_in_charge = db.Column(db.String(20), nullable=False)
 
     @classmethod
+    def _from_cube(cls, method, **filters):
+        """
+        Answer an aggregate from the in-process trading volume cube.
+        Returns None when the cube is disabled, not loaded or fails, so callers use SQL.
+        """
+        # Imported here so NumPy only loads once trading volume is queried
+        from api.services.trading_volume_cube import get_trading_cube
+        cube = get_trading_cube()
+        if cube is None:
+            return None
+        try:
+            return getattr(cube, method)(**filters)
+        except Exception:
+            logger.exception(f"Trading volume cube failed on {method}, falling back to SQL")
+            return None
+
+    @classmethod
+    @analytics_cache.cached('trading_volume_fact')
     def get_daily_volumes_for_range(cls, start_date, end_date, customer_uid=None):
         """
         Get daily volume totals for charting/visualization
         Returns data suitable for time-series charts
         """
+        from_cube = cls._from_cube(
+            'daily_volumes', start_date=start_date, end_date=end_date, customer_uid=customer_uid
+        )
+        if from_cube is not None:
+            return from_cube
+
         try:
             conditions, params = cls._build_sql_filters(
                 start_date, end_date, customer_uid
@@ -36,7 +66,7 @@ class TradingVolume(db.Model):
                     SUM(CASE WHEN trade_side = 'taker' THEN fees ELSE 0 END) AS taker_fees,
                     SUM(volume) AS total_volume,
                     SUM(fees) AS total_fees
-                FROM v_trading_volume_detail
+                FROM trading_volume_fact
                 WHERE {' AND '.join(conditions)}
                 GROUP BY date
                 ORDER BY date ASC
@@ -58,8 +88,16 @@ class TradingVolume(db.Model):
             return {'error': f'Daily volumes query error: {str(e)}'}
         
     @classmethod
+    @analytics_cache.cached('trading_volume_fact')
     def get_summary_stats(cls, start_date=None, end_date=None, customer_uid=None, bd_in_charge=None):  
         """Get comprehensive trading volume summary statistics"""
+        from_cube = cls._from_cube(
+            'summary_stats', start_date=start_date, end_date=end_date,
+            customer_uid=customer_uid, bd_in_charge=bd_in_charge
+        )
+        if from_cube is not None:
+            return from_cube
+
         try:
             # Use shared filter builder
             conditions, params = cls._build_sql_filters(
@@ -88,7 +126,7 @@ class TradingVolume(db.Model):
                         THEN COALESCE(SUM(fees), 0) / COUNT(DISTINCT date)
                         ELSE 0
                     END AS avg_daily_fees
-                FROM v_trading_volume_detail
+                FROM trading_volume_fact
                 WHERE {' AND '.join(conditions)}
             """
 
@@ -141,9 +179,11 @@ class TradingVolume(db.Model):
     @classmethod
     def get_paginated_trading_data(cls, start_date=None, end_date=None, customer_uid=None,
                                   bd_in_charge=None, trade_type=None, trade_side=None,
-                                  sort_by='date', sort_order='desc', page=1, per_page=20):
+                                  sort_by='date', sort_order='desc', page=1, per_page=20,
+                                  count_mode=COUNT_EXACT):
         """
         Get paginated trading volume data using raw SQL for better performance
+        The total comes from the count cache, or a planner estimate with count_mode='estimate'
         """
         try:
             # Build filters
@@ -168,15 +208,14 @@ class TradingVolume(db.Model):
             # Calculate offset
             offset = (page - 1) * per_page
             
-            # Get total count first
-            count_sql = f"""
-                SELECT COUNT(*) as total_count
-                FROM v_trading_volume_detail 
-                WHERE {' AND '.join(conditions)}
-            """
-            
-            count_result = db.session.execute(text(count_sql), params).fetchone()
-            total_count = count_result.total_count if count_result else 0
+            # Get total count first (cached per filter set)
+            total_count, total_is_estimate = count_sql(
+                f"SELECT 1 FROM trading_volume_fact WHERE {' AND '.join(conditions)}",
+                dict(params),
+                ('trading_volume_fact',),
+                mode=count_mode,
+                filtered=len(conditions) > 1
+            )
             
             # Get paginated data
             data_sql = f"""
@@ -189,7 +228,7 @@ class TradingVolume(db.Model):
                     volume,
                     fees,
                     bd_in_charge
-                FROM v_trading_volume_detail 
+                FROM trading_volume_fact 
                 WHERE {' AND '.join(conditions)}
                 {sort_clause}
                 LIMIT :per_page OFFSET :offset
@@ -224,7 +263,7 @@ class TradingVolume(db.Model):
             has_next = page < total_pages
             has_prev = page > 1
             
-            return {
+            result = {
                 'trading_volume': trading_data,
                 'total': total_count,
                 'pages': total_pages,
@@ -233,13 +272,130 @@ class TradingVolume(db.Model):
                 'has_next': has_next,
                 'has_prev': has_prev
             }
+            if count_mode != COUNT_EXACT:
+                result['total_is_estimate'] = total_is_estimate
+            return result
             
         except Exception as e:
             return {'error': f'Paginated trading data error: {str(e)}'}
     
+    # Row identity used as the keyset tiebreaker (matches the composite primary key)
+    KEYSET_COLUMNS = ['date', 'customer_uid', 'trade_type', 'trade_side']
+
+    @classmethod
+    def keyset_columns(cls, sort_by):
+        """Columns a keyset cursor holds for sort_by: the sort column, then the row identity"""
+        if sort_by not in ['date', 'customer_uid', 'volume', 'fees']:
+            sort_by = 'date'
+        return [sort_by] + [c for c in cls.KEYSET_COLUMNS if c != sort_by]
+
+    @classmethod
+    def get_keyset_trading_data(cls, start_date=None, end_date=None, customer_uid=None,
+                                bd_in_charge=None, trade_type=None, trade_side=None,
+                                sort_by='date', sort_order='desc', after=None,
+                                per_page=20, include_total=False):
+        """
+        Get one page of trading volume data using keyset (cursor) pagination.
+        Pages are resolved with a row-value range predicate instead of OFFSET,
+        and the total count is only computed when include_total is set.
+
+        :param after: key values of the last row of the previous page
+                      (sort column followed by KEYSET_COLUMNS), or None for the first page
+        :return: dict with trading_volume, has_next, last_key and optional total
+        """
+        try:
+            conditions, params = cls._build_sql_filters(
+                start_date, end_date, customer_uid, bd_in_charge, trade_type, trade_side
+            )
+
+            key_columns = cls.keyset_columns(sort_by)
+            descending = sort_order.lower() == 'desc'
+            sort_direction = 'DESC' if descending else 'ASC'
+
+            total_count = None
+            if include_total:
+                count_sql = f"""
+                    SELECT COUNT(*) as total_count
+                    FROM trading_volume_fact
+                    WHERE {' AND '.join(conditions)}
+                """
+                count_result = db.session.execute(text(count_sql), params).fetchone()
+                total_count = count_result.total_count if count_result else 0
+
+            if after is not None:
+                if len(after) != len(key_columns):
+                    raise ValueError('Cursor does not match sort columns')
+                placeholders = []
+                for i, value in enumerate(after):
+                    params[f'k{i}'] = value
+                    placeholders.append(f':k{i}')
+                operator = '<' if descending else '>'
+                conditions.append(
+                    f"({', '.join(key_columns)}) {operator} ({', '.join(placeholders)})"
+                )
+
+            order_clause = ', '.join(f"{c} {sort_direction}" for c in key_columns)
+            data_sql = f"""
+                SELECT
+                    date,
+                    customer_uid,
+                    customer_name,
+                    trade_type,
+                    trade_side,
+                    volume,
+                    fees,
+                    bd_in_charge
+                FROM trading_volume_fact
+                WHERE {' AND '.join(conditions)}
+                ORDER BY {order_clause}
+                LIMIT :limit
+            """
+            params['limit'] = per_page + 1
+
+            rows = db.session.execute(text(data_sql), params).fetchall()
+            has_next = len(rows) > per_page
+            rows = rows[:per_page]
+
+            last_key = None
+            if has_next and rows:
+                last_row = rows[-1]._mapping
+                last_key = [last_row[c] for c in key_columns]
+
+            trading_data = []
+            for row in rows:
+                row_dict = dict(row._mapping)
+                for key, value in row_dict.items():
+                    if value is not None:
+                        if hasattr(value, 'isoformat'):
+                            row_dict[key] = value.isoformat()
+                        elif hasattr(value, '__float__'):
+                            row_dict[key] = float(value)
+                trading_data.append(row_dict)
+
+            result = {
+                'trading_volume': trading_data,
+                'has_next': has_next,
+                'last_key': last_key,
+                'per_page': per_page
+            }
+            if include_total:
+                result['total'] = total_count
+            return result
+
+        except Exception as e:
+            return {'error': f'Keyset trading data error: {str(e)}'}
+
     @classmethod
+    @analytics_cache.cached('trading_volume_fact')
     def get_breakdown_by_type(cls, start_date=None, end_date=None, customer_uid=None, bd_in_charge=None):
         """Get volume and fees breakdown by trade type (spot vs futures)"""
+        from_cube = cls._from_cube(
+            'breakdown_by_type', start_date=start_date, end_date=end_date,
+            customer_uid=customer_uid, bd_in_charge=bd_in_charge
+        )
+        if from_cube is not None:
+            return from_cube
+
         try:
             # Use shared filter builder
             conditions, params = cls._build_sql_filters(
@@ -252,7 +408,7 @@ class TradingVolume(db.Model):
                     COALESCE(SUM(volume), 0) AS total_volume,
                     COALESCE(SUM(fees), 0) AS total_fees,
                     COUNT(*) AS trade_count
-                FROM v_trading_volume_detail
+                FROM trading_volume_fact
                 WHERE {' AND '.join(conditions)}
                 GROUP BY trade_type
                 ORDER BY total_volume DESC
@@ -277,8 +433,16 @@ class TradingVolume(db.Model):
             return {'error': f'Breakdown by type error: {str(e)}'}
 
     @classmethod
+    @analytics_cache.cached('trading_volume_fact')
     def get_breakdown_by_side(cls, start_date=None, end_date=None, customer_uid=None, bd_in_charge=None):
         """Get volume and fees breakdown by trade side (maker vs taker)"""
+        from_cube = cls._from_cube(
+            'breakdown_by_side', start_date=start_date, end_date=end_date,
+            customer_uid=customer_uid, bd_in_charge=bd_in_charge
+        )
+        if from_cube is not None:
+            return from_cube
+
         try:
             # Use shared filter builder
             conditions, params = cls._build_sql_filters(
@@ -291,7 +455,7 @@ class TradingVolume(db.Model):
                     COALESCE(SUM(volume), 0) AS total_volume,
                     COALESCE(SUM(fees), 0) AS total_fees,
                     COUNT(*) AS trade_count
-                FROM v_trading_volume_detail
+                FROM trading_volume_fact
                 WHERE {' AND '.join(conditions)}
                 GROUP BY trade_side
                 ORDER BY total_volume DESC
@@ -316,15 +480,24 @@ class TradingVolume(db.Model):
             return {'error': f'Breakdown by side error: {str(e)}'}
     
     @classmethod
+    @analytics_cache.cached('trading_volume_fact')
     def get_top_customers(cls, start_date=None, end_date=None, trade_type=None, trade_side=None, bd_in_charge=None):
         """
         Get top customers by volume
         Returns: list of top customers by volume
         """
+        from_cube = cls._from_cube(
+            'top_customers', start_date=start_date, end_date=end_date,
+            trade_type=trade_type, trade_side=trade_side, bd_in_charge=bd_in_charge
+        )
+        if from_cube is not None:
+            return from_cube
+
         try:
             # Use shared filter builder
             conditions, params = cls._build_sql_filters(
-                start_date, end_date, trade_type, trade_side, bd_in_charge
+                start_date, end_date, bd_in_charge=bd_in_charge,
+                trade_type=trade_type, trade_side=trade_side
             )
 
             sql = f"""
@@ -332,7 +505,7 @@ class TradingVolume(db.Model):
                     customer_uid,
                     customer_name,
                     SUM(volume) AS total_volume
-                FROM v_trading_volume_detail
+                FROM trading_volume_fact
                 WHERE {' AND '.join(conditions)}
                 GROUP BY customer_uid, customer_name
                 ORDER BY total_volume DESC
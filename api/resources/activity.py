@@ -4,16 +4,21 @@ from api.models.activity import Activity
 from api.models.lead import Lead
 from api.models.customer import Customer
 from api.models.contact import Contact
-from api.schemas.activity_schema import ActivitySchema, ActivityCreateSchema, TaskCreateSchema, TaskUpdateSchema
+from api.schemas.activity_schema import ActivitySchema, ActivityCreateSchema, TaskCreateSchema, TaskUpdateSchema, dump_activities
 from db.db_config import db
 from http import HTTPStatus
 from sqlalchemy import desc, and_, or_, asc
 from datetime import datetime, timedelta
+from api.exceptions import ValidationError
+from api.utils.pagination import is_cursor_request, wants_total, paginate_keyset, parse_sort_order
+from api.utils.counts import get_count_mode, count_query, COUNT_ESTIMATE
+from api.utils.conditional import conditional_get
 
 activity_schema = ActivitySchema()
 activities_schema = ActivitySchema(many=True)
 
 class ActivityListResource(Resource):
+    @conditional_get('activity', 'lead', 'customer', 'contact')
     def get(self):
         """Get activities with filtering, sorting, and pagination"""
         try:
@@ -111,6 +116,36 @@ class ActivityListResource(Resource):
                         )
                     )
             
+            # Keyset pagination (opt-in with ?cursor=)
+            if is_cursor_request(request.args):
+                keyset_fields = {
+                    'date_created': Activity.date_created,
+                    'activity_id': Activity.activity_id
+                }
+                if sort_by not in keyset_fields:
+                    return {'error': f"Cursor pagination does not support sorting by '{sort_by}'"}, 400
+                descending = parse_sort_order(request.args)
+                page_data = paginate_keyset(
+                    query,
+                    keyset_fields[sort_by],
+                    Activity.activity_id,
+                    descending=descending,
+                    sort_key=f"activity:{sort_by}:{'desc' if descending else 'asc'}",
+                    cursor_token=request.args.get('cursor'),
+                    per_page=per_page,
+                    with_total=wants_total(request.args)
+                )
+
+                response = {
+                    'activities': dump_activities(activities_schema, page_data['items']),
+                    'next_cursor': page_data['next_cursor'],
+                    'has_next': page_data['has_next'],
+                    'per_page': per_page
+                }
+                if 'total' in page_data:
+                    response['total'] = page_data['total']
+                return response, 200
+
             # Apply sorting
             if hasattr(Activity, sort_by):
                 sort_column = getattr(Activity, sort_by)
@@ -122,17 +157,20 @@ class ActivityListResource(Resource):
                 # Default sorting
                 query = query.order_by(desc(Activity.date_created))
             
-            # Execute query with pagination
+            # Execute query with pagination (total from the count cache or a planner estimate)
+            count_mode = get_count_mode(request.args)
             result = query.paginate(
                 page=page, 
                 per_page=per_page, 
-                error_out=False
+                error_out=False,
+                count=False
             )
+            result.total, total_is_estimate = count_query(query, ('activity',), count_mode)
             
-            # Serialize results
-            activities = activities_schema.dump(result.items)
+            # Serialize results with related leads/customers loaded in bulk
+            activities = dump_activities(activities_schema, result.items)
             
-            return {
+            response = {
                 'activities': activities,
                 'total': result.total,
                 'pages': result.pages,
@@ -140,8 +178,13 @@ class ActivityListResource(Resource):
                 'per_page': result.per_page,
                 'has_next': result.has_next,
                 'has_prev': result.has_prev
-            }, 200
-            
+            }
+            if count_mode == COUNT_ESTIMATE:
+                response['total_is_estimate'] = total_is_estimate
+            return response, 200
+
+        except ValidationError as e:
+            return {'error': e.message}, 400
         except Exception as e:
             return {'error': str(e)}, 500
 
@@ -200,6 +243,7 @@ class ActivityListResource(Resource):
             return {'error': str(e)}, 500
 
 class ActivityResource(Resource):
+    @conditional_get('activity', 'lead', 'customer', 'contact')
     def get(self, activity_id):
         """Get a specific activity"""
         try:
@@ -265,6 +309,7 @@ class ActivityResource(Resource):
             return {'error': str(e)}, 500
 
 class ActivityTimelineResource(Resource):
+    @conditional_get('activity', 'lead', 'customer', 'contact')
     def get(self):
         """Get activity timeline for leads/customers"""
         try:
@@ -298,7 +343,7 @@ class ActivityTimelineResource(Resource):
             # Order by date and limit
             activities = query.order_by(desc(Activity.date_created)).limit(limit).all()
             
-            result = activities_schema.dump(activities)
+            result = dump_activities(activities_schema, activities)
             return {'activities': result}, 200
             
         except Exception as e:
@@ -395,6 +440,7 @@ class TaskListResource(Resource):
 class ActivityStatsResource(Resource):
     """Resource for activity statistics"""
     
+    @conditional_get('activity')
     def get(self):
         """Get activity statistics"""
         # Get counts by category
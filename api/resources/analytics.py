@@ -1,29 +1,42 @@
 from flask_restful import Resource
 from flask import request
-from api.services.analytics_service import get_lead_funnel, get_monthly_lead_conversion_rate, get_activity_analytics, get_avg_daily_activity
+from api.services.analytics_service import get_lead_funnel, get_monthly_lead_conversion_rate, get_activity_analytics, get_avg_daily_activity, CONVERSION_BREAKDOWNS
 from api.schemas.analytics_schema import ActivityAnalyticsSchema
+from api.utils.cache import analytics_cache
+from api.utils.conditional import conditional_get
 from http import HTTPStatus
 
 class LeadConversionRateResource(Resource):
+    @conditional_get('lead', 'customer', 'contact')
     def get(self):
         """
         GET /api/analytics/monthly-lead-conversion-rate
+        Query params: start_date, end_date, bd_in_charge, breakdown ('bd', 'source')
         """
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         bd_in_charge = request.args.get('bd_in_charge')
+        breakdown = request.args.get('breakdown')
+
+        if breakdown and breakdown not in CONVERSION_BREAKDOWNS:
+            return {
+                'message': 'Invalid breakdown',
+                'error': f"breakdown must be one of {sorted(CONVERSION_BREAKDOWNS)}"
+            }, HTTPStatus.BAD_REQUEST
 
         try:
             result = get_monthly_lead_conversion_rate(
                 start_date=start_date,
                 end_date=end_date,
-                bd_in_charge=bd_in_charge
+                bd_in_charge=bd_in_charge,
+                breakdown=breakdown or None
             )
             return result, HTTPStatus.OK
         except Exception as e:
             return {'message': 'Error calculating lead conversion rate', 'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
 
 class ActivityAnalyticsResource(Resource):
+    @conditional_get('activity')
     def get(self):
         """
         GET /api/analytics/activity-analytics
@@ -46,6 +59,7 @@ class ActivityAnalyticsResource(Resource):
             return {'message': 'Error calculating activity analytics', 'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
 
 class AvgDailyActivityResource(Resource):
+    @conditional_get('activity')
     def get(self):
         """
         GET /api/analytics/avg-daily-activity
@@ -66,6 +80,7 @@ class AvgDailyActivityResource(Resource):
             return {'message': 'Error calculating average daily activity', 'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
 
 class LeadFunnelResource(Resource):
+    @conditional_get('lead')
     def get(self):
         """
         GET /api/analytics/lead-funnel
@@ -83,4 +98,12 @@ class LeadFunnelResource(Resource):
             return result, HTTPStatus.OK
 
         except Exception as e:
-            return {'message': 'Error calculating lead funnel', 'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
\ No newline at end of file
+            return {'message': 'Error calculating lead funnel', 'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+class AnalyticsCacheStatsResource(Resource):
+    def get(self):
+        """
+        GET /api/analytics/cache-stats
+        Returns hit/miss/eviction/invalidation counters of the analytics result cache
+        """
+        return analytics_cache.stats(), HTTPStatus.OK
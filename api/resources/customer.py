@@ -6,6 +6,10 @@ from api.models.contact import Contact
 from api.schemas.customer_schema import CustomerSchema
 from db.db_config import db
 from http import HTTPStatus
+from api.exceptions import ValidationError
+from api.utils.pagination import is_cursor_request, wants_total, paginate_keyset, parse_sort_order
+from api.utils.counts import get_count_mode, count_query, COUNT_ESTIMATE
+from api.utils.conditional import conditional_get
 
 class CustomerResource(Resource):
     def __init__(self):
@@ -13,9 +17,11 @@ class CustomerResource(Resource):
         self.schema = CustomerSchema()
         self.schema_many = CustomerSchema(many=True)
 
+    @conditional_get('customer', 'contact', 'lead')
     def get(self, customer_uid=None):
         """
         GET /api/customers       - List customers (with opt pagination/filtering)
+        GET /api/customers?cursor=  - List customers with keyset pagination
         GET /api/customers/<customer_uid>  - Get a single customer by UID
         """
         if customer_uid is None:
@@ -26,6 +32,7 @@ class CustomerResource(Resource):
             is_closed = request.args.get('is_closed')               # Optional filter by closed status
             sort_by = request.args.get('sort_by')                   # Sort field
             sort_order = request.args.get('sort_order', 'desc')     # Sort direction
+            count_mode = get_count_mode(request.args)               # exact (cached) or estimate
             
             if is_closed is not None:
                 is_closed = is_closed.lower() == 'true'
@@ -37,7 +44,40 @@ class CustomerResource(Resource):
                 query = query.filter(Customer.type == customer_type)
             if is_closed:
                 query = query.filter(Customer.is_closed == is_closed)
-            
+
+            # Keyset pagination (opt-in with ?cursor=)
+            if is_cursor_request(request.args):
+                keyset_fields = {
+                    'date_created': Customer.date_created,
+                    'name': Customer.name,
+                    'customer_uid': Customer.customer_uid
+                }
+                cursor_sort = sort_by or 'date_created'
+                if cursor_sort not in keyset_fields:
+                    raise ValidationError(
+                        f"Cursor pagination does not support sorting by '{cursor_sort}'"
+                    )
+                descending = parse_sort_order(request.args)
+                page_data = paginate_keyset(
+                    query,
+                    keyset_fields[cursor_sort],
+                    Customer.customer_uid,
+                    descending=descending,
+                    sort_key=f"customer:{cursor_sort}:{'desc' if descending else 'asc'}",
+                    cursor_token=request.args.get('cursor'),
+                    per_page=per_page,
+                    with_total=wants_total(request.args)
+                )
+
+                response = {
+                    'customer': Customer.to_dict_list(page_data['items']),
+                    'next_cursor': page_data['next_cursor'],
+                    'has_next': page_data['has_next']
+                }
+                if 'total' in page_data:
+                    response['total'] = page_data['total']
+                return response, HTTPStatus.OK
+
             # Handle sorting
             if sort_by:
                 # Map frontend field names to database fields/expressions
@@ -81,19 +121,25 @@ class CustomerResource(Resource):
                 # Default sorting by date_created DESC
                 query = query.order_by(Customer.date_created.desc())
             
-            # Paginate the results
-            pagination = query.paginate(page=page, per_page=per_page)
+            # Paginate the results (total from the count cache or a planner estimate)
+            pagination = query.paginate(page=page, per_page=per_page, count=False)
+            pagination.total, total_is_estimate = count_query(
+                query, ('customer', 'contact', 'lead'), count_mode
+            )
             
-            # Convert to dict with lead information
-            customers_data = [customer.to_dict(include_leads=False) for customer in pagination.items]
+            # Convert to dict with lead information (batched primary lead lookup)
+            customers_data = Customer.to_dict_list(pagination.items)
             
             # Return paginated, serialized results
-            return {
+            response = {
                 'customer': customers_data,
                 'total': pagination.total,
                 'pages': pagination.pages,
                 'current_page': page
-            }, HTTPStatus.OK
+            }
+            if count_mode == COUNT_ESTIMATE:
+                response['total_is_estimate'] = total_is_estimate
+            return response, HTTPStatus.OK
         
         # If a UID is provided, return single customer with related leads
         customer = Customer.query.get_or_404(customer_uid)
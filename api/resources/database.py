@@ -1,9 +1,11 @@
 from flask_restful import Resource
 from flask import request
-from db.db_config import db
+from db.db_config import db, get_pool_settings, pool_stats
 import os
 from pathlib import Path
 from api.utils.logging_config import get_logger
+from api.utils.cache import clear_caches
+from api.services.jobs import job_runner, JobQueueFullError
 import subprocess
 import sys
 from sqlalchemy import inspect, text
@@ -75,6 +77,9 @@ class DatabaseInitResource(Resource):
             schema_result = self._initialize_schema()
             if schema_result.get('status') != 'success':
                 return schema_result
+
+            # Schema was rebuilt, cached analytics no longer apply
+            clear_caches()
             
             # Verify tables were actually created
             inspector = inspect(db.engine)
@@ -88,23 +93,23 @@ class DatabaseInitResource(Resource):
                     'schema_result': schema_result
                 }
             
-            # Handle different modes
-            if mode == 'test_data':
-                test_data_result = self._generate_test_data()
-                return {
-                    'status': 'success',
-                    'message': 'Database initialized with test data',
-                    'schema': schema_result,
-                    'test_data': test_data_result
-                }
-            elif mode == 'full_demo':
-                demo_result = self._setup_demo_environment()
+            # Data generation runs as a background job; poll /api/jobs/<job_id>
+            if mode in ('test_data', 'full_demo'):
+                try:
+                    job = job_runner.submit(f"init-db:{mode}", self._run_data_setup, mode, schema_result)
+                except JobQueueFullError as e:
+                    return {
+                        'status': 'error',
+                        'message': 'Too many background jobs, try again later',
+                        'error': str(e)
+                    }, 503
                 return {
-                    'status': 'success', 
-                    'message': 'Database initialized for full demo',
+                    'status': 'accepted',
+                    'message': f'Schema initialized, {mode} setup running in the background',
                     'schema': schema_result,
-                    'demo_setup': demo_result
-                }
+                    'job_id': job.id,
+                    'status_url': f'/api/jobs/{job.id}'
+                }, 202
             else:
                 return schema_result
             
@@ -116,6 +121,30 @@ class DatabaseInitResource(Resource):
                 'error': str(e)
             }, 500
     
+    def _run_data_setup(self, job, mode, schema_result):
+        """Background job body for the test_data and full_demo modes."""
+        if mode == 'test_data':
+            job.update(0.1, 'Generating test data')
+            test_data_result = self._generate_test_data()
+            clear_caches()
+            return {
+                'status': 'success' if test_data_result.get('status') == 'success' else 'error',
+                'message': 'Database initialized with test data',
+                'schema': schema_result,
+                'test_data': test_data_result,
+                'error': test_data_result.get('error')
+            }
+
+        demo_result = self._setup_demo_environment(job)
+        clear_caches()
+        return {
+            'status': 'success' if demo_result.get('status') == 'success' else 'error',
+            'message': 'Database initialized for full demo',
+            'schema': schema_result,
+            'demo_setup': demo_result,
+            'error': demo_result.get('error')
+        }
+
     def _parse_sql_statements(self, sql_content):
         """Parse SQL content into individual statements, handling PostgreSQL functions."""
         # Use a more robust approach - execute the entire SQL file as one transaction
@@ -265,7 +294,7 @@ class DatabaseInitResource(Resource):
                 'error': str(e)
             }
     
-    def _setup_demo_environment(self):
+    def _setup_demo_environment(self, job=None):
         """Setup full demo environment with RBAC and extended test data."""
         try:
             # Verify tables exist before proceeding
@@ -281,6 +310,8 @@ class DatabaseInitResource(Resource):
                 }
             
             # Generate extended test data (6 months)
+            if job:
+                job.update(0.1, 'Generating demo data')
             env = os.environ.copy()
             env['DATA_VOLUME'] = 'large'
             env['CLEAR_EXISTING_DATA'] = 'true'
@@ -305,6 +336,8 @@ class DatabaseInitResource(Resource):
                 }
             
             # Setup RBAC (we'll implement this next)
+            if job:
+                job.update(0.8, 'Setting up RBAC')
             rbac_result = self._setup_rbac()
             
             return {
@@ -362,4 +395,18 @@ class DatabaseInitResource(Resource):
                 'status': 'error',
                 'message': 'RBAC setup failed',
                 'error': str(e)
-            } 
\ No newline at end of file
+            } 
+
+class DatabasePoolStatsResource(Resource):
+    """Live connection pool statistics for tuning DB_POOL_* settings."""
+
+    def get(self):
+        """
+        GET /api/db-pool-stats
+        Returns pool size, checked in/out connections, overflow and checkout wait times
+        """
+        return {
+            'status': 'success',
+            'settings': get_pool_settings(),
+            'pool': pool_stats(db.engine)
+        }
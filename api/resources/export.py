@@ -0,0 +1,50 @@
+from flask_restful import Resource
+from flask import Response, request, stream_with_context
+from http import HTTPStatus
+from datetime import datetime
+from api.services.export_service import EXPORT_ENTITIES, EXPORT_FORMATS, stream_export
+from api.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+class ExportResource(Resource):
+    def get(self, entity):
+        """
+        GET /api/export/<entity>   - Stream every row of leads, customers, activities or trading-volume
+        Query params: format ('csv', 'ndjson', 'parquet'), start_date, end_date, bd_in_charge
+        """
+        if entity not in EXPORT_ENTITIES:
+            return {
+                'message': 'Unknown export entity',
+                'error': f"entity must be one of {sorted(EXPORT_ENTITIES)}"
+            }, HTTPStatus.NOT_FOUND
+
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return {
+                'message': 'Invalid export format',
+                'error': f"format must be one of {sorted(EXPORT_FORMATS)}"
+            }, HTTPStatus.BAD_REQUEST
+
+        filters = {
+            'start_date': request.args.get('start_date'),
+            'end_date': request.args.get('end_date'),
+            'bd_in_charge': request.args.get('bd_in_charge')
+        }
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        filename = f"{entity}_{datetime.utcnow():%Y%m%d_%H%M%S}.{extension}"
+        logger.info(f"Streaming {entity} export as {export_format}")
+
+        try:
+            chunks = stream_export(entity, export_format, filters)
+        except Exception as e:
+            return {'message': f'Error exporting {entity}', 'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                'Cache-Control': 'no-store'
+            }
+        )
@@ -0,0 +1,23 @@
+from flask_restful import Resource
+from http import HTTPStatus
+from api.services.jobs import job_runner
+
+class JobListResource(Resource):
+    def get(self):
+        """
+        GET /api/jobs
+        Lists background jobs known to this process, newest first
+        """
+        return {'jobs': [job.to_dict() for job in job_runner.list_jobs()]}, HTTPStatus.OK
+
+class JobResource(Resource):
+    def get(self, job_id):
+        """
+        GET /api/jobs/<job_id>
+        Returns status ('queued', 'running', 'succeeded', 'failed'), progress and result of a job.
+        Jobs are per worker process: a 404 may mean another worker runs it, so clients retry.
+        """
+        job = job_runner.get(job_id)
+        if job is None:
+            return {'error': f'Job {job_id} not found'}, HTTPStatus.NOT_FOUND
+        return job.to_dict(), HTTPStatus.OK
@@ -10,6 +10,11 @@ from db.db_config import db
 from http import HTTPStatus            # For readable HTTP status codes
 from api.exceptions import ValidationError, NotFoundError, DatabaseError, ConflictError
 from api.utils.logging_config import get_logger, log_database_operation
+from api.utils.pagination import is_cursor_request, wants_total, paginate_keyset, parse_sort_order
+from api.services.lead_search import apply_lead_search
+from api.utils.counts import get_count_mode, count_query, COUNT_ESTIMATE
+from api.utils.conditional import conditional_get
+from api.services.lead_batch_service import create_leads, update_leads, convert_leads, LEAD_BATCH_MAX_ITEMS
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from marshmallow import ValidationError as MarshmallowValidationError
 
@@ -24,9 +29,13 @@ class LeadResource(Resource):
         self.customer_schema = CustomerSchema()
         self.contact_schema = ContactSchema()
 
+    @conditional_get('lead')
     def get(self, id=None):
         """
         GET /api/leads           - List leads (with optional pagination/filtering/sorting)
+        GET /api/leads?cursor=   - List leads with keyset pagination (follow next_cursor)
+        GET /api/leads?search=&rank=true - Search leads, ordered by relevance
+        GET /api/leads?count=estimate    - Use a planner estimate for large totals
         GET /api/leads/<id>      - Get a single lead by ID
         """
         try:
@@ -38,7 +47,10 @@ class LeadResource(Resource):
                 source = request.args.get('source')
                 search = request.args.get('search')
                 sort_by = request.args.get('sort_by')
+                # Relevance ranking for search (sort_by=relevance is an alias for rank=true)
+                rank = request.args.get('rank', 'false').lower() == 'true' or sort_by == 'relevance'
                 sort_order = request.args.get('sort_order', 'desc')
+                count_mode = get_count_mode(request.args)
 
                 # Validate pagination parameters
                 if page < 1:
@@ -53,18 +65,59 @@ class LeadResource(Resource):
                     query = query.filter(Lead.status == status)
                 if source:
                     query = query.filter(Lead.source == source)
-                if search:
-                    search_term = f"%{search}%"
-                    query = query.filter(
-                        db.or_(
-                            Lead.full_name.ilike(search_term),
-                            Lead.company_name.ilike(search_term),
-                            Lead.email.ilike(search_term)
+                # Indexed search (tsvector/pg_trgm on Postgres, FTS5 on SQLite)
+                query, rank_expression = apply_lead_search(query, search, rank=rank)
+
+                # Keyset pagination (opt-in with ?cursor=)
+                if is_cursor_request(request.args):
+                    if rank:
+                        raise ValidationError("Cursor pagination does not support relevance ranking")
+                    # date_created is nullable: paginate_keyset pages NULL dates last
+                    keyset_fields = {
+                        'date_created': Lead.date_created,
+                        'full_name': Lead.full_name,
+                        'type': Lead.type,
+                        'source': Lead.source,
+                        'bd_in_charge': Lead.bd_in_charge
+                    }
+                    cursor_sort = sort_by or 'date_created'
+                    if cursor_sort not in keyset_fields:
+                        raise ValidationError(
+                            f"Cursor pagination does not support sorting by '{cursor_sort}'"
                         )
+                    descending = parse_sort_order(request.args)
+                    page_data = paginate_keyset(
+                        query,
+                        keyset_fields[cursor_sort],
+                        Lead.lead_id,
+                        descending=descending,
+                        sort_key=f"lead:{cursor_sort}:{'desc' if descending else 'asc'}",
+                        cursor_token=request.args.get('cursor'),
+                        per_page=per_page,
+                        with_total=wants_total(request.args)
                     )
 
+                    log_database_operation("SELECT", "lead", {
+                        'filters': {'status': status, 'source': source, 'search': search},
+                        'pagination': {'mode': 'cursor', 'per_page': per_page}
+                    })
+
+                    response = {
+                        'leads': self.schema_many.dump(page_data['items']),
+                        'next_cursor': page_data['next_cursor'],
+                        'has_next': page_data['has_next'],
+                        'sort_by': cursor_sort,
+                        'sort_order': 'desc' if descending else 'asc'
+                    }
+                    if 'total' in page_data:
+                        response['total'] = page_data['total']
+                    return response, HTTPStatus.OK
+
                 # Apply sorting if requested
-                if sort_by:
+                if rank_expression is not None:
+                    # Most relevant first, newest first among equally relevant leads
+                    query = query.order_by(rank_expression.desc(), Lead.date_created.desc())
+                elif sort_by and sort_by != 'relevance':
                     # Map frontend field names to model attributes if needed
                     field_mapping = {
                         'date_created': Lead.date_created,
@@ -92,7 +145,9 @@ class LeadResource(Resource):
 
                 # Paginate the results
                 try:
-                    pagination = query.paginate(page=page, per_page=per_page)
+                    # Total comes from the count cache (or a planner estimate with count=estimate)
+                    pagination = query.paginate(page=page, per_page=per_page, count=False)
+                    pagination.total, total_is_estimate = count_query(query, ('lead',), count_mode)
                 except Exception as e:
                     logger.error(f"Pagination error: {e}")
                     raise DatabaseError("Error retrieving leads", e)
@@ -103,14 +158,17 @@ class LeadResource(Resource):
                 })
 
                 # Return paginated, serialized results
-                return {
+                response = {
                     'leads': self.schema_many.dump(pagination.items),
                     'total': pagination.total,
                     'pages': pagination.pages,
                     'current_page': page,
                     'sort_by': sort_by,
                     'sort_order': sort_order
-                }, HTTPStatus.OK
+                }
+                if count_mode == COUNT_ESTIMATE:
+                    response['total_is_estimate'] = total_is_estimate
+                return response, HTTPStatus.OK
 
             # If an ID is provided, return a single lead or 404 if not found
             lead = Lead.query.get(id)
@@ -315,4 +373,82 @@ class LeadResource(Resource):
             raise e
         except Exception as e:
             logger.error(f"Unexpected error in delete_lead: {e}", exc_info=True)
-            raise DatabaseError("Unexpected error deleting lead", e)
\ No newline at end of file
+            raise DatabaseError("Unexpected error deleting lead", e)
+
+def _get_batch_items(key='leads'):
+    """Read a batch body: a JSON list, or an object holding the list under key"""
+    json_data = request.get_json(silent=True)
+    items = json_data.get(key) if isinstance(json_data, dict) else json_data
+    if not isinstance(items, list) or not items:
+        raise ValidationError(f"Provide a non-empty list of items (or {{'{key}': [...]}})")
+    if len(items) > LEAD_BATCH_MAX_ITEMS:
+        raise ValidationError(f"A batch can contain at most {LEAD_BATCH_MAX_ITEMS} items")
+    return items
+
+
+def _batch_response(results, success_status):
+    failed = sum(1 for result in results if result['status'] in ('error', 'locked'))
+    response = {
+        'results': results,
+        'succeeded': len(results) - failed,
+        'failed': failed
+    }
+    # 207 when some items failed, so clients know to inspect per-item results
+    return response, (success_status if failed == 0 else HTTPStatus.MULTI_STATUS)
+
+
+class LeadBatchResource(Resource):
+    """Bulk lead import/update: one transaction, per-item results"""
+
+    def post(self):
+        """
+        POST /api/leads/batch
+        Body: [lead, ...] or {"leads": [lead, ...]}
+        Creates every valid lead in one transaction; returns per-item results.
+        """
+        items = _get_batch_items()
+        try:
+            results = create_leads(items)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error creating lead batch: {e}")
+            raise DatabaseError("Error creating leads", e)
+        logger.info(f"Lead batch processed: {len(items)} items")
+        return _batch_response(results, HTTPStatus.CREATED)
+
+    def patch(self):
+        """
+        PATCH /api/leads/batch
+        Body: [{"lead_id": 1, <fields>}, ...] or {"leads": [...]}
+        Applies partial updates in one transaction; returns per-item results.
+        """
+        items = _get_batch_items()
+        try:
+            results = update_leads(items)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error updating lead batch: {e}")
+            raise DatabaseError("Error updating leads", e)
+        logger.info(f"Lead batch update processed: {len(items)} items")
+        return _batch_response(results, HTTPStatus.OK)
+
+
+class LeadConversionBatchResource(Resource):
+    """Bulk lead to customer conversion"""
+
+    def post(self):
+        """
+        POST /api/leads/batch/convert
+        Body: [{"lead_id": 1, "customer": {<customer fields>}}, ...] or {"conversions": [...]}
+        Converts every valid, unlocked lead in one transaction; returns per-item
+        results ('converted', 'error', or 'locked' when another request holds the lead).
+        """
+        items = _get_batch_items('conversions')
+        try:
+            results = convert_leads(items)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Database error converting lead batch: {e}")
+            raise DatabaseError("Error converting leads to customers", e)
+        logger.info(f"Lead conversion batch processed: {len(items)} items")
+        return _batch_response(results, HTTPStatus.OK)
@@ -3,12 +3,16 @@ from flask import request
 from api.models.trading_volume import TradingVolume
 from api.schemas.trading_volume_schema import TradingVolumeSchema, TradingVolumeQuerySchema
 from sqlalchemy import desc, asc
+from api.exceptions import ValidationError
+from api.utils.pagination import is_cursor_request, encode_cursor, decode_cursor
+from api.utils.conditional import conditional_get
 
 class TradingVolumeResource(Resource):
     def __init__(self):
         self.schema = TradingVolumeSchema()
         self.schema_many = TradingVolumeSchema(many=True)
 
+    @conditional_get('trading_volume_fact')
     def get(self):
         """Get trading volume with filtering, sorting and pagination using raw SQL"""
         try:
@@ -35,7 +39,37 @@ class TradingVolumeResource(Resource):
             trade_type = args.get('trade_type')
             trade_side = args.get('trade_side')
             bd_in_charge = args.get('bd_in_charge')
-            
+
+            # Keyset pagination (opt-in with ?cursor=)
+            if is_cursor_request(request.args):
+                sort_key = f"trading_volume:{sort_by}:{sort_order}"
+                try:
+                    after = decode_cursor(args.get('cursor'), sort_key)
+                except ValidationError as e:
+                    return {'error': e.message}, 400
+                if after is not None and len(after) != len(TradingVolume.keyset_columns(sort_by)):
+                    return {'error': 'Invalid pagination cursor'}, 400
+
+                result = TradingVolume.get_keyset_trading_data(
+                    start_date=start_date,
+                    end_date=end_date,
+                    customer_uid=customer_uid,
+                    bd_in_charge=bd_in_charge,
+                    trade_type=trade_type,
+                    trade_side=trade_side,
+                    sort_by=sort_by,
+                    sort_order=sort_order,
+                    after=after,
+                    per_page=per_page,
+                    include_total=args.get('include_total', False)
+                )
+                if 'error' in result:
+                    return result, 500
+
+                last_key = result.pop('last_key')
+                result['next_cursor'] = encode_cursor(last_key, sort_key) if last_key else None
+                return result, 200
+
             # Use the new raw SQL method
             result = TradingVolume.get_paginated_trading_data(
                 start_date=start_date,
@@ -47,7 +81,8 @@ class TradingVolumeResource(Resource):
                 sort_by=sort_by,
                 sort_order=sort_order,
                 page=page,
-                per_page=per_page
+                per_page=per_page,
+                count_mode=args.get('count', 'exact')
             )
             
             # Check for errors
@@ -61,6 +96,7 @@ class TradingVolumeResource(Resource):
 
 
 class TradingSummaryResource(Resource):
+    @conditional_get('trading_volume_fact')
     def get(self):
         """Get trading volume summary statistics"""
         try:
@@ -104,6 +140,7 @@ class TradingSummaryResource(Resource):
             return {'error': str(e)}, 500
 
 class TradingVolumeTimeSeriesResource(Resource):
+    @conditional_get('trading_volume_fact')
     def get(self):
         """
         GET /api/trading-volume-time-series
@@ -125,6 +162,7 @@ class TradingVolumeTimeSeriesResource(Resource):
             return {'error': str(e)}, 500
 
 class TradingVolumeTopCustomersResource(Resource):
+    @conditional_get('trading_volume_fact')
     def get(self):
         """
         GET /api/analytics/trading-volume-top-customers
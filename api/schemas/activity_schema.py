@@ -1,4 +1,14 @@
 from marshmallow import Schema, fields, validate, validates_schema, ValidationError
+from marshmallow.experimental.context import Context
+
+def dump_activities(schema, activities):
+    """
+    Serialize activities with their leads and customer info preloaded in bulk.
+    The preloaded data is exposed to ActivitySchema through the marshmallow context.
+    """
+    from api.models.activity import Activity
+    with Context({'activity_related': Activity.preload_related(activities)}):
+        return schema.dump(activities)
 
 class ActivitySchema(Schema):
     activity_id = fields.Int(dump_only=True)
@@ -25,12 +35,23 @@ class ActivitySchema(Schema):
     is_task = fields.Method('get_is_task', dump_only=True)
     customer_info = fields.Method('get_customer_info', dump_only=True)
     
+    def _preloaded(self):
+        """Related data preloaded by dump_activities, or None for per-row lookups"""
+        return Context.get({}).get('activity_related')
+    
     def get_related_entity_name(self, obj):
         """Get the related entity name by calling the model method"""
+        preloaded = self._preloaded()
+        if preloaded is not None:
+            lead = preloaded['leads'].get(obj.lead_id)
+            return lead.full_name if lead else None
         return obj.get_related_entity_name()
     
     def get_related_entity_type(self, obj):
         """Get the related entity type by calling the model method"""
+        preloaded = self._preloaded()
+        if preloaded is not None:
+            return 'lead' if obj.lead_id in preloaded['leads'] else None
         return obj.get_related_entity_type()
     
     def get_is_overdue(self, obj):
@@ -43,6 +64,11 @@ class ActivitySchema(Schema):
         
     def get_customer_info(self, obj):
         """Get customer information for converted leads"""
+        preloaded = self._preloaded()
+        if preloaded is not None:
+            if obj.lead_id not in preloaded['leads']:
+                return None
+            return preloaded['customer_info'].get(obj.lead_id, {'is_converted': False})
         return obj.get_customer_info()
 
 class ActivityCreateSchema(Schema):
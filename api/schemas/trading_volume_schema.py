@@ -28,3 +28,8 @@ class TradingVolumeQuerySchema(Schema):
         'date', 'customer_uid', 'volume', 'fees'
     ]), load_default='date')
     sort_order = fields.String(allow_none=True, validate=validate.OneOf(['asc', 'desc']), load_default='desc')
+    # Keyset pagination - an empty cursor requests the first page
+    cursor = fields.String(allow_none=True)
+    include_total = fields.Boolean(load_default=False)
+    # Total count mode - 'estimate' uses planner row estimates for large sets
+    count = fields.String(validate=validate.OneOf(['exact', 'estimate']), load_default='exact')
@@ -1,87 +1,160 @@
 from sqlalchemy import text
 from db.db_config import db
+from api.utils.cache import analytics_cache
 
-def build_sql_filters(start_date=None, end_date=None, bd_in_charge=None):
+def build_sql_filters(start_date=None, end_date=None, bd_in_charge=None, bd_column='bd_in_charge', alias=None):
     """
     Build SQL WHERE conditions and parameters for lead queries
+    - bd_column: column holding the BD (activity uses assigned_to)
+    - alias: optional table alias to qualify columns with (for joined queries)
     """
     conditions = ["1=1"]
     params = {}
+    prefix = f"{alias}." if alias else ""
 
     if start_date:
-        conditions.append("date_created >= :start_date")
+        conditions.append(f"{prefix}date_created >= :start_date")
         params['start_date'] = start_date
     if end_date:
-        conditions.append("date_created <= :end_date")
+        conditions.append(f"{prefix}date_created <= :end_date")
         params['end_date'] = end_date
     if bd_in_charge:
-        conditions.append("bd_in_charge = :bd_in_charge")
+        conditions.append(f"{prefix}{bd_column} = :bd_in_charge")
         params['bd_in_charge'] = bd_in_charge
 
     return conditions, params
 
-def get_monthly_lead_conversion_rate(start_date=None, end_date=None, bd_in_charge=None):
+# Supported conversion rate breakdowns: name -> (lead column, customer column, output key)
+CONVERSION_BREAKDOWNS = {
+    'bd': ('l.bd_in_charge', 'c.bd_in_charge', 'bd_in_charge'),
+    'source': ('l.source', 'pl.source', 'source')
+}
+
+@analytics_cache.cached('lead', 'customer', 'contact')
+def get_monthly_lead_conversion_rate(start_date=None, end_date=None, bd_in_charge=None, breakdown=None):
     """
     Calculate the monthly conversion rate for the period and BD in charge
+    - Lead and customer counts are joined on month in one query, and months
+      without leads or conversions are filled with zeros (generate_series)
+    - breakdown: optional 'bd' or 'source' to split each month per BD / lead source
+      (a customer's source is the source of its primary lead)
     - Returns a list of dictionaries with monthly conversion rates
     """
     
     try: 
-        conditions, params = build_sql_filters(
-            start_date, end_date, bd_in_charge
+        if breakdown is not None and breakdown not in CONVERSION_BREAKDOWNS:
+            return {'error': f"Invalid breakdown '{breakdown}', expected one of {sorted(CONVERSION_BREAKDOWNS)}"}
+
+        lead_conditions, params = build_sql_filters(
+            start_date, end_date, bd_in_charge, alias='l'
+        )
+        customer_conditions, _ = build_sql_filters(
+            start_date, end_date, bd_in_charge, alias='c'
         )
+        params.setdefault('start_date', None)
+        params.setdefault('end_date', None)
 
-        # Get total new leads created for the period
-        total_leads_sql = f"""
-            SELECT
-                TO_CHAR(DATE_TRUNC('month', date_created), 'YYYY-MM') AS month,
-                COUNT(DISTINCT(lead_id)) AS total_leads
-            FROM lead
-            WHERE {' AND '.join(conditions)}
-            GROUP BY DATE_TRUNC('month', date_created)
-        """
+        if breakdown:
+            lead_dimension, customer_dimension, dimension_key = CONVERSION_BREAKDOWNS[breakdown]
+            dimensions_sql = "SELECT dimension FROM leads UNION SELECT dimension FROM conversions"
+        else:
+            lead_dimension = customer_dimension = 'CAST(NULL AS varchar)'
+            dimension_key = None
+            # Single series: keep zero-filled months even when both sides are empty
+            dimensions_sql = "SELECT CAST(NULL AS varchar) AS dimension"
 
-        # Get total converted leads for the period
-        total_converted_sql = f"""
+        customer_join = ""
+        if breakdown == 'source':
+            customer_join = """
+                LEFT JOIN contact ct ON ct.customer_uid = c.customer_uid AND ct.is_primary_contact = TRUE
+                LEFT JOIN lead pl ON pl.lead_id = ct.lead_id
+            """
+
+        sql = f"""
+            WITH leads AS (
+                SELECT
+                    DATE_TRUNC('month', l.date_created) AS month,
+                    {lead_dimension} AS dimension,
+                    COUNT(*) AS total_leads
+                FROM lead l
+                WHERE {' AND '.join(lead_conditions)}
+                GROUP BY 1, 2
+            ),
+            conversions AS (
+                SELECT
+                    DATE_TRUNC('month', c.date_created) AS month,
+                    {customer_dimension} AS dimension,
+                    COUNT(DISTINCT c.customer_uid) AS total_converted
+                FROM customer c
+                {customer_join}
+                WHERE {' AND '.join(customer_conditions)}
+                GROUP BY 1, 2
+            ),
+            bounds AS (
+                SELECT
+                    COALESCE(
+                        DATE_TRUNC('month', CAST(:start_date AS timestamp)),
+                        LEAST((SELECT MIN(month) FROM leads), (SELECT MIN(month) FROM conversions))
+                    ) AS first_month,
+                    COALESCE(
+                        DATE_TRUNC('month', CAST(:end_date AS timestamp)),
+                        GREATEST((SELECT MAX(month) FROM leads), (SELECT MAX(month) FROM conversions))
+                    ) AS last_month
+            ),
+            months AS (
+                SELECT generate_series(first_month, last_month, INTERVAL '1 month') AS month
+                FROM bounds
+            ),
+            dimensions AS (
+                {dimensions_sql}
+            )
             SELECT
-                TO_CHAR(DATE_TRUNC('month', date_created), 'YYYY-MM') AS month,
-                COUNT(DISTINCT(customer_uid)) AS total_converted
-            FROM customer
-            WHERE {' AND '.join(conditions)}
-            GROUP BY DATE_TRUNC('month', date_created)
+                TO_CHAR(m.month, 'YYYY-MM') AS month,
+                d.dimension,
+                COALESCE(l.total_leads, 0) AS total_leads,
+                COALESCE(cv.total_converted, 0) AS total_converted
+            FROM months m
+            CROSS JOIN dimensions d
+            LEFT JOIN leads l
+                ON l.month = m.month AND l.dimension IS NOT DISTINCT FROM d.dimension
+            LEFT JOIN conversions cv
+                ON cv.month = m.month AND cv.dimension IS NOT DISTINCT FROM d.dimension
+            ORDER BY m.month, d.dimension
         """
 
-        # Execute queries
-        total_leads_result = db.session.execute(text(total_leads_sql), params).fetchall()
-        total_converted_result = db.session.execute(text(total_converted_sql), params).fetchall()
+        rows = db.session.execute(text(sql), params).fetchall()
 
         # Process results
         conversion_data = []
-        for lead_row, converted_row in zip(total_leads_result, total_converted_result):
-            month = lead_row.month
-            total_leads = lead_row.total_leads
-            total_converted = converted_row.total_converted
+        for row in rows:
+            total_leads = row.total_leads
+            total_converted = row.total_converted
 
             if total_leads > 0:
                 conversion_rate = (total_converted / total_leads) * 100
             else:
                 conversion_rate = 0
 
-            conversion_data.append({
-                'month': month,
+            entry = {
+                'month': row.month,
                 'total_leads': total_leads,
                 'total_converted': total_converted,
                 'conversion_rate': conversion_rate
-            })
+            }
+            if dimension_key:
+                entry[dimension_key] = row.dimension
+            conversion_data.append(entry)
 
         return conversion_data
     
     except Exception as e:
         return {'error': f'Monthly lead conversion rate error: {str(e)}'}
     
+@analytics_cache.cached('activity')
 def get_activity_analytics(start_date=None, end_date=None, bd_in_charge=None, group_by='month'):
     """
     Returns activity analytics for the given period and BD in charge, grouped by the specified granularity.
+    Totals, per-type and per-status counts come from a single scan using GROUPING SETS.
 
     :param start_date: (optional) filter activities created on or after this date (YYYY-MM-DD)
     :param end_date: (optional) filter activities created on or before this date (YYYY-MM-DD)
@@ -91,7 +164,7 @@ def get_activity_analytics(start_date=None, end_date=None, bd_in_charge=None, gr
     """
     try:
         conditions, params = build_sql_filters(
-            start_date, end_date, bd_in_charge
+            start_date, end_date, bd_in_charge, bd_column='assigned_to'
         )
 
         # Determine date trunc granularity
@@ -105,87 +178,48 @@ def get_activity_analytics(start_date=None, end_date=None, bd_in_charge=None, gr
             'day': 'YYYY-MM-DD',
             'week': 'IYYY-IW',  # ISO week
             'month': 'YYYY-MM'
-        }[group_by]
+        }[date_trunc]
 
-        # Get total activities for the period
-        total_activities_sql = f"""
+        # One scan of activity (covered by idx_activity_category_date_assigned):
+        # grouping_level 3 = (period, bd) totals, 1 = by activity_type, 2 = by status
+        activity_sql = f"""
             SELECT
                 TO_CHAR(DATE_TRUNC('{date_trunc}', date_created), '{date_format}') AS period,
                 assigned_to AS bd_in_charge,
-                COUNT(activity_id) AS total_activities
-            FROM activity
-            WHERE {' AND '.join(conditions)}
-            AND activity_category = 'manual'
-            GROUP BY DATE_TRUNC('{date_trunc}', date_created), bd_in_charge
-        """
-
-        # Get total activities by type for the period
-        manual_activities_by_type_sql = f"""
-            SELECT
-                TO_CHAR(DATE_TRUNC('{date_trunc}', date_created), '{date_format}') AS period,
                 activity_type,
-                assigned_to AS bd_in_charge,
-                COUNT(activity_id) AS activity_count
-            FROM activity
-            WHERE {' AND '.join(conditions)}
-            AND activity_category = 'manual'
-            GROUP BY DATE_TRUNC('{date_trunc}', date_created), activity_type, bd_in_charge
-        """
-
-        # Get total activities by status for the period
-        activities_by_status_sql = f"""
-            SELECT
-                TO_CHAR(DATE_TRUNC('{date_trunc}', date_created), '{date_format}') AS period,
-                assigned_to AS bd_in_charge,
                 status,
-                COUNT(activity_id) AS activity_count
+                GROUPING(activity_type, status) AS grouping_level,
+                COUNT(*) AS activity_count
             FROM activity
             WHERE {' AND '.join(conditions)}
             AND activity_category = 'manual'
-            GROUP BY DATE_TRUNC('{date_trunc}', date_created), status, bd_in_charge
+            GROUP BY GROUPING SETS (
+                (DATE_TRUNC('{date_trunc}', date_created), assigned_to),
+                (DATE_TRUNC('{date_trunc}', date_created), assigned_to, activity_type),
+                (DATE_TRUNC('{date_trunc}', date_created), assigned_to, status)
+            )
+            ORDER BY DATE_TRUNC('{date_trunc}', date_created), assigned_to, grouping_level DESC
         """
 
-        total_activities_result = db.session.execute(text(total_activities_sql), params).fetchall()
-        manual_activities_by_type_result = db.session.execute(text(manual_activities_by_type_sql), params).fetchall()
-        activities_by_status_result = db.session.execute(text(activities_by_status_sql), params).fetchall()
+        rows = db.session.execute(text(activity_sql), params).fetchall()
 
-        # Process results
+        # Process results (totals sort first within each (period, bd))
         activity_data = {}
-
-        # Only process if there are results
-        if total_activities_result:
-            # Process total activities by period
-            for row in total_activities_result:
-                period = row.period
-                bd = row.bd_in_charge
-                total_activities = row.total_activities
-                key = (period, bd)
-                if key not in activity_data:
-                    activity_data[key] = {
-                        'period': period,
-                        'bd_in_charge': bd,
-                        'total_activities': total_activities,
-                        'activity_by_type': {},
-                        'activity_by_status': {}
-                    }
-
-            for row in manual_activities_by_type_result:
-                period = row.period
-                bd = row.bd_in_charge
-                activity_type = row.activity_type
-                activity_count = row.activity_count
-                key = (period, bd)
-                if key in activity_data:
-                    activity_data[key]['activity_by_type'][activity_type] = activity_count
-
-            for row in activities_by_status_result:
-                period = row.period
-                bd = row.bd_in_charge
-                status = row.status
-                activity_count = row.activity_count
-                key = (period, bd)
-                if key in activity_data:
-                    activity_data[key]['activity_by_status'][status] = activity_count
+        for row in rows:
+            key = (row.period, row.bd_in_charge)
+            if row.grouping_level == 3:
+                activity_data[key] = {
+                    'period': row.period,
+                    'bd_in_charge': row.bd_in_charge,
+                    'total_activities': row.activity_count,
+                    'activity_by_type': {},
+                    'activity_by_status': {}
+                }
+            elif key in activity_data:
+                if row.grouping_level == 1:
+                    activity_data[key]['activity_by_type'][row.activity_type] = row.activity_count
+                else:
+                    activity_data[key]['activity_by_status'][row.status] = row.activity_count
 
         # Return as a list of dicts
         return list(activity_data.values())
@@ -193,6 +227,7 @@ def get_activity_analytics(start_date=None, end_date=None, bd_in_charge=None, gr
     except Exception as e:
         return {'error': f'Activity analytics error: {str(e)}'}
 
+@analytics_cache.cached('activity')
 def get_avg_daily_activity(start_date=None, end_date=None, bd_in_charge=None):
     """
     Returns the average daily activity for the given period and BD in charge
@@ -200,7 +235,7 @@ def get_avg_daily_activity(start_date=None, end_date=None, bd_in_charge=None):
     """
     try:
         conditions, params = build_sql_filters(
-            start_date, end_date, bd_in_charge
+            start_date, end_date, bd_in_charge, bd_column='assigned_to'
         )
         
         sql = f"""
@@ -226,6 +261,7 @@ def get_avg_daily_activity(start_date=None, end_date=None, bd_in_charge=None):
     except Exception as e:
         return {'error': f'Average daily activity error: {str(e)}'}
 
+@analytics_cache.cached('lead')
 def get_lead_funnel(bd_in_charge=None):
     """
     Returns the lead funnel for the current state, optionally filtered by BD in charge only.
@@ -0,0 +1,198 @@
+"""
+Streaming bulk export of leads, customers, activities and trading volume.
+
+Rows are read through a server-side cursor (``yield_per``; a named cursor on
+Postgres) in batches of EXPORT_BATCH_SIZE and encoded batch by batch, so
+memory stays flat no matter how many rows are exported:
+
+- csv:     header row, then one line per row
+- ndjson:  one JSON object per line
+- parquet: one row group per batch, schema derived from the model columns
+  (PyArrow is imported on the first Parquet export, not at app start)
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+
+from db.db_config import db
+from api.models.lead import Lead
+from api.models.customer import Customer
+from api.models.activity import Activity
+from api.models.trading_volume import TradingVolume
+
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '5000'))
+
+# entity -> model, date filter column, owner (bd_in_charge filter) column
+EXPORT_ENTITIES = {
+    'leads': {'model': Lead, 'date_column': 'date_created', 'owner_column': 'bd_in_charge'},
+    'customers': {'model': Customer, 'date_column': 'date_created', 'owner_column': None},
+    'activities': {'model': Activity, 'date_column': 'date_created', 'owner_column': 'assigned_to'},
+    'trading-volume': {'model': TradingVolume, 'date_column': 'date', 'owner_column': 'bd_in_charge'},
+}
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def _columns(entity: str) -> List:
+    return list(EXPORT_ENTITIES[entity]['model'].__table__.columns)
+
+
+def build_export_query(entity: str, start_date=None, end_date=None, bd_in_charge=None):
+    """SELECT of every column of the entity's table with the optional filters, in primary key order"""
+    config = EXPORT_ENTITIES[entity]
+    table = config['model'].__table__
+    query = select(*table.columns)
+
+    if start_date:
+        query = query.where(table.c[config['date_column']] >= start_date)
+    if end_date:
+        query = query.where(table.c[config['date_column']] <= end_date)
+    if bd_in_charge and config['owner_column']:
+        query = query.where(table.c[config['owner_column']] == bd_in_charge)
+
+    return query.order_by(*table.primary_key.columns)
+
+
+def open_cursor(query, batch_size: int = EXPORT_BATCH_SIZE):
+    """Execute the query on a server-side cursor fetching batch_size rows at a time"""
+    return db.session.execute(query.execution_options(yield_per=batch_size))
+
+
+def iter_batches(result) -> Iterator[List]:
+    """Yield lists of rows from an open cursor, closing it when done"""
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _csv_value(value: Any) -> Any:
+    # Decimals keep their exact text; dates use ISO 8601 like the JSON formats
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _encode_csv(batches, names: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for batch in batches:
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _encode_ndjson(batches, names: List[str]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [
+            json.dumps({name: _json_value(value) for name, value in zip(names, row)})
+            for row in batch
+        ]
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _arrow_type(column):
+    import pyarrow as pa
+    python_type = column.type.python_type
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type is datetime:
+        return pa.timestamp('us')
+    if python_type is date:
+        return pa.date32()
+    if python_type is Decimal:
+        return pa.decimal128(column.type.precision or 38, column.type.scale or 0)
+    return pa.string()
+
+
+class _ChunkSink:
+    """Write-only file object whose contents are drained after every row group"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _encode_parquet(batches, columns: List) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([pa.field(column.name, _arrow_type(column)) for column in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for batch in batches:
+            data = {
+                column.name: [row[index] for row in batch]
+                for index, column in enumerate(columns)
+            }
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(entity: str, export_format: str, filters: Optional[Dict[str, Any]] = None,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Encoded chunks of the full (filtered) entity export.
+    The query runs before the first chunk is requested, so database errors
+    surface before a response starts streaming.
+    """
+    columns = _columns(entity)
+    batches = iter_batches(open_cursor(build_export_query(entity, **(filters or {})), batch_size))
+
+    if export_format == 'csv':
+        return _encode_csv(batches, [column.name for column in columns])
+    if export_format == 'ndjson':
+        return _encode_ndjson(batches, [column.name for column in columns])
+    return _encode_parquet(batches, columns)
@@ -0,0 +1,183 @@
+"""
+In-process background jobs for long-running admin operations
+(database initialization, test/demo data generation, RBAC provisioning).
+
+POST endpoints submit work to a bounded thread pool and answer 202 with a job
+id right away instead of holding a gunicorn worker for the whole run; clients
+poll GET /api/jobs/<id> for status, progress and the final result.
+
+The registry is in memory and per process: a job is only visible from the
+worker process that started it, and finished jobs are kept for
+JOB_RETENTION_SECONDS. It is not kept in the database because init-db jobs
+drop and recreate the schema they would be stored in. With several gunicorn
+workers a poll may reach another worker and get a 404, so clients retry 404s
+for a while (see docs/DEPLOYMENT_GUIDE.md).
+"""
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import current_app
+
+from db.db_config import db
+from api.utils.logging_config import get_logger
+
+logger = get_logger('api.services.jobs')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class JobQueueFullError(Exception):
+    """Raised when the runner already holds its maximum of unfinished jobs"""
+
+
+class Job:
+    """A unit of background work and its reported state"""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def update(self, progress: Optional[float] = None, message: Optional[str] = None) -> None:
+        """Report progress (0.0 - 1.0) and/or a status message from inside the job"""
+        with self._lock:
+            if progress is not None:
+                self.progress = max(0.0, min(1.0, float(progress)))
+            if message is not None:
+                self.message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'job_id': self.id,
+                'name': self.name,
+                'status': self.status,
+                'progress': self.progress,
+                'message': self.message,
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at.isoformat(),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None
+            }
+
+
+class JobRunner:
+    """Bounded thread pool plus a registry of submitted jobs"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 10, retention_seconds: float = 3600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so importing the module starts no threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='leadfi-job')
+        return self._executor
+
+    def submit(self, name: str, func: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Run func(job, *args, **kwargs) in the pool inside an app context.
+        A returned dict with status 'error' marks the job failed.
+        """
+        app = current_app._get_current_object()
+        job = Job(name)
+        with self._lock:
+            self._prune()
+            unfinished = sum(1 for existing in self._jobs.values() if not existing.finished)
+            if unfinished >= self.max_pending:
+                raise JobQueueFullError(f"{unfinished} jobs are already queued or running")
+            self._jobs[job.id] = job
+            self._get_executor().submit(self._run, app, job, func, args, kwargs)
+        logger.info(f"Job {job.id} ({name}) queued")
+        return job
+
+    def _run(self, app, job: Job, func, args, kwargs) -> None:
+        with job._lock:
+            job.status = RUNNING
+            job.started_at = datetime.utcnow()
+        started = time.monotonic()
+        try:
+            with app.app_context():
+                try:
+                    result = func(job, *args, **kwargs)
+                finally:
+                    db.session.remove()
+            failed = isinstance(result, dict) and result.get('status') == 'error'
+            with job._lock:
+                job.result = result
+                if failed:
+                    job.error = result.get('error') or result.get('message')
+                else:
+                    job.progress = 1.0
+                job.finished_at = datetime.utcnow()
+                job.status = FAILED if failed else SUCCEEDED
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.name}) failed: {e}\n{traceback.format_exc()}")
+            with job._lock:
+                job.error = str(e)
+                job.finished_at = datetime.utcnow()
+                job.status = FAILED
+        logger.info(f"Job {job.id} ({job.name}) {job.status} in {time.monotonic() - started:.1f}s")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        with self._lock:
+            self._prune()
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the retention window (caller holds the lock)"""
+        cutoff = datetime.utcnow().timestamp() - self.retention_seconds
+        stale = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at and job.finished_at.timestamp() < cutoff
+        ]
+        for job_id in stale:
+            del self._jobs[job_id]
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Block until a job finishes (for scripts and tests); returns the job"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        job = self.get(job_id)
+        while job is not None and not job.finished:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+        return job
+
+
+job_runner = JobRunner(
+    max_workers=int(os.getenv('JOB_WORKERS', '2')),
+    max_pending=int(os.getenv('JOB_MAX_PENDING', '10')),
+    retention_seconds=float(os.getenv('JOB_RETENTION_SECONDS', '3600'))
+)
@@ -0,0 +1,338 @@
+"""
+Batch lead create/update/convert for bulk imports.
+
+Every item is validated up front with LeadSchema; valid items are then
+written in one transaction with multi-row statements (INSERT ... RETURNING
+via insertmanyvalues, executemany UPDATE by primary key) instead of one
+request, INSERT and commit per lead. Invalid items never reach the database
+and are reported per item next to the written ones.
+
+Batch conversion locks the leads with SELECT ... FOR UPDATE SKIP LOCKED, so
+concurrent conversions never wait on (or double-convert) the same lead, then
+inserts customers and contacts with multi-row INSERTs and flags every
+converted lead with a single UPDATE.
+
+If the database rejects a multi-row statement (e.g. a constraint on one
+row), the batch is retried row by row inside savepoints so only the
+offending items fail.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.compiler import InsertmanyvaluesSentinelOpts
+
+from db.db_config import db
+from api.models.lead import Lead
+from api.models.customer import Customer
+from api.models.contact import Contact
+from api.schemas.lead_schema import LeadSchema
+from api.schemas.customer_schema import CustomerSchema
+from api.utils.cache import mark_tables_written
+from api.utils.logging_config import get_logger, log_database_operation
+
+logger = get_logger(__name__)
+
+LEAD_BATCH_MAX_ITEMS = int(os.getenv('LEAD_BATCH_MAX_ITEMS', '5000'))
+
+# Columns written on create; every row carries all of them so the multi-row
+# INSERT is a single statement shape
+LEAD_INSERT_COLUMNS = (
+    'full_name', 'title', 'email', 'telegram', 'phone_number', 'source', 'status',
+    'linkedin_url', 'company_name', 'country', 'bd_in_charge', 'background', 'type'
+)
+
+CUSTOMER_INSERT_COLUMNS = (
+    'customer_uid', 'name', 'registered_email', 'type', 'country', 'is_closed', 'date_closed'
+)
+
+
+def _failure(index: int, errors: Any, lead_id: Optional[int] = None) -> Dict[str, Any]:
+    result = {'index': index, 'status': 'error', 'errors': errors}
+    if lead_id is not None:
+        result['lead_id'] = lead_id
+    return result
+
+
+def _write_rows(rows: List[Dict[str, Any]], write_all: Callable, write_one: Callable) -> List[Any]:
+    """
+    Write rows with one multi-row statement, falling back to row-by-row
+    savepoints when the database rejects it. Returns one outcome per row:
+    the statement's value for that row, or the IntegrityError that rejected it.
+    """
+    try:
+        with db.session.begin_nested():
+            return write_all(rows)
+    except IntegrityError:
+        logger.warning(f"Multi-row write of {len(rows)} leads rejected, retrying row by row")
+
+    outcomes = []
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                outcomes.append(write_one(row))
+        except IntegrityError as e:
+            outcomes.append(e)
+    return outcomes
+
+
+def _insert_returning(model, key_column, rows) -> List[Any]:
+    """Multi-row INSERT of rows returning key_column values in input order"""
+    if db.engine.dialect.insertmanyvalues_implicit_sentinel & InsertmanyvaluesSentinelOpts.ANY_AUTOINCREMENT:
+        # Postgres: ordered RETURNING without giving up the multi-row INSERT
+        return db.session.scalars(
+            insert(model).returning(key_column, sort_by_parameter_order=True), rows
+        ).all()
+    # SQLite can't order RETURNING (asking for it degrades to one INSERT per row), but
+    # it assigns rowids in VALUES order under the write lock, so sorted ids match the input
+    return sorted(db.session.scalars(insert(model).returning(key_column), rows).all())
+
+
+def _insert_all(rows):
+    return _insert_returning(Lead, Lead.lead_id, rows)
+
+
+def _insert_one(row):
+    return db.session.scalars(insert(Lead).returning(Lead.lead_id), [row]).one()
+
+
+def create_leads(items: List[Any]) -> List[Dict[str, Any]]:
+    """Validate and insert leads; returns one result per item, in input order"""
+    schema = LeadSchema()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    rows, indexes = [], []
+    now = datetime.utcnow()
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = _failure(index, {'_schema': ['Each item must be an object']})
+            continue
+        try:
+            data = schema.load(item)
+        except MarshmallowValidationError as e:
+            results[index] = _failure(index, e.messages)
+            continue
+        row = {column: data.get(column) for column in LEAD_INSERT_COLUMNS}
+        row['date_created'] = data.get('date_created') or now   # demo mode may backdate
+        row['is_converted'] = False
+        rows.append(row)
+        indexes.append(index)
+
+    if rows:
+        outcomes = _write_rows(rows, _insert_all, _insert_one)
+        mark_tables_written(db.session, 'lead')
+        db.session.commit()
+
+        for index, outcome in zip(indexes, outcomes):
+            if isinstance(outcome, Exception):
+                results[index] = _failure(index, {'_schema': [str(outcome.orig)]})
+            else:
+                results[index] = {'index': index, 'status': 'created', 'lead_id': outcome}
+
+        log_database_operation("INSERT", "lead", {'batch_size': len(rows)})
+
+    return results
+
+
+def _update_all(rows):
+    db.session.execute(update(Lead), rows)
+    return [row['lead_id'] for row in rows]
+
+
+def _update_one(row):
+    return _update_all([row])[0]
+
+
+def update_leads(items: List[Any]) -> List[Dict[str, Any]]:
+    """Validate and apply partial lead updates keyed by lead_id; one result per item"""
+    schema = LeadSchema()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    pending = {}   # lead_id -> (index, changes)
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = _failure(index, {'_schema': ['Each item must be an object']})
+            continue
+        changes = dict(item)
+        lead_id = changes.pop('lead_id', None)
+        if not isinstance(lead_id, int) or isinstance(lead_id, bool):
+            results[index] = _failure(index, {'lead_id': ['An integer lead_id is required']})
+            continue
+        if lead_id in pending:
+            results[index] = _failure(index, {'lead_id': ['Duplicate lead_id in batch']}, lead_id)
+            continue
+        try:
+            changes = schema.load(changes, partial=True)
+        except MarshmallowValidationError as e:
+            results[index] = _failure(index, e.messages, lead_id)
+            continue
+        if not changes:
+            results[index] = _failure(index, {'_schema': ['No fields to update']}, lead_id)
+            continue
+        pending[lead_id] = (index, changes)
+
+    if pending:
+        existing = set(db.session.scalars(
+            select(Lead.lead_id).where(Lead.lead_id.in_(list(pending)))
+        ))
+        for lead_id in [lead_id for lead_id in pending if lead_id not in existing]:
+            index, _ = pending.pop(lead_id)
+            results[index] = _failure(index, {'lead_id': [f'Lead {lead_id} not found']}, lead_id)
+
+    if pending:
+        rows = [{'lead_id': lead_id, **changes} for lead_id, (_, changes) in pending.items()]
+        outcomes = _write_rows(rows, _update_all, _update_one)
+        mark_tables_written(db.session, 'lead')
+        db.session.commit()
+
+        for (lead_id, (index, _)), outcome in zip(pending.items(), outcomes):
+            if isinstance(outcome, Exception):
+                results[index] = _failure(index, {'_schema': [str(outcome.orig)]}, lead_id)
+            else:
+                results[index] = {'index': index, 'status': 'updated', 'lead_id': lead_id}
+
+        log_database_operation("UPDATE", "lead", {'batch_size': len(rows)})
+
+    return results
+
+
+def _load_customer(schema: CustomerSchema, payload: Any) -> Dict[str, Any]:
+    """Validate a conversion's customer payload into a full customer row"""
+    if not isinstance(payload, dict):
+        raise MarshmallowValidationError({'customer': ['A customer object is required']})
+    data = schema.load(payload)
+    row = {column: data.get(column) for column in CUSTOMER_INSERT_COLUMNS}
+    row['is_closed'] = bool(row['is_closed'])
+    if row['date_closed']:
+        try:
+            row['date_closed'] = datetime.fromisoformat(row['date_closed'])
+        except ValueError:
+            raise MarshmallowValidationError({'date_closed': ['Not a valid ISO 8601 datetime']})
+    return row
+
+
+def _convert_all(conversions):
+    db.session.execute(insert(Customer), [c['customer'] for c in conversions])
+    contact_ids = _insert_returning(Contact, Contact.contact_id, [c['contact'] for c in conversions])
+    db.session.execute(
+        update(Lead)
+        .where(Lead.lead_id.in_([c['contact']['lead_id'] for c in conversions]))
+        .values(is_converted=True),
+        execution_options={'synchronize_session': False}
+    )
+    return contact_ids
+
+
+def _convert_one(conversion):
+    db.session.execute(insert(Customer), [conversion['customer']])
+    contact_id = db.session.scalars(
+        insert(Contact).returning(Contact.contact_id), [conversion['contact']]
+    ).one()
+    db.session.execute(
+        update(Lead)
+        .where(Lead.lead_id == conversion['contact']['lead_id'])
+        .values(is_converted=True),
+        execution_options={'synchronize_session': False}
+    )
+    return contact_id
+
+
+def convert_leads(items: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Convert leads to customers: items are {"lead_id": int, "customer": {...}}.
+    Returns one result per item; leads locked by a concurrent conversion come
+    back with status 'locked' and can be retried.
+    """
+    schema = CustomerSchema()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    pending = {}   # lead_id -> (index, customer row)
+    customer_uids = set()
+    now = datetime.utcnow()
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = _failure(index, {'_schema': ['Each item must be an object']})
+            continue
+        lead_id = item.get('lead_id')
+        if not isinstance(lead_id, int) or isinstance(lead_id, bool):
+            results[index] = _failure(index, {'lead_id': ['An integer lead_id is required']})
+            continue
+        if lead_id in pending:
+            results[index] = _failure(index, {'lead_id': ['Duplicate lead_id in batch']}, lead_id)
+            continue
+        try:
+            customer = _load_customer(schema, item.get('customer'))
+        except MarshmallowValidationError as e:
+            results[index] = _failure(index, e.messages, lead_id)
+            continue
+        if customer['customer_uid'] in customer_uids:
+            results[index] = _failure(index, {'customer_uid': ['Duplicate customer_uid in batch']}, lead_id)
+            continue
+        customer['date_created'] = now
+        customer_uids.add(customer['customer_uid'])
+        pending[lead_id] = (index, customer)
+
+    if not pending:
+        return results
+
+    # Lock the leads; rows held by a concurrent conversion are skipped, not waited on
+    locked = {
+        row.lead_id: row.is_converted
+        for row in db.session.execute(
+            select(Lead.lead_id, Lead.is_converted)
+            .where(Lead.lead_id.in_(list(pending)))
+            .with_for_update(skip_locked=True)
+        )
+    }
+    unlocked = [lead_id for lead_id in pending if lead_id not in locked]
+    existing = set(db.session.scalars(
+        select(Lead.lead_id).where(Lead.lead_id.in_(unlocked))
+    )) if unlocked else set()
+    taken_uids = set(db.session.scalars(
+        select(Customer.customer_uid).where(
+            Customer.customer_uid.in_([customer['customer_uid'] for _, customer in pending.values()])
+        )
+    ))
+
+    for lead_id in list(pending):
+        index, customer = pending[lead_id]
+        if lead_id in existing:
+            results[index] = {'index': index, 'status': 'locked', 'lead_id': lead_id,
+                              'errors': {'lead_id': ['Lead is being converted by another request']}}
+        elif lead_id not in locked:
+            results[index] = _failure(index, {'lead_id': [f'Lead {lead_id} not found']}, lead_id)
+        elif locked[lead_id]:
+            results[index] = _failure(index, {'lead_id': ['Lead has already been converted to customer']}, lead_id)
+        elif customer['customer_uid'] in taken_uids:
+            results[index] = _failure(index, {'customer_uid': ['Customer UID already exists']}, lead_id)
+        else:
+            continue
+        del pending[lead_id]
+
+    if pending:
+        conversions = [
+            {'customer': customer,
+             'contact': {'customer_uid': customer['customer_uid'], 'lead_id': lead_id,
+                         'is_primary_contact': True, 'date_added': now}}
+            for lead_id, (_, customer) in pending.items()
+        ]
+        outcomes = _write_rows(conversions, _convert_all, _convert_one)
+        mark_tables_written(db.session, 'customer', 'contact', 'lead')
+
+        for (lead_id, (index, customer)), outcome in zip(pending.items(), outcomes):
+            if isinstance(outcome, Exception):
+                results[index] = _failure(index, {'_schema': [str(outcome.orig)]}, lead_id)
+            else:
+                results[index] = {'index': index, 'status': 'converted', 'lead_id': lead_id,
+                                  'customer_uid': customer['customer_uid'], 'contact_id': outcome}
+
+        log_database_operation("INSERT", "customer", {'batch_size': len(conversions)})
+        log_database_operation("UPDATE", "lead", {'batch_size': len(conversions), 'converted': True})
+
+    # Commit (releasing the row locks) even when nothing was converted
+    db.session.commit()
+    return results
@@ -0,0 +1,174 @@
+"""
+Indexed lead search for the leads search box.
+
+Postgres: a weighted tsvector column (lead.search_vector, GIN indexed) answers
+word/prefix matches, and pg_trgm GIN indexes keep the substring ILIKE
+predicates on full_name, company_name and email index-backed.
+See db/migrations/migration_add_lead_search.sql.
+
+SQLite (local fallback): an external-content FTS5 table (lead_fts) with the
+trigram tokenizer, kept in sync by triggers, answers substring matches. SQLite
+builds without FTS5 or the trigram tokenizer (before 3.34) use plain LIKE.
+
+Both backends can rank results (ts_rank + trigram similarity, or bm25).
+"""
+
+import re
+import threading
+
+from sqlalchemy import DDL, Float, Integer, event, func, literal_column, or_, text
+
+from db.db_config import db
+from api.models.lead import Lead
+
+# FTS5 trigram tokens are 3 characters; shorter terms fall back to LIKE
+SQLITE_MIN_FTS_TERM = 3
+
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS lead_fts USING fts5(
+        full_name, company_name, email,
+        content='lead', content_rowid='lead_id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS lead_fts_insert AFTER INSERT ON lead BEGIN
+        INSERT INTO lead_fts(rowid, full_name, company_name, email)
+        VALUES (new.lead_id, new.full_name, new.company_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS lead_fts_delete AFTER DELETE ON lead BEGIN
+        INSERT INTO lead_fts(lead_fts, rowid, full_name, company_name, email)
+        VALUES ('delete', old.lead_id, old.full_name, old.company_name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS lead_fts_update AFTER UPDATE ON lead BEGIN
+        INSERT INTO lead_fts(lead_fts, rowid, full_name, company_name, email)
+        VALUES ('delete', old.lead_id, old.full_name, old.company_name, old.email);
+        INSERT INTO lead_fts(rowid, full_name, company_name, email)
+        VALUES (new.lead_id, new.full_name, new.company_name, new.email);
+    END
+    """,
+    # Re-index whatever is in lead (also clears a stale index after a table rebuild)
+    "INSERT INTO lead_fts(lead_fts) VALUES ('rebuild')"
+]
+
+# Whether this process's SQLite library has FTS5 with the trigram tokenizer (None = not probed)
+_sqlite_trigram = None
+# Database URLs whose FTS5 index has been checked by ensure_sqlite_index()
+_indexed_databases = set()
+_index_lock = threading.Lock()
+
+
+def sqlite_trigram_supported(connection) -> bool:
+    """Probe once per process for FTS5 with the trigram tokenizer (SQLite 3.34+)"""
+    global _sqlite_trigram
+    if _sqlite_trigram is None:
+        try:
+            connection.exec_driver_sql(
+                "CREATE VIRTUAL TABLE temp.lead_fts_probe USING fts5(x, tokenize='trigram')"
+            )
+            connection.exec_driver_sql("DROP TABLE temp.lead_fts_probe")
+            _sqlite_trigram = True
+        except Exception:
+            _sqlite_trigram = False
+    return _sqlite_trigram
+
+
+def _creates_fts_index(ddl, target, bind, **kw):
+    return bind.dialect.name == 'sqlite' and sqlite_trigram_supported(bind)
+
+
+# Create/drop the FTS5 index together with the lead table on SQLite (db.create_all / drop_all)
+for _statement in SQLITE_FTS_DDL:
+    event.listen(Lead.__table__, 'after_create', DDL(_statement).execute_if(callable_=_creates_fts_index))
+event.listen(Lead.__table__, 'after_drop', DDL("DROP TABLE IF EXISTS lead_fts").execute_if(dialect='sqlite'))
+
+
+def ensure_sqlite_index() -> bool:
+    """
+    Create the FTS5 index for SQLite databases created before lead search existed.
+    Checked once per database per process; returns False when FTS5 trigram
+    search is unavailable and callers should use LIKE.
+    """
+    url = str(db.engine.url)
+    if url in _indexed_databases:
+        return _sqlite_trigram
+    with _index_lock:
+        if url not in _indexed_databases:
+            with db.engine.begin() as connection:
+                if sqlite_trigram_supported(connection):
+                    exists = connection.exec_driver_sql(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lead_fts'"
+                    ).first()
+                    if not exists:
+                        for statement in SQLITE_FTS_DDL:
+                            connection.exec_driver_sql(statement)
+            _indexed_databases.add(url)
+    return _sqlite_trigram
+
+
+def _like_predicate(search):
+    search_term = f"%{search}%"
+    return or_(
+        Lead.full_name.ilike(search_term),
+        Lead.company_name.ilike(search_term),
+        Lead.email.ilike(search_term)
+    )
+
+
+def _postgres_search(query, search, rank):
+    # Prefix match on every word: "jo smi" -> 'jo:* & smi:*'
+    words = re.findall(r'\w+', search)
+    predicate = _like_predicate(search)   # substring semantics, served by the trigram indexes
+    ts_query = None
+    if words:
+        ts_query = func.to_tsquery('simple', ' & '.join(f"{word}:*" for word in words))
+        predicate = or_(literal_column('lead.search_vector').op('@@')(ts_query), predicate)
+
+    query = query.filter(predicate)
+    if not rank:
+        return query, None
+
+    rank_expression = func.greatest(
+        func.similarity(Lead.full_name, search),
+        func.similarity(func.coalesce(Lead.company_name, ''), search),
+        func.similarity(func.coalesce(Lead.email, ''), search)
+    )
+    if ts_query is not None:
+        rank_expression = rank_expression + func.ts_rank(literal_column('lead.search_vector'), ts_query)
+    return query, rank_expression
+
+
+def _sqlite_search(query, search, rank):
+    if len(search) < SQLITE_MIN_FTS_TERM or not ensure_sqlite_index():
+        return query.filter(_like_predicate(search)), None
+
+    # Quote the term as a single FTS5 phrase (substring match with the trigram tokenizer)
+    phrase = '"' + search.replace('"', '""') + '"'
+    matches = text(
+        "SELECT rowid AS lead_id, bm25(lead_fts) AS score FROM lead_fts WHERE lead_fts MATCH :phrase"
+    ).bindparams(phrase=phrase).columns(lead_id=Integer, score=Float).subquery('lead_matches')
+
+    query = query.join(matches, matches.c.lead_id == Lead.lead_id)
+    # bm25 is lower-is-better
+    return query, (-matches.c.score if rank else None)
+
+
+def apply_lead_search(query, search, rank=False):
+    """
+    Restrict a Lead query to rows matching the search box term.
+    Returns (query, rank_expression); rank_expression (higher is better) is
+    None unless rank is requested and the backend supports it for the term.
+    """
+    search = (search or '').strip()
+    if not search:
+        return query, None
+
+    if db.engine.dialect.name == 'postgresql':
+        return _postgres_search(query, search, rank)
+    if db.engine.dialect.name == 'sqlite':
+        return _sqlite_search(query, search, rank)
+    return query.filter(_like_predicate(search)), None
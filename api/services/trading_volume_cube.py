@@ -0,0 +1,562 @@
+"""
+In-process columnar cache of trading_volume_fact for dashboard aggregates.
+
+The cube keeps one NumPy array per column (date ordinal, customer index,
+type/side/BD codes, volume, fees), sorted by date, and answers the
+TradingVolume summary/breakdown/time-series/top-customer queries with
+vectorized masks and bincount instead of a SQL round trip each.
+
+It is opt-in (TRADING_CUBE_ENABLED=true) and loaded by the first request that
+uses it (worker boot does no database I/O). Updates run in a background thread
+while requests keep reading the previous snapshot:
+- a full rebuild when fact rows were written (see
+  api.utils.cache.table_version_token), since backfills, corrections and
+  deletes touch historic rows
+- a remap of the customer name/BD lookup arrays when only customers changed
+- otherwise, every TRADING_CUBE_REFRESH_SECONDS, a re-read of the rows on or
+  after the last loaded date, which covers new days when table versions are
+  unavailable
+Whenever the cube is disabled, not loaded yet, or cannot answer a filter,
+callers fall back to SQL.
+"""
+
+import os
+import threading
+import time
+from datetime import date
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import text
+
+from db.db_config import db
+from api.utils.cache import table_version_token
+from api.utils.logging_config import get_logger
+
+logger = get_logger('api.services.trading_volume_cube')
+
+TRADE_TYPES = ['spot', 'futures']
+TRADE_SIDES = ['maker', 'taker']
+
+# Writes to these tables change fact rows already loaded. Across processes only
+# daily_trading_volume counts: on Postgres its trigger is what writes the fact
+# rows, while fact updates from customer_sync are handled by a remap instead.
+FACT_TABLES = ('trading_volume_fact', 'daily_trading_volume')
+FACT_SHARED_TABLES = ('daily_trading_volume',)
+# Writes to these only change customer names and BDs
+CUSTOMER_TABLES = ('customer',)
+
+
+def _to_ordinal(value):
+    """Convert a date, datetime or ISO string to a proleptic Gregorian ordinal"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if hasattr(value, 'date') and callable(value.date):
+        value = value.date()
+    return value.toordinal()
+
+
+class _Snapshot:
+    """Immutable set of column arrays plus their dictionaries"""
+
+    def __init__(self, date_ord, cust_idx, type_code, side_code, bd_code, volume, fees,
+                 customer_uids, customer_names, bds, watermark):
+        self.date_ord = date_ord
+        self.cust_idx = cust_idx
+        self.type_code = type_code
+        self.side_code = side_code
+        self.bd_code = bd_code
+        self.volume = volume
+        self.fees = fees
+        self.customer_uids = customer_uids        # customer index -> customer_uid
+        self.customer_names = customer_names      # customer index -> customer_name
+        self.bds = bds                            # bd code -> bd_in_charge
+        self.watermark = watermark                # max date ordinal loaded (or None)
+
+    def __len__(self):
+        return len(self.date_ord)
+
+
+class TradingVolumeCube:
+    """Columnar in-memory copy of trading_volume_fact"""
+
+    def __init__(self, refresh_seconds=60):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot = None
+        self._version_token = None      # fact table versions the snapshot was loaded at
+        self._customer_token = None     # customer versions its names and BDs were read at
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+        self._worker = None
+
+    @property
+    def is_loaded(self):
+        return self._snapshot is not None
+
+    def load(self):
+        """Full (re)load of the fact table"""
+        with self._refresh_lock:
+            self._load()
+
+    def rebuild(self):
+        """Full reload; concurrent readers keep using the old snapshot meanwhile"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._load()
+        finally:
+            self._refresh_lock.release()
+
+    def _load(self):
+        # Taken before reading, so writes racing the load trigger another rebuild
+        token = table_version_token(FACT_TABLES, expand=False, shared=FACT_SHARED_TABLES)
+        customer_token = table_version_token(CUSTOMER_TABLES, expand=False)
+        rows = self._fetch_rows()
+        self._snapshot = self._build(None, rows, None)
+        self._version_token = token
+        self._customer_token = customer_token
+        self._last_refresh = time.monotonic()
+        logger.info(f"Trading volume cube loaded: {len(self._snapshot)} rows")
+
+    def is_stale(self):
+        """True when fact rows were written since the last full load"""
+        token = table_version_token(FACT_TABLES, expand=False, shared=FACT_SHARED_TABLES)
+        return token is not None and token != self._version_token
+
+    def customers_changed(self):
+        """True when customers were written since their names and BDs were last read"""
+        token = table_version_token(CUSTOMER_TABLES, expand=False)
+        return token is not None and token != self._customer_token
+
+    def refresh(self):
+        """
+        Incremental refresh by date watermark.
+        Rows dated on or after the current watermark are dropped and re-read,
+        which picks up new days as well as late corrections to the latest day.
+        Changes to older rows are picked up by rebuild() (see maybe_refresh).
+        """
+        if self._snapshot is None:
+            return self.load()
+
+        # Only one refresh at a time; concurrent readers keep using the old snapshot
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self):
+        snapshot = self._snapshot
+        watermark = snapshot.watermark
+        rows = self._fetch_rows(since=date.fromordinal(watermark) if watermark else None)
+        self._snapshot = self._build(snapshot, rows, watermark)
+        self._last_refresh = time.monotonic()
+
+    def remap_customers(self):
+        """Apply customer renames and BD reassignments without reloading the rows"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._remap_customers()
+        finally:
+            self._refresh_lock.release()
+
+    def _remap_customers(self):
+        """
+        Re-read each customer's name and BD and rewrite the lookup arrays.
+        Customer updates reach trading_volume_fact as one UPDATE of all the
+        customer's rows (trading_volume_fact_customer_sync), so only customers
+        whose rows agree on a single name and BD are remapped; rows of customers
+        no longer in the table are dropped.
+        """
+        token = table_version_token(CUSTOMER_TABLES, expand=False)
+        rows = db.session.execute(text("""
+            SELECT customer_uid, MIN(customer_name) AS customer_name,
+                   MIN(COALESCE(bd_in_charge, '')) AS bd_in_charge,
+                   COUNT(DISTINCT customer_name) = 1
+                   AND COUNT(DISTINCT COALESCE(bd_in_charge, '')) = 1 AS uniform
+            FROM trading_volume_fact
+            GROUP BY customer_uid
+        """)).fetchall()
+
+        snapshot = self._snapshot
+        customer_lookup = {uid: i for i, uid in enumerate(snapshot.customer_uids)}
+        customer_names = list(snapshot.customer_names)
+        bds = list(snapshot.bds)
+        bd_lookup = {bd: i for i, bd in enumerate(bds)}
+        present = np.zeros(len(customer_names), dtype=bool)
+        customer_bd = np.full(len(customer_names), -1, dtype=np.int16)  # -1: keep per-row BDs
+
+        for row in rows:
+            idx = customer_lookup.get(row.customer_uid)
+            if idx is None:
+                continue    # new customer rows arrive with the next refresh
+            present[idx] = True
+            if not row.uniform:
+                continue
+            customer_names[idx] = row.customer_name
+            bd = row.bd_in_charge or None
+            code = bd_lookup.get(bd)
+            if code is None:
+                code = bd_lookup[bd] = len(bds)
+                bds.append(bd)
+            customer_bd[idx] = code
+
+        keep = present[snapshot.cust_idx]
+        cust_idx = snapshot.cust_idx[keep]
+        bd_code = snapshot.bd_code[keep]
+        bd_code = np.where(customer_bd[cust_idx] >= 0, customer_bd[cust_idx], bd_code).astype(np.int16)
+        self._snapshot = _Snapshot(
+            snapshot.date_ord[keep], cust_idx, snapshot.type_code[keep], snapshot.side_code[keep],
+            bd_code, snapshot.volume[keep], snapshot.fees[keep],
+            snapshot.customer_uids, customer_names, bds, snapshot.watermark
+        )
+        self._customer_token = token
+
+    def maybe_refresh(self):
+        """
+        Bring the cube up to date in a background thread, serving the current
+        snapshot meanwhile: rebuild after fact row writes, remap names and BDs
+        after customer writes, else refresh if older than refresh_seconds.
+        """
+        # One update at a time; callers arriving during it read the old snapshot
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            if self.is_stale():
+                work = self._load
+            elif self.customers_changed():
+                work = self._remap_customers
+            elif time.monotonic() - self._last_refresh >= self.refresh_seconds:
+                work = self._refresh
+            else:
+                work = None
+            if work is not None:
+                self._worker = threading.Thread(
+                    target=self._run, args=(current_app._get_current_object(), work),
+                    name='trading-cube-refresh', daemon=True
+                )
+                self._worker.start()
+        except Exception as e:
+            logger.warning(f"Trading volume cube refresh failed: {e}")
+            work = None
+        if work is None:
+            self._refresh_lock.release()
+
+    def _run(self, app, work):
+        """Run a rebuild/remap/refresh in an app context, then release the refresh lock"""
+        try:
+            with app.app_context():
+                try:
+                    work()
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            logger.warning(f"Trading volume cube refresh failed: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    def wait(self, timeout=None):
+        """Block until the background update started by maybe_refresh() has finished"""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def _fetch_rows(self, since=None):
+        # Casts done by the database so the columns convert to arrays without per-value work
+        sql = """
+            SELECT date, customer_uid, customer_name, trade_type, trade_side,
+                   CAST(COALESCE(volume, 0) AS DOUBLE PRECISION) AS volume,
+                   CAST(COALESCE(fees, 0) AS DOUBLE PRECISION) AS fees,
+                   COALESCE(bd_in_charge, '') AS bd_in_charge
+            FROM trading_volume_fact
+        """
+        params = {}
+        if since is not None:
+            sql += " WHERE date >= :since"
+            params['since'] = since
+        sql += " ORDER BY date ASC"
+        return db.session.execute(text(sql), params).fetchall()
+
+    @staticmethod
+    def _encode(values, labels):
+        """
+        Dictionary-encode a column against labels (extended in place with new values).
+        Returns the code per row, and the code and last row position per distinct value.
+        """
+        # Unique over the reversed column: return_index then points at the last row
+        distinct, last, inverse = np.unique(values[::-1], return_index=True, return_inverse=True)
+        lookup = {label: i for i, label in enumerate(labels)}
+        codes = np.empty(len(distinct), dtype=np.int64)
+        for i, value in enumerate(distinct.tolist()):
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(labels)
+                labels.append(value)
+            codes[i] = code
+        return codes[inverse.reshape(-1)[::-1]], codes, len(values) - 1 - last
+
+    @classmethod
+    def _encode_fixed(cls, values, labels):
+        """Encode a column with a fixed set of labels; other values raise ValueError"""
+        extended = list(labels)
+        codes = cls._encode(values, extended)[0]
+        if len(extended) > len(labels):
+            raise ValueError(f"Unexpected values {extended[len(labels):]}, expected one of {labels}")
+        return codes
+
+    def _build(self, previous, rows, watermark):
+        """Merge freshly fetched rows into (a copy of) the previous snapshot"""
+        if previous is not None:
+            # Keep everything strictly before the watermark; the rest was re-fetched
+            keep = np.searchsorted(previous.date_ord, watermark, side='left') if watermark else 0
+            customer_uids = list(previous.customer_uids)
+            customer_names = list(previous.customer_names)
+            bds = ['' if bd is None else bd for bd in previous.bds]
+            base = [
+                previous.date_ord[:keep], previous.cust_idx[:keep], previous.type_code[:keep],
+                previous.side_code[:keep], previous.bd_code[:keep],
+                previous.volume[:keep], previous.fees[:keep]
+            ]
+        else:
+            customer_uids, customer_names, bds = [], [], []
+            base = None
+
+        n = len(rows)
+        if n:
+            dates, uids, names, types, sides, volumes, fee_values, bd_values = zip(*rows)
+            date_ord = (np.array(dates, dtype='datetime64[D]').astype(np.int32)
+                        + np.int32(date(1970, 1, 1).toordinal()))
+            cust_idx, codes, last_rows = self._encode(np.fromiter(uids, dtype=np.int64, count=n), customer_uids)
+            cust_idx = cust_idx.astype(np.int32)
+            # Latest name per customer (rows are sorted by date)
+            for idx, row in zip(codes.tolist(), last_rows.tolist()):
+                if idx < len(customer_names):
+                    customer_names[idx] = names[row]
+                else:
+                    customer_names.append(names[row])
+            type_code = self._encode_fixed(np.array(types), TRADE_TYPES).astype(np.int8)
+            side_code = self._encode_fixed(np.array(sides), TRADE_SIDES).astype(np.int8)
+            bd_code = self._encode(np.array(bd_values), bds)[0].astype(np.int16)
+            volume = np.fromiter(volumes, dtype=np.float64, count=n)
+            fees = np.fromiter(fee_values, dtype=np.float64, count=n)
+        else:
+            date_ord = np.empty(0, dtype=np.int32)
+            cust_idx = np.empty(0, dtype=np.int32)
+            type_code = np.empty(0, dtype=np.int8)
+            side_code = np.empty(0, dtype=np.int8)
+            bd_code = np.empty(0, dtype=np.int16)
+            volume = np.empty(0, dtype=np.float64)
+            fees = np.empty(0, dtype=np.float64)
+
+        columns = [date_ord, cust_idx, type_code, side_code, bd_code, volume, fees]
+        if base is not None:
+            columns = [np.concatenate([old, new]) for old, new in zip(base, columns)]
+
+        bds = [bd or None for bd in bds]
+        new_watermark = int(columns[0][-1]) if len(columns[0]) else watermark
+        return _Snapshot(*columns, customer_uids, customer_names, bds, new_watermark)
+
+    # ------------------------------------------------------------------ queries
+
+    def _select(self, snapshot, start_date=None, end_date=None, customer_uid=None,
+                bd_in_charge=None, trade_type=None, trade_side=None):
+        """
+        Return (lo, hi, mask) selecting matching rows in snapshot[lo:hi].
+        Date bounds use binary search on the sorted date column; other filters
+        become a boolean mask over that slice (None when no further filtering).
+        """
+        lo, hi = 0, len(snapshot)
+        start = _to_ordinal(start_date)
+        end = _to_ordinal(end_date)
+        if start is not None:
+            lo = int(np.searchsorted(snapshot.date_ord, start, side='left'))
+        if end is not None:
+            hi = int(np.searchsorted(snapshot.date_ord, end, side='right'))
+        hi = max(lo, hi)
+
+        mask = None
+
+        def _and(current, condition):
+            return condition if current is None else current & condition
+
+        if customer_uid:
+            uid = int(customer_uid)
+            try:
+                idx = snapshot.customer_uids.index(uid)
+            except ValueError:
+                return lo, lo, None
+            mask = _and(mask, snapshot.cust_idx[lo:hi] == idx)
+        if bd_in_charge:
+            try:
+                code = snapshot.bds.index(bd_in_charge)
+            except ValueError:
+                return lo, lo, None
+            mask = _and(mask, snapshot.bd_code[lo:hi] == code)
+        if trade_type:
+            if trade_type not in TRADE_TYPES:
+                return lo, lo, None
+            mask = _and(mask, snapshot.type_code[lo:hi] == TRADE_TYPES.index(trade_type))
+        if trade_side:
+            if trade_side not in TRADE_SIDES:
+                return lo, lo, None
+            mask = _and(mask, snapshot.side_code[lo:hi] == TRADE_SIDES.index(trade_side))
+
+        return lo, hi, mask
+
+    @staticmethod
+    def _column(snapshot, name, lo, hi, mask):
+        values = getattr(snapshot, name)[lo:hi]
+        return values if mask is None else values[mask]
+
+    def summary_stats(self, **filters):
+        snapshot = self._snapshot
+        lo, hi, mask = self._select(snapshot, **filters)
+        volume = self._column(snapshot, 'volume', lo, hi, mask)
+        fees = self._column(snapshot, 'fees', lo, hi, mask)
+        dates = self._column(snapshot, 'date_ord', lo, hi, mask)
+        customers = self._column(snapshot, 'cust_idx', lo, hi, mask)
+
+        total_trades = len(volume)
+        total_volume = float(volume.sum())
+        total_fees = float(fees.sum())
+        # dates are sorted, so distinct days are the boundaries between runs
+        trading_days = int(np.count_nonzero(np.diff(dates)) + 1) if total_trades else 0
+        unique_customers = int(np.count_nonzero(
+            np.bincount(customers, minlength=len(snapshot.customer_uids))
+        )) if total_trades else 0
+
+        return {
+            'total_volume': total_volume,
+            'total_fees': total_fees,
+            'total_trades': float(total_trades),
+            'unique_customers': float(unique_customers),
+            'trading_days': float(trading_days),
+            'avg_volume_per_trade': total_volume / total_trades if total_trades else 0.0,
+            'avg_daily_volume': total_volume / trading_days if trading_days else 0.0,
+            'avg_daily_fees': total_fees / trading_days if trading_days else 0.0
+        }
+
+    def _breakdown(self, code_column, labels, label_key, filters):
+        snapshot = self._snapshot
+        lo, hi, mask = self._select(snapshot, **filters)
+        codes = self._column(snapshot, code_column, lo, hi, mask)
+        volume = self._column(snapshot, 'volume', lo, hi, mask)
+        fees = self._column(snapshot, 'fees', lo, hi, mask)
+
+        counts = np.bincount(codes, minlength=len(labels))
+        volumes = np.bincount(codes, weights=volume, minlength=len(labels))
+        fee_sums = np.bincount(codes, weights=fees, minlength=len(labels))
+
+        result = [
+            {
+                label_key: label,
+                'volume': float(volumes[i]),
+                'fees': float(fee_sums[i]),
+                'trade_count': int(counts[i])
+            }
+            for i, label in enumerate(labels)
+            if counts[i] > 0
+        ]
+        result.sort(key=lambda item: item['volume'], reverse=True)
+        return result
+
+    def breakdown_by_type(self, **filters):
+        return self._breakdown('type_code', TRADE_TYPES, 'trade_type', filters)
+
+    def breakdown_by_side(self, **filters):
+        return self._breakdown('side_code', TRADE_SIDES, 'trade_side', filters)
+
+    def daily_volumes(self, **filters):
+        snapshot = self._snapshot
+        lo, hi, mask = self._select(snapshot, **filters)
+        dates = self._column(snapshot, 'date_ord', lo, hi, mask)
+        if not len(dates):
+            return []
+        sides = self._column(snapshot, 'side_code', lo, hi, mask)
+        volume = self._column(snapshot, 'volume', lo, hi, mask)
+        fees = self._column(snapshot, 'fees', lo, hi, mask)
+
+        days, day_idx = np.unique(dates, return_inverse=True)
+        maker = sides == TRADE_SIDES.index('maker')
+        size = len(days)
+        maker_volume = np.bincount(day_idx, weights=np.where(maker, volume, 0.0), minlength=size)
+        taker_volume = np.bincount(day_idx, weights=np.where(maker, 0.0, volume), minlength=size)
+        maker_fees = np.bincount(day_idx, weights=np.where(maker, fees, 0.0), minlength=size)
+        taker_fees = np.bincount(day_idx, weights=np.where(maker, 0.0, fees), minlength=size)
+
+        return [
+            {
+                'date': date.fromordinal(int(day)).isoformat(),
+                'maker_volume': float(maker_volume[i]),
+                'taker_volume': float(taker_volume[i]),
+                'maker_fees': float(maker_fees[i]),
+                'taker_fees': float(taker_fees[i]),
+                'total_volume': float(maker_volume[i] + taker_volume[i]),
+                'total_fees': float(maker_fees[i] + taker_fees[i])
+            }
+            for i, day in enumerate(days)
+        ]
+
+    def top_customers(self, limit=10, **filters):
+        snapshot = self._snapshot
+        lo, hi, mask = self._select(snapshot, **filters)
+        customers = self._column(snapshot, 'cust_idx', lo, hi, mask)
+        if not len(customers):
+            return []
+        volume = self._column(snapshot, 'volume', lo, hi, mask)
+
+        totals = np.bincount(customers, weights=volume, minlength=len(snapshot.customer_uids))
+        present = np.bincount(customers, minlength=len(snapshot.customer_uids)) > 0
+        candidates = np.flatnonzero(present)
+        top = candidates[np.argsort(-totals[candidates], kind='stable')][:limit]
+
+        return [
+            {
+                'customer_uid': snapshot.customer_uids[i],
+                'customer_name': snapshot.customer_names[i],
+                'total_volume': float(totals[i])
+            }
+            for i in top
+        ]
+
+
+_cube = None
+
+
+def init_app(app):
+    """
+    Create the cube when TRADING_CUBE_ENABLED=true; it is loaded by the first
+    get_trading_cube() call, not at worker start.
+    """
+    global _cube
+    if os.getenv('TRADING_CUBE_ENABLED', 'false').lower() != 'true':
+        _cube = None
+        return
+
+    _cube = TradingVolumeCube(
+        refresh_seconds=int(os.getenv('TRADING_CUBE_REFRESH_SECONDS', '60'))
+    )
+
+
+def get_trading_cube():
+    """
+    Return the loaded cube (refreshed if stale), or None to use SQL.
+    The first call loads it; a failed load is logged and leaves the SQL path in place.
+    """
+    global _cube
+    cube = _cube
+    if cube is None:
+        return None
+    if not cube.is_loaded:
+        try:
+            cube.load()
+        except Exception as e:
+            logger.warning(f"Trading volume cube disabled, initial load failed: {e}")
+            _cube = None
+            return None
+    cube.maybe_refresh()
+    return cube
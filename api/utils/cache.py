@@ -0,0 +1,377 @@
+"""
+Result cache for analytics and aggregate queries.
+Entries are keyed by (function, normalized arguments), bounded by an LRU size
+limit and a TTL, and invalidated when the tables they read from are written.
+
+Invalidation sources:
+- ORM flushes in this process (session event), for immediate read-your-writes
+- the table_change_version view (Postgres), which exposes the cumulative
+  write counters from pg_stat_user_tables, so writes from other workers, ETL
+  loads and scripts are picked up within ANALYTICS_CACHE_VERSION_CHECK_SECONDS
+  (plus the ~1s the server takes to publish a backend's counters)
+
+The view is polled once per interval into a snapshot shared by every cache and
+by table_version_token(), which HTTP ETags are built from.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from db.db_config import db
+from api.utils.logging_config import get_logger
+
+logger = get_logger('api.utils.cache')
+
+# Tables whose writes also change other tables through database triggers
+TABLE_DEPENDENCIES = {
+    'lead': ('activity',),                                     # lead_activity_tracker
+    'customer': ('activity', 'trading_volume_fact'),           # customer_activity_tracker, fact sync
+    'daily_trading_volume': ('trading_volume_fact',),          # trading_volume_fact_sync
+}
+
+_MISSING = object()
+
+# Every ResultCache, so write hooks can invalidate all of them
+_caches = weakref.WeakSet()
+
+# In-process write counters per table (see table_version_token); the epoch keeps
+# tokens from a previous process from matching after a restart
+_local_versions = defaultdict(int)
+_local_direct_versions = defaultdict(int)     # writes to the table itself, not via triggers
+_local_generation = 0
+_local_lock = threading.Lock()
+_EPOCH = uuid.uuid4().hex[:8]
+
+# Shared table_change_version snapshot (see db_table_versions)
+VERSION_CHECK_SECONDS = float(os.getenv('ANALYTICS_CACHE_VERSION_CHECK_SECONDS', '2'))
+_versions_lock = threading.Lock()
+_db_versions = None             # {table: version}, None while the last poll failed
+_db_versions_supported = True   # False once the view turns out not to exist
+_db_versions_polled_at = 0.0
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize an argument so equivalent filters share a cache key"""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+
+def _expand_tables(tables: Iterable[str]) -> set:
+    expanded = set()
+    for table in tables:
+        expanded.add(table)
+        expanded.update(TABLE_DEPENDENCIES.get(table, ()))
+    return expanded
+
+
+class ResultCache:
+    """Thread-safe LRU + TTL cache with per-table invalidation and counters"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300,
+                 version_check_seconds: float = 2):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_check_seconds = version_check_seconds
+        self._entries = OrderedDict()   # key -> (expires_at, tables, value)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._table_versions = None     # last seen table_change_version snapshot
+        _caches.add(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key) -> Any:
+        """Return the cached value for key, or _MISSING"""
+        fresh = self._check_table_versions()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic() or not fresh:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    def set(self, key, value, tables: Iterable[str]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, *tables: str) -> int:
+        """Drop every entry that reads from any of the given tables (or their dependents)"""
+        affected = _expand_tables(tables)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[1] & affected]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += len(stale)
+        if stale:
+            logger.debug(f"Invalidated {len(stale)} cached results for tables {sorted(affected)}")
+        return len(stale)
+
+    def get_or_compute(self, key, compute: Callable[[], Any], tables: Iterable[str]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        if not self.enabled:
+            return compute()
+        value = self.get(key)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, tables)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
+
+    def _check_table_versions(self) -> bool:
+        """
+        Invalidate tables whose change version moved since the last check.
+        Returns False while the versions cannot be read, so entries are not
+        served without knowing whether another process wrote their tables.
+        """
+        versions = db_table_versions(self.version_check_seconds)
+        if versions is None:
+            return False
+
+        with self._lock:
+            previous = self._table_versions
+            self._table_versions = versions
+        if previous is None or previous is versions:
+            return True
+        changed = [t for t in set(versions) | set(previous) if previous.get(t) != versions.get(t)]
+        if changed:
+            self.invalidate(*changed)
+        return True
+
+    def cached(self, *tables: str) -> Callable:
+        """
+        Decorator caching a function's result, keyed by its normalized arguments.
+        Results that are error dicts ({'error': ...}) are never cached.
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+            name = f"{func.__module__}.{func.__qualname__}"
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (name, tuple(
+                    (param, _normalize(value))
+                    for param, value in bound.arguments.items()
+                    if param not in ('cls', 'self')
+                ))
+
+                value = self.get(key)
+                if value is not _MISSING:
+                    return value
+
+                value = func(*args, **kwargs)
+                if not (isinstance(value, dict) and 'error' in value):
+                    self.set(key, value, tables)
+                return value
+
+            wrapper.cache = self
+            return wrapper
+        return decorator
+
+
+analytics_cache = ResultCache(
+    max_entries=int(os.getenv('ANALYTICS_CACHE_SIZE', '256')),
+    ttl_seconds=float(os.getenv('ANALYTICS_CACHE_TTL', '300')),
+    version_check_seconds=VERSION_CHECK_SECONDS
+)
+
+
+def _is_missing_relation(error: Exception) -> bool:
+    """True when error says the queried relation does not exist (vs. a transient failure)"""
+    orig = getattr(error, 'orig', error)
+    if getattr(orig, 'pgcode', None) == '42P01':     # undefined_table
+        return True
+    return 'no such table' in str(orig)              # SQLite
+
+
+def db_table_versions(max_age: float = VERSION_CHECK_SECONDS) -> Optional[Dict[str, Any]]:
+    """
+    Latest table_change_version snapshot, re-polled when older than max_age.
+
+    Returns {} when the view does not exist (SQLite, migration not applied):
+    caches then rely on flush events and TTL. Returns None while the last poll
+    failed for another reason (pool timeout, dropped connection); the next
+    call after max_age retries.
+    """
+    global _db_versions, _db_versions_supported, _db_versions_polled_at
+    if not _db_versions_supported:
+        return {}
+    if time.monotonic() - _db_versions_polled_at < max_age:
+        return _db_versions
+    # One thread polls; the others keep using the current snapshot meanwhile
+    if not _versions_lock.acquire(blocking=False):
+        return _db_versions
+    try:
+        if time.monotonic() - _db_versions_polled_at < max_age:
+            return _db_versions
+        try:
+            # Separate connection so a failure never aborts the request transaction
+            with db.engine.connect() as conn:
+                rows = conn.execute(text(
+                    "SELECT table_name, version, live_rows, relid FROM table_change_version"
+                )).fetchall()
+        except Exception as e:
+            if _is_missing_relation(e):
+                _db_versions_supported = False
+                logger.info(f"table_change_version unavailable, using in-process invalidation only: {e}")
+                return {}
+            _db_versions = None
+            logger.warning(f"Could not read table_change_version, retrying in {max_age}s: {e}")
+        else:
+            # relid is part of the version so a rebuilt table (counters restart) still counts
+            _db_versions = {row.table_name: (row.version, row.live_rows, row.relid) for row in rows}
+        _db_versions_polled_at = time.monotonic()
+        return _db_versions
+    finally:
+        _versions_lock.release()
+
+
+def invalidate_tables(*tables: str) -> None:
+    """Invalidate cached results that depend on the given tables, in every cache"""
+    with _local_lock:
+        for table in _expand_tables(tables):
+            _local_versions[table] += 1
+        for table in tables:
+            _local_direct_versions[table] += 1
+    for cache in list(_caches):
+        cache.invalidate(*tables)
+
+
+def clear_caches() -> None:
+    """Drop every cached result, in every cache (e.g. after a schema rebuild)"""
+    global _local_generation
+    with _local_lock:
+        _local_generation += 1
+    for cache in list(_caches):
+        cache.clear()
+
+
+def _source_tables(tables: Iterable[str]) -> set:
+    """Tables whose writes can change the given tables (themselves plus trigger sources)"""
+    sources = set(tables)
+    for source, dependents in TABLE_DEPENDENCIES.items():
+        if sources & set(dependents):
+            sources.add(source)
+    return sources
+
+
+def table_version_token(tables: Iterable[str], expand: bool = True,
+                        shared: Optional[Iterable[str]] = None) -> Optional[str]:
+    """
+    Opaque token that changes whenever any of the given tables is written.
+    Combines this process's write counters with the shared table_change_version
+    snapshot (when available) so writes from other workers, ETL loads and
+    scripts count too. Returns None while the versions cannot be read.
+
+    expand=False leaves out writes made through triggers (TABLE_DEPENDENCIES):
+    only direct writes to the given tables count. shared limits the tables
+    whose shared counters are included (default: all).
+    """
+    sources = sorted(_source_tables(tables) if expand else set(tables))
+    local_versions = _local_versions if expand else _local_direct_versions
+    shared = set(sources) if shared is None else set(shared)
+    versions = db_table_versions()
+    if versions is None:
+        return None
+
+    with _local_lock:
+        parts = [f"{_EPOCH}.{_local_generation}"]
+        parts.extend(f"{table}:{local_versions[table]}" for table in sources)
+    parts.extend(
+        f"{table}@{'.'.join(map(str, versions[table]))}"
+        for table in sources if table in versions and table in shared
+    )
+    return '|'.join(parts)
+
+
+def _tables_in_flush(session) -> set:
+    tables = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            tables.add(table)
+    return tables
+
+
+def mark_tables_written(session, *tables: str) -> None:
+    """
+    Record writes made with bulk/Core statements, which bypass flush events,
+    so they invalidate caches when the session commits.
+    """
+    session.info.setdefault('cache_tables', set()).update(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    session.info.setdefault('cache_tables', set()).update(_tables_in_flush(session))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    tables = session.info.pop('cache_tables', None)
+    if tables:
+        invalidate_tables(*tables)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('cache_tables', None)
+
+
+@event.listens_for(db.metadata, 'after_create')
+@event.listens_for(db.metadata, 'after_drop')
+def _clear_on_schema_change(target, connection, **kw):
+    clear_caches()
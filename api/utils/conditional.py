@@ -0,0 +1,82 @@
+"""
+Conditional GET (ETag / If-None-Match) for read endpoints.
+
+Resources decorated with ``conditional_get(*tables)`` get a strong ETag built
+from the request (path + query string) and the change version of the tables
+the response reads (see api.utils.cache.table_version_token). The ETag is
+computed before the handler runs, so a matching ``If-None-Match`` returns
+``304 Not Modified`` without querying rows or running the serializer. While the
+table versions cannot be read (e.g. a pool timeout), the handler always runs and
+the response falls back to the content-hash ETag below.
+
+Other successful JSON GETs under /api/ fall back to a content-hash ETag
+(``add_content_etag``): the body is still built, but unchanged responses go
+back as an empty 304.
+"""
+
+import functools
+import hashlib
+from typing import Callable, Optional
+
+from flask import Response, request
+from flask_restful.utils import unpack
+
+from api.utils.cache import table_version_token
+
+# Clients may keep the response but must revalidate it before every use
+CACHE_CONTROL = 'private, no-cache'
+
+
+def compute_etag(tables) -> Optional[str]:
+    """Strong ETag (unquoted) for the current request and table versions, or None"""
+    token = table_version_token(tables)
+    if token is None:
+        return None
+    digest = hashlib.sha1(request.path.encode('utf-8'))
+    for name, value in sorted(request.args.items(multi=True)):
+        digest.update(f"\x00{name}={value}".encode('utf-8'))
+    digest.update(f"\x00{token}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _not_modified(etag: str) -> Response:
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def conditional_get(*tables: str) -> Callable:
+    """
+    Decorator for Resource.get: answer If-None-Match from the table versions
+    and tag successful responses with the ETag.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            etag = compute_etag(tables)
+            if etag is not None and request.if_none_match.contains(etag):
+                return _not_modified(etag)
+
+            result = func(*args, **kwargs)
+            if etag is None or isinstance(result, Response):
+                return result
+            data, code, headers = unpack(result)
+            if code == 200:
+                headers = dict(headers or {})
+                headers['ETag'] = f'"{etag}"'
+                headers['Cache-Control'] = CACHE_CONTROL
+            return data, code, headers
+        return wrapper
+    return decorator
+
+
+def add_content_etag(response: Response) -> Response:
+    """after_request hook: content-hash ETag for untagged successful JSON GETs"""
+    if (request.method == 'GET' and request.path.startswith('/api/')
+            and response.status_code == 200 and response.mimetype == 'application/json'
+            and 'ETag' not in response.headers and not response.is_streamed):
+        response.add_etag()
+        response.headers.setdefault('Cache-Control', CACHE_CONTROL)
+        response.make_conditional(request)
+    return response
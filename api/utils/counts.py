@@ -0,0 +1,144 @@
+"""
+Total counts for paginated list endpoints.
+
+Exact counts are cached per filter hash (the compiled SQL plus its bound
+parameters) for COUNT_CACHE_TTL seconds and invalidated by writes to the
+tables they count, through the same hooks as the analytics cache.
+
+With ``count=estimate`` on Postgres, large sets use the planner's row
+estimate instead of COUNT(*): pg_class.reltuples for an unfiltered table, or
+the top plan node of EXPLAIN for a filtered query. Sets estimated below
+COUNT_ESTIMATE_EXACT_BELOW rows (where estimates are least reliable and an
+exact count is cheap) and other databases still get an exact, cached count.
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import text
+
+from api.exceptions import ValidationError
+from api.utils.cache import ResultCache
+from db.db_config import db
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATE)
+
+COUNT_ESTIMATE_EXACT_BELOW = int(os.getenv('COUNT_ESTIMATE_EXACT_BELOW', '10000'))
+
+count_cache = ResultCache(
+    max_entries=int(os.getenv('COUNT_CACHE_SIZE', '1024')),
+    ttl_seconds=float(os.getenv('COUNT_CACHE_TTL', '30')),
+    version_check_seconds=float(os.getenv('ANALYTICS_CACHE_VERSION_CHECK_SECONDS', '2'))
+)
+
+
+def get_count_mode(args) -> str:
+    """Read ``count`` (exact|estimate) from request args."""
+    mode = (args.get('count') or COUNT_EXACT).lower()
+    if mode not in COUNT_MODES:
+        raise ValidationError(f"count must be one of {list(COUNT_MODES)}")
+    return mode
+
+
+def _filter_hash(sql: str, params: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(sql.encode('utf-8'))
+    for name in sorted(params):
+        digest.update(f"\x00{name}={params[name]!r}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _is_postgres() -> bool:
+    return db.engine.dialect.name == 'postgresql'
+
+
+def _plan_rows(sql: str, params: Dict[str, Any], driver_sql: bool = False) -> Optional[int]:
+    """Planner row estimate of a SELECT (Postgres EXPLAIN), or None if unavailable."""
+    try:
+        # Savepoint so a failed EXPLAIN doesn't abort the request transaction
+        with db.session.begin_nested():
+            if driver_sql:
+                result = db.session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            else:
+                result = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params)
+            plan = result.scalar()
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception:
+        return None
+
+
+def _table_rows(table: str) -> Optional[int]:
+    """pg_class.reltuples for a table; None if the table was never analyzed."""
+    row = db.session.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+        {'table': table}
+    ).first()
+    if row is None or row.reltuples is None or row.reltuples < 0:
+        return None
+    return int(row.reltuples)
+
+
+def _estimate(estimate_fn, filtered: bool, table: str) -> Optional[int]:
+    if not _is_postgres():
+        return None
+    estimate = estimate_fn() if filtered else _table_rows(table)
+    if estimate is None or estimate < COUNT_ESTIMATE_EXACT_BELOW:
+        return None
+    return estimate
+
+
+def count_query(query, tables: Iterable[str], mode: str = COUNT_EXACT) -> Tuple[int, bool]:
+    """
+    Total rows of an ORM list query (ordering is ignored).
+    Returns (total, is_estimate).
+    """
+    tables = tuple(tables)
+    query = query.order_by(None)
+    compiled = query.statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True}
+    )
+    sql, params = str(compiled), dict(compiled.params)
+
+    if mode == COUNT_ESTIMATE:
+        estimate = _estimate(
+            lambda: _plan_rows(sql, params, driver_sql=True),
+            filtered=query.whereclause is not None,
+            table=tables[0]
+        )
+        if estimate is not None:
+            return estimate, True
+
+    total = count_cache.get_or_compute(
+        ('query', _filter_hash(sql, params)), query.count, tables
+    )
+    return total, False
+
+
+def count_sql(select_sql: str, params: Dict[str, Any], tables: Iterable[str],
+              mode: str = COUNT_EXACT, filtered: bool = True) -> Tuple[int, bool]:
+    """
+    Total rows of a raw SQL SELECT (without ORDER BY/LIMIT).
+    Returns (total, is_estimate).
+    """
+    tables = tuple(tables)
+
+    if mode == COUNT_ESTIMATE:
+        estimate = _estimate(
+            lambda: _plan_rows(select_sql, params),
+            filtered=filtered,
+            table=tables[0]
+        )
+        if estimate is not None:
+            return estimate, True
+
+    def exact():
+        return db.session.execute(
+            text(f"SELECT COUNT(*) FROM ({select_sql}) AS counted_rows"), params
+        ).scalar() or 0
+
+    total = count_cache.get_or_compute(
+        ('sql', _filter_hash(select_sql, params)), exact, tables
+    )
+    return total, False
@@ -1,23 +1,85 @@
 """
 Logging configuration for the LeadFi API.
 Provides structured logging with appropriate handlers and formatters.
+
+Loggers never write on the request thread: every record goes through a
+QueueHandler, and a QueueListener thread feeds the console and rotating file
+handlers. LOG_FORMAT=json switches console and file output to JSON (extra=
+fields become keys), and LOG_REQUEST_SAMPLE_RATE (0.0 - 1.0, default 1.0)
+samples the request/response lines of successful GETs; errors and writes are
+always logged.
 """
 
+import atexit
 import logging
 import logging.config
+import logging.handlers
 import os
+import queue
+import random
 import sys
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+# Formatter settings shared by every handler
+FORMATTERS = {
+    'standard': {
+        'format': '%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'
+    },
+    'detailed': {
+        'format': '%(asctime)s [%(levelname)s] %(name)s:%(lineno)d - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'
+    },
+    'json': {
+        'format': '%(asctime)s %(name)s %(levelname)s %(message)s'
+    }
+}
+
+_queue_handler = None
+_listener = None
+
+def _make_formatter(name: str) -> logging.Formatter:
+    if name == 'json':
+        from pythonjsonlogger.json import JsonFormatter
+        return JsonFormatter(FORMATTERS['json']['format'])
+    return logging.Formatter(FORMATTERS[name]['format'], datefmt=FORMATTERS[name]['datefmt'])
+
+def _start_listener(handlers) -> None:
+    """Point the queue handler at a fresh queue drained by a new listener thread"""
+    global _listener
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def _restart_listener_in_child() -> None:
+    # Threads don't survive fork (gunicorn --preload): without this, workers
+    # would queue records that nothing ever writes
+    if _listener is not None:
+        _start_listener(_listener.handlers)
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
 def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> None:
     """
-    Configure application logging with both console and file handlers.
+    Configure application logging with both console and file handlers,
+    written from a background listener thread.
     
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Optional log file path. If None, uses default location.
     """
+    global _queue_handler
     
     # Create logs directory if it doesn't exist
     log_dir = "logs"
@@ -28,75 +90,42 @@ def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> No
     if log_file is None:
         timestamp = datetime.now().strftime("%Y%m%d")
         log_file = os.path.join(log_dir, f"leadfi_api_{timestamp}.log")
-    
-    # Logging configuration
+
+    # Reconfiguring: flush the previous listener (dictConfig closes its handlers)
+    stop_logging()
+    _queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+
+    # Logging configuration: every logger writes to the queue only
     logging_config = {
         'version': 1,
         'disable_existing_loggers': False,
-        'formatters': {
-            'standard': {
-                'format': '%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-                'datefmt': '%Y-%m-%d %H:%M:%S'
-            },
-            'detailed': {
-                'format': '%(asctime)s [%(levelname)s] %(name)s:%(lineno)d - %(message)s',
-                'datefmt': '%Y-%m-%d %H:%M:%S'
-            },
-            'json': {
-                'class': 'pythonjsonlogger.json.JsonFormatter',
-                'format': '%(asctime)s %(name)s %(levelname)s %(message)s'
-            }
-        },
         'handlers': {
-            'console': {
-                'class': 'logging.StreamHandler',
-                'level': log_level,
-                'formatter': 'standard',
-                'stream': sys.stdout
-            },
-            'file': {
-                'class': 'logging.handlers.RotatingFileHandler',
-                'level': log_level,
-                'formatter': 'detailed',
-                'filename': log_file,
-                'maxBytes': 10485760,  # 10MB
-                'backupCount': 5,
-                'encoding': 'utf8'
-            },
-            'error_file': {
-                'class': 'logging.handlers.RotatingFileHandler',
-                'level': 'ERROR',
-                'formatter': 'detailed',
-                'filename': os.path.join(log_dir, 'error.log'),
-                'maxBytes': 10485760,  # 10MB
-                'backupCount': 5,
-                'encoding': 'utf8'
-            }
+            'queue': {'()': lambda: _queue_handler}
         },
         'loggers': {
             '': {  # Root logger
                 'level': log_level,
-                'handlers': ['console', 'file', 'error_file'],
+                'handlers': ['queue'],
                 'propagate': False
             },
             'api': {
                 'level': log_level,
-                'handlers': ['console', 'file', 'error_file'],
+                'handlers': ['queue'],
                 'propagate': False
             },
             'etl': {
                 'level': log_level,
-                'handlers': ['console', 'file', 'error_file'],
+                'handlers': ['queue'],
                 'propagate': False
             },
             'werkzeug': {
                 'level': 'WARNING',
-                'handlers': ['console', 'file'],
+                'handlers': ['queue'],
                 'propagate': False
             },
             'sqlalchemy.engine': {
                 'level': 'WARNING',
-                'handlers': ['file'],
+                'handlers': ['queue'],
                 'propagate': False
             }
         }
@@ -104,6 +133,41 @@ def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> No
     
     logging.config.dictConfig(logging_config)
 
+    # Handlers are created after dictConfig, which closes every existing handler
+    use_json = os.getenv('LOG_FORMAT', 'text').lower() == 'json'
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(log_level)
+    console.setFormatter(_make_formatter('json' if use_json else 'standard'))
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=10485760, backupCount=5, encoding='utf8'  # 10MB
+    )
+    file_handler.setLevel(log_level)
+    file_handler.setFormatter(_make_formatter('json' if use_json else 'detailed'))
+
+    error_file = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, 'error.log'), maxBytes=10485760, backupCount=5, encoding='utf8'
+    )
+    error_file.setLevel('ERROR')
+    error_file.setFormatter(_make_formatter('json' if use_json else 'detailed'))
+
+    _start_listener([console, file_handler, error_file])
+
+def request_sample_rate() -> float:
+    """Fraction of successful GET/HEAD requests whose request/response lines are logged"""
+    try:
+        return min(1.0, max(0.0, float(os.getenv('LOG_REQUEST_SAMPLE_RATE', '1.0'))))
+    except ValueError:
+        return 1.0
+
+def should_log_request(method: str, status_code: int) -> bool:
+    """Errors and non-GET requests are always logged; successful GETs are sampled"""
+    if method not in ('GET', 'HEAD') or status_code >= 400:
+        return True
+    rate = request_sample_rate()
+    return rate >= 1.0 or random.random() < rate
+
 def get_logger(name: Optional[str] = None) -> logging.Logger:
     """
     Get a logger instance with the specified name.
@@ -135,6 +199,8 @@ def log_request_info(request, logger: Optional[logging.Logger] = None) -> None:
     """
     if logger is None:
         logger = get_logger('api.request')
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
     logger.info(
         f"Request: {request.method} {request.url}",
@@ -147,22 +213,30 @@ def log_request_info(request, logger: Optional[logging.Logger] = None) -> None:
         }
     )
 
-def log_response_info(response, logger: Optional[logging.Logger] = None) -> None:
+def log_response_info(response, logger: Optional[logging.Logger] = None,
+                      duration_ms: Optional[float] = None) -> None:
     """
     Log outgoing response information.
     
     Args:
         response: Flask response object
         logger: Logger instance. If None, creates a new one.
+        duration_ms: Time spent handling the request, if measured
     """
     if logger is None:
         logger = get_logger('api.response')
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
+    message = f"Response: {response.status_code}"
+    if duration_ms is not None:
+        message += f" in {duration_ms:.1f}ms"
     logger.info(
-        f"Response: {response.status_code}",
+        message,
         extra={
             'status_code': response.status_code,
-            'content_length': response.content_length
+            'content_length': response.content_length,
+            'duration_ms': duration_ms
         }
     )
 
@@ -178,6 +252,8 @@ def log_database_operation(operation: str, table: str, details: Optional[Dict[st
     """
     if logger is None:
         logger = get_logger('api.database')
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
     if details is None:
         details = {}
@@ -202,6 +278,8 @@ def log_etl_operation(operation: str, details: Optional[Dict[str, Any]] = None,
     """
     if logger is None:
         logger = get_logger('etl')
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
     if details is None:
         details = {}
@@ -0,0 +1,255 @@
+"""
+Per-endpoint request metrics and Server-Timing.
+
+Every request is recorded under its URL rule and method
+(``/api/analytics/lead-funnel``, ``GET``):
+
+- latency histogram, plus p50/p95/p99 over the last METRICS_WINDOW requests
+- request counts by status, and a 5xx error count
+- response size histogram (when the length is known)
+- time spent in database cursor executions, and the query count
+
+``GET /api/metrics`` renders the registry in the Prometheus text format.
+Each response also carries a ``Server-Timing`` header with the request's
+``db``, ``serialize`` (JSON encoding) and ``total`` durations, which browser
+devtools show per request.
+
+Metrics live in process memory: under gunicorn each worker keeps its own, so
+a scrape sees the worker that answered it.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from typing import Dict, Optional, Tuple
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUANTILES = (0.5, 0.95, 0.99)
+
+METRICS_WINDOW = int(os.getenv('METRICS_WINDOW', '1024'))
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            yield f'{name}_bucket{{{labels},le="{le}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class _EndpointStats:
+    """Everything recorded for one (endpoint, method)"""
+
+    __slots__ = ('latency', 'db_time', 'size', 'recent', 'statuses', 'errors', 'queries')
+
+    def __init__(self):
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.db_time = _Histogram(LATENCY_BUCKETS)
+        self.size = _Histogram(SIZE_BUCKETS)
+        self.recent = deque(maxlen=METRICS_WINDOW)
+        self.statuses = Counter()
+        self.errors = 0
+        self.queries = 0
+
+    def quantile(self, q: float) -> float:
+        # Nearest-rank quantile over the recent window
+        ordered = sorted(self.recent)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+class MetricsRegistry:
+    """Thread-safe store of per-endpoint request statistics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _EndpointStats] = {}
+
+    def observe(self, endpoint: str, method: str, status: int, duration: float,
+                db_time: float = 0.0, queries: int = 0, size: Optional[int] = None) -> None:
+        with self._lock:
+            stats = self._stats.get((endpoint, method))
+            if stats is None:
+                stats = self._stats[(endpoint, method)] = _EndpointStats()
+            stats.latency.observe(duration)
+            stats.db_time.observe(db_time)
+            stats.recent.append(duration)
+            stats.statuses[status] += 1
+            stats.queries += queries
+            if status >= 500:
+                stats.errors += 1
+            if size is not None:
+                stats.size.observe(size)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Compact per-endpoint summary (count, errors, p50/p95/p99 ms, mean DB ms)"""
+        with self._lock:
+            return {
+                f"{method} {endpoint}": {
+                    'count': stats.latency.count,
+                    'errors': stats.errors,
+                    **{f"p{int(q * 100)}_ms": round(stats.quantile(q) * 1000, 2) for q in QUANTILES},
+                    'db_ms_avg': round(stats.db_time.sum / stats.db_time.count * 1000, 2) if stats.db_time.count else 0.0
+                }
+                for (endpoint, method), stats in self._stats.items()
+            }
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(self._stats.items())
+            lines = [
+                '# HELP leadfi_http_requests_total Requests by endpoint, method and status.',
+                '# TYPE leadfi_http_requests_total counter',
+            ]
+            for (endpoint, method), stats in items:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'leadfi_http_requests_total{{{_labels(endpoint, method)},status="{status}"}} {count}')
+
+            lines += ['# HELP leadfi_http_request_errors_total Requests answered with a 5xx status.',
+                      '# TYPE leadfi_http_request_errors_total counter']
+            lines += [f'leadfi_http_request_errors_total{{{_labels(*key)}}} {stats.errors}' for key, stats in items]
+
+            lines += ['# HELP leadfi_http_request_duration_seconds Request latency.',
+                      '# TYPE leadfi_http_request_duration_seconds histogram']
+            for key, stats in items:
+                lines.extend(stats.latency.render('leadfi_http_request_duration_seconds', _labels(*key)))
+
+            lines += [f'# HELP leadfi_http_request_latency_seconds Latency quantiles over the last {METRICS_WINDOW} requests.',
+                      '# TYPE leadfi_http_request_latency_seconds summary']
+            for key, stats in items:
+                labels = _labels(*key)
+                lines += [f'leadfi_http_request_latency_seconds{{{labels},quantile="{q}"}} {stats.quantile(q)}'
+                          for q in QUANTILES]
+                lines += [f'leadfi_http_request_latency_seconds_sum{{{labels}}} {sum(stats.recent)}',
+                          f'leadfi_http_request_latency_seconds_count{{{labels}}} {len(stats.recent)}']
+
+            lines += ['# HELP leadfi_http_request_db_seconds Time spent in database cursor executions per request.',
+                      '# TYPE leadfi_http_request_db_seconds histogram']
+            for key, stats in items:
+                lines.extend(stats.db_time.render('leadfi_http_request_db_seconds', _labels(*key)))
+
+            lines += ['# HELP leadfi_http_request_db_queries_total Database statements executed.',
+                      '# TYPE leadfi_http_request_db_queries_total counter']
+            lines += [f'leadfi_http_request_db_queries_total{{{_labels(*key)}}} {stats.queries}' for key, stats in items]
+
+            lines += ['# HELP leadfi_http_response_size_bytes Response body size.',
+                      '# TYPE leadfi_http_response_size_bytes histogram']
+            for key, stats in items:
+                lines.extend(stats.size.render('leadfi_http_response_size_bytes', _labels(*key)))
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(endpoint: str, method: str) -> str:
+    return f'endpoint="{_escape(endpoint)}",method="{method}"'
+
+
+metrics = MetricsRegistry()
+
+
+def add_timing(name: str, seconds: float) -> None:
+    """Add time to a named Server-Timing phase of the current request"""
+    if has_request_context() and 'timings' in g:
+        g.timings[name] = g.timings.get(name, 0.0) + seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    if started is None or not has_request_context() or 'timings' not in g:
+        return
+    add_timing('db', time.perf_counter() - started)
+    g.db_queries += 1
+
+
+def _start_request():
+    g.timings = {}
+    g.db_queries = 0
+    g.metrics_started = time.perf_counter()
+
+
+def _finish_request(response):
+    started = g.get('metrics_started')
+    if started is None:
+        return response
+    duration = time.perf_counter() - started
+    timings = g.timings
+    db_time = timings.get('db', 0.0)
+
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    size = None if response.is_streamed else response.content_length
+    metrics.observe(endpoint, request.method, response.status_code, duration,
+                    db_time=db_time, queries=g.db_queries, size=size)
+
+    parts = [f'db;dur={db_time * 1000:.1f};desc="{g.db_queries} queries"']
+    parts += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in timings.items() if name != 'db']
+    parts.append(f'total;dur={duration * 1000:.1f}')
+    response.headers['Server-Timing'] = ', '.join(parts)
+    return response
+
+
+def timed_representation(output):
+    """Wrap a Flask-RESTful representation so its encoding time counts as 'serialize'"""
+    def represent(data, code, headers=None):
+        started = time.perf_counter()
+        response = output(data, code, headers)
+        add_timing('serialize', time.perf_counter() - started)
+        return response
+    return represent
+
+
+def init_app(app, api=None) -> None:
+    """
+    Record metrics for every request of app. Call before registering other
+    after_request hooks so the total covers them too.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    if api is not None:
+        from flask_restful.representations.json import output_json
+        api.representations['application/json'] = timed_representation(output_json)
@@ -0,0 +1,198 @@
+"""
+Keyset (cursor) pagination helpers for the LeadFi API.
+
+List endpoints use LIMIT/OFFSET by default. When a client passes ``cursor``
+(an empty value starts from the first page) the resource switches to keyset
+mode: each page is resolved with a range predicate on the sort column plus a
+primary-key tiebreaker, so deep pages cost the same as the first one.
+
+A nullable sort column (e.g. ``date_created``) is ordered NULLS LAST in both
+directions, and rows with a NULL sort value are paged by the primary key after
+every non-NULL row, so no row is skipped.
+
+Cursors are opaque, signed tokens. They carry the last row's key values and
+the sort they were issued for, so a cursor can't be replayed against a
+different ordering or tampered with to skip filters. They are signed with
+``CURSOR_SECRET`` or the app's ``SECRET_KEY``; without either, a random key
+is generated per process and cursors stop working across restarts and workers.
+"""
+
+import os
+import secrets
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_, or_
+
+from api.exceptions import ValidationError
+from api.utils.logging_config import get_logger
+
+logger = get_logger('api.utils.pagination')
+
+CURSOR_SALT = 'leadfi-list-cursor'
+
+_process_secret: Optional[str] = None
+
+
+def is_cursor_request(args) -> bool:
+    """Return True when the client opted into keyset pagination."""
+    return 'cursor' in args
+
+
+def wants_total(args) -> bool:
+    """Total counts are optional in cursor mode (``include_total=true``)."""
+    return args.get('include_total', 'false').lower() == 'true'
+
+
+def parse_sort_order(args, default: str = 'desc') -> bool:
+    """
+    Return True for a descending cursor sort (``sort_order``, case-insensitive).
+
+    Raises:
+        ValidationError: If sort_order is neither ``asc`` nor ``desc``.
+    """
+    sort_order = (args.get('sort_order') or default).lower()
+    if sort_order not in ('asc', 'desc'):
+        raise ValidationError("sort_order must be 'asc' or 'desc'")
+    return sort_order == 'desc'
+
+
+def _is_nullable(column) -> bool:
+    """True when an ORM attribute / Core column may hold NULL"""
+    column = getattr(column, 'expression', column)
+    return bool(getattr(column, 'nullable', False))
+
+
+def _get_serializer() -> URLSafeSerializer:
+    global _process_secret
+    secret = os.getenv('CURSOR_SECRET') or current_app.secret_key
+    if not secret:
+        if _process_secret is None:
+            logger.warning("Neither CURSOR_SECRET nor SECRET_KEY is set; signing pagination cursors "
+                           "with a per-process key that is not shared across workers or restarts")
+            _process_secret = secrets.token_urlsafe(32)
+        secret = _process_secret
+    return URLSafeSerializer(secret, salt=CURSOR_SALT)
+
+
+def _dump_value(value: Any) -> Any:
+    """Tag non-JSON values so they round-trip with their original type."""
+    if isinstance(value, datetime):
+        return {'t': 'dt', 'v': value.isoformat()}
+    if isinstance(value, date):
+        return {'t': 'd', 'v': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'t': 'dec', 'v': str(value)}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        kind, raw = value.get('t'), value.get('v')
+        if kind == 'dt':
+            return datetime.fromisoformat(raw)
+        if kind == 'd':
+            return date.fromisoformat(raw)
+        if kind == 'dec':
+            return Decimal(raw)
+    return value
+
+
+def encode_cursor(values: Sequence[Any], sort_key: str) -> str:
+    """
+    Build an opaque cursor from the last row's key values.
+
+    Args:
+        values: Sort column value followed by tiebreaker key values.
+        sort_key: Identifier of the ordering (e.g. ``'date_created:desc'``).
+    """
+    payload = {'k': [_dump_value(v) for v in values], 's': sort_key}
+    return _get_serializer().dumps(payload)
+
+
+def decode_cursor(token: str, sort_key: str) -> Optional[List[Any]]:
+    """
+    Decode and verify a cursor. An empty token means "first page".
+
+    Raises:
+        ValidationError: If the cursor is malformed, tampered with, or was
+            issued for a different sort order.
+    """
+    if not token:
+        return None
+    try:
+        payload = _get_serializer().loads(token)
+    except BadSignature:
+        raise ValidationError("Invalid pagination cursor")
+    if not isinstance(payload, dict) or payload.get('s') != sort_key:
+        raise ValidationError("Pagination cursor does not match the requested sort order")
+    try:
+        return [_load_value(v) for v in payload['k']]
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError("Invalid pagination cursor")
+
+
+def keyset_filter(columns: Sequence[Any], values: Sequence[Any], descending: bool,
+                  nullable: bool = False):
+    """
+    Build the "rows after this cursor" predicate for an ORM query.
+
+    Expands to ``(c1 < v1) OR (c1 = v1 AND c2 < v2) ...`` (``>`` for ascending)
+    which every supported dialect can satisfy with an index range scan.
+
+    With ``nullable`` the first column may be NULL and is ordered NULLS LAST:
+    a non-NULL cursor also admits every NULL row, a NULL cursor continues
+    among the NULL rows by the remaining columns.
+    """
+    if nullable:
+        if values[0] is None:
+            return and_(columns[0].is_(None), keyset_filter(columns[1:], values[1:], descending))
+        return or_(keyset_filter(columns, values, descending), columns[0].is_(None))
+
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def paginate_keyset(query, sort_column, pk_column, descending: bool, sort_key: str,
+                    cursor_token: str, per_page: int, with_total: bool = False) -> Dict[str, Any]:
+    """
+    Run one keyset page of an ORM query.
+
+    Returns a dict with ``items``, ``next_cursor``, ``has_next`` and, when
+    requested, ``total`` (the unpaginated count of the filtered query).
+    """
+    total = query.order_by(None).count() if with_total else None
+
+    columns = [sort_column, pk_column] if sort_column is not pk_column else [pk_column]
+    nullable = len(columns) > 1 and _is_nullable(sort_column)
+    values = decode_cursor(cursor_token, sort_key)
+    if values is not None:
+        if len(values) != len(columns):
+            raise ValidationError("Invalid pagination cursor")
+        query = query.filter(keyset_filter(columns, values, descending, nullable=nullable))
+
+    order = [c.desc() if descending else c.asc() for c in columns]
+    if nullable:
+        order[0] = order[0].nulls_last()
+    rows = query.order_by(None).order_by(*order).limit(per_page + 1).all()
+
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = None
+    if has_next and items:
+        last = items[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, c.key) for c in columns], sort_key
+        )
+
+    result = {'items': items, 'next_cursor': next_cursor, 'has_next': has_next}
+    if with_total:
+        result['total'] = total
+    return result
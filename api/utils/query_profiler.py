@@ -0,0 +1,171 @@
+"""
+Per-request SQL profiler with N+1 detection.
+
+When profiling is on for a request, every cursor execution is recorded
+(SQLAlchemy ``before_cursor_execute`` / ``after_cursor_execute``): query
+count, total DB time, the slowest statements, and how often each
+*normalized* statement shape ran (literals, bound values and IN lists
+collapsed). A shape that runs more than SQL_N_PLUS_ONE_THRESHOLD times in
+one request is the signature of an N+1 loop (a ``Lead.query.get`` per
+row): it is logged as a warning with the statement, or raised as
+NPlusOneError when SQL_PROFILER_RAISE=true (for test runs).
+
+Enabling:
+- SQL_PROFILER=on       profile every request
+- SQL_PROFILER=header   profile requests that send ``X-SQL-Profile: 1``
+                        (the header is also honored when the app runs in debug)
+- SQL_PROFILER=off      default
+
+Profiled responses carry ``X-SQL-Profile: queries=..; db_ms=..; repeated=..``
+and the full profile is logged at the end of the request.
+"""
+
+import heapq
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from api.utils.logging_config import get_logger
+
+logger = get_logger('api.utils.query_profiler')
+
+PROFILE_HEADER = 'X-SQL-Profile'
+SLOWEST_KEPT = 5
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)')
+_NAMED_PARAM = re.compile(r'%\(\w+\)s|:\w+|%s')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class NPlusOneError(Exception):
+    """A normalized statement ran more often in one request than the threshold allows"""
+
+
+def normalize_statement(statement: str) -> str:
+    """Statement shape: literals and parameters become ?, IN lists collapse to (?)"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NAMED_PARAM.sub('?', shape)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def _settings() -> Dict[str, object]:
+    return {
+        'mode': os.getenv('SQL_PROFILER', 'off').lower(),
+        'threshold': int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', '5')),
+        'raise': os.getenv('SQL_PROFILER_RAISE', 'false').lower() == 'true'
+    }
+
+
+class RequestProfile:
+    """Statements executed during one request"""
+
+    def __init__(self, threshold: int, raise_on_repeat: bool = False):
+        self.threshold = threshold
+        self.raise_on_repeat = raise_on_repeat
+        self.query_count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+        self.shape_time = Counter()
+        self.slowest: List[Tuple[float, str]] = []   # min-heap of (seconds, statement)
+        self.flagged = []
+
+    def record(self, statement: str, seconds: float) -> None:
+        shape = normalize_statement(statement)
+        self.query_count += 1
+        self.total_time += seconds
+        self.shapes[shape] += 1
+        self.shape_time[shape] += seconds
+        entry = (seconds, statement)
+        if len(self.slowest) < SLOWEST_KEPT:
+            heapq.heappush(self.slowest, entry)
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+        if self.shapes[shape] == self.threshold + 1:
+            self.flagged.append(shape)
+            message = f"Possible N+1: statement ran more than {self.threshold} times in one request: {shape}"
+            if self.raise_on_repeat:
+                raise NPlusOneError(message)
+            logger.warning(message)
+
+    def repeated(self) -> Dict[str, int]:
+        """Shapes that ran more than once, most frequent first"""
+        return {shape: count for shape, count in self.shapes.most_common() if count > 1}
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'queries': self.query_count,
+            'db_ms': round(self.total_time * 1000, 2),
+            'slowest': [
+                {'ms': round(seconds * 1000, 2), 'statement': statement}
+                for seconds, statement in sorted(self.slowest, reverse=True)
+            ],
+            'repeated': [
+                {'count': count, 'ms': round(self.shape_time[shape] * 1000, 2), 'statement': shape}
+                for shape, count in self.repeated().items()
+            ],
+            'n_plus_one': list(self.flagged)
+        }
+
+    def header_value(self) -> str:
+        return f"queries={self.query_count}; db_ms={self.total_time * 1000:.1f}; repeated={len(self.repeated())}"
+
+
+def _profile():
+    if has_request_context():
+        return g.get('sql_profile')
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile() is not None:
+        conn.info['profiler_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile()
+    started = conn.info.pop('profiler_started', None)
+    if profile is not None and started is not None:
+        profile.record(statement, time.perf_counter() - started)
+
+
+def _start_request():
+    settings = _settings()
+    mode = settings['mode']
+    requested = request.headers.get(PROFILE_HEADER) == '1' and (mode == 'header' or current_app.debug)
+    if mode == 'on' or requested:
+        g.sql_profile = RequestProfile(settings['threshold'], settings['raise'])
+
+
+def _finish_request(response):
+    profile = g.pop('sql_profile', None)
+    if profile is None:
+        return response
+    response.headers[PROFILE_HEADER] = profile.header_value()
+    if profile.query_count:
+        summary = profile.to_dict()
+        logger.info(
+            f"SQL profile {request.method} {request.path}: {summary['queries']} queries, "
+            f"{summary['db_ms']}ms, {len(summary['repeated'])} repeated shapes",
+            extra={'sql_profile': summary}
+        )
+    return response
+
+
+def init_app(app) -> None:
+    """Install the cursor listeners and the per-request profile hooks"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
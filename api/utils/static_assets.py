@@ -0,0 +1,163 @@
+"""
+Static file layer for the React build (frontend/build).
+
+The build directory is scanned once when the app is created: size, mtime,
+content type, ETag and any precompressed ``.br`` / ``.gz`` sibling of every
+file are kept in memory, so serving a request does no ``os.path.exists`` /
+``stat`` calls and no logging.
+
+- Content-hashed files (CRA's ``main.e14791c1.js``, ``*.chunk.css``, media)
+  are sent with ``Cache-Control: public, max-age=31536000, immutable``.
+- Everything else (index.html, manifest.json, favicon.ico, ...) is sent with
+  ``no-cache`` and revalidated through its ETag.
+- A ``.br`` or ``.gz`` variant is sent instead of the original when the
+  client's Accept-Encoding allows it (``Vary: Accept-Encoding``).
+- Bodies go out through ``wsgi.file_wrapper`` (gunicorn uses ``sendfile``),
+  never read into Python memory.
+
+Unknown paths get index.html so React Router can handle them, except under
+``static/`` where a missing hashed file is a real 404.
+"""
+
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+
+from flask import Response, request
+from werkzeug.exceptions import NotFound
+from werkzeug.utils import get_content_type
+from werkzeug.wsgi import wrap_file
+
+from api.utils.logging_config import get_logger
+
+logger = get_logger('api.utils.static_assets')
+
+# Hex content hash of 8+ characters between dots: main.e14791c1.js, 787.a1b2c3d4.chunk.js
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8,}\.')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+INDEX = 'index.html'
+
+
+class _File:
+    """Cached metadata of one file on disk"""
+
+    __slots__ = ('path', 'size', 'mtime', 'etag')
+
+    def __init__(self, path: str, stat: os.stat_result, tag: str = ''):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}{tag}"
+
+
+class _Asset:
+    """A servable file and its precompressed variants"""
+
+    __slots__ = ('original', 'variants', 'content_type', 'cache_control')
+
+    def __init__(self, original: _File, content_type: str, cache_control: str):
+        self.original = original
+        self.variants: Dict[str, _File] = {}   # content-encoding -> file
+        self.content_type = content_type
+        self.cache_control = cache_control
+
+
+class StaticAssets:
+    """In-memory index of a build directory that serves files from it"""
+
+    def __init__(self, build_dir: str):
+        self.build_dir = build_dir
+        self._assets: Dict[str, _Asset] = {}
+
+    @property
+    def available(self) -> bool:
+        return INDEX in self._assets
+
+    def scan(self) -> None:
+        """(Re)build the metadata index from the build directory"""
+        assets = {}
+        variants = []
+        for directory, _, filenames in os.walk(self.build_dir):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.build_dir).replace(os.sep, '/')
+                stat = os.stat(path)
+                encoding = next((enc for enc, suffix in ENCODINGS if name.endswith(suffix)), None)
+                if encoding:
+                    variants.append((name, encoding, path, stat))
+                    continue
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                immutable = name.startswith('static/') and HASHED_NAME.search(filename)
+                assets[name] = _Asset(
+                    _File(path, stat), get_content_type(mimetype, 'utf-8'),
+                    IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+                )
+
+        # A .br/.gz file is only used next to its original; stray ones are never served
+        for name, encoding, path, stat in variants:
+            asset = assets.get(name.rsplit('.', 1)[0])
+            if asset is not None:
+                asset.variants[encoding] = _File(path, stat, tag=f'-{encoding}')
+
+        self._assets = assets   # swapped whole, so readers never see a partial index
+        compressed = sum(1 for asset in assets.values() if asset.variants)
+        logger.info(f"Static assets: {len(assets)} files ({compressed} precompressed) from {self.build_dir}")
+
+    def lookup(self, path: str) -> Optional[_Asset]:
+        """The asset for a request path, index.html for client-side routes, or None"""
+        path = path.lstrip('/') or INDEX
+        assets = self._assets
+        asset = assets.get(path)
+        if asset is None and not path.startswith('static/'):
+            asset = assets.get(INDEX)
+        return asset
+
+    def serve(self, path: str) -> Response:
+        """Response for path in the current request (304 when the client's copy is current)"""
+        asset = self.lookup(path)
+        if asset is None:
+            raise NotFound()
+
+        encoding, file = None, asset.original
+        accepted = request.accept_encodings
+        for candidate, _ in ENCODINGS:
+            if candidate in asset.variants and accepted[candidate]:
+                encoding, file = candidate, asset.variants[candidate]
+                break
+
+        headers = {'Cache-Control': asset.cache_control}
+        if asset.variants:
+            headers['Vary'] = 'Accept-Encoding'
+
+        if request.if_none_match.contains(file.etag):
+            response = Response(status=304, headers=headers)
+            response.set_etag(file.etag)
+            return response
+
+        try:
+            handle = open(file.path, 'rb')
+        except OSError:
+            # The build changed under us; rescan so the next request sees it
+            logger.warning(f"Static file vanished: {file.path}, rescanning {self.build_dir}")
+            self.scan()
+            raise NotFound()
+
+        response = Response(
+            wrap_file(request.environ, handle),
+            content_type=asset.content_type,
+            headers=headers,
+            direct_passthrough=True
+        )
+        response.content_length = file.size
+        response.last_modified = file.mtime
+        response.set_etag(file.etag)
+        if encoding:
+            response.content_encoding = encoding
+        return response
@@ -14,6 +14,9 @@ npm run build
 # Go back to root directory
 cd ..
 
+echo "🗜️  Precompressing frontend assets..."
+python scripts/precompress_assets.py frontend/build
+
 echo "🐍 Installing Python dependencies..."
 pip install -r requirements.txt
 
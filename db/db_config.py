@@ -1,7 +1,12 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 import logging
 
 # Set up logging
@@ -11,8 +16,6 @@ logger = logging.getLogger(__name__)
 # Load environment variables from .env
 load_dotenv()
 
-# Create SQLAlchemy instance
-db = SQLAlchemy()
 
 # Database configuration - uses Railway's PostgreSQL in production, PostgreSQL/SQLite in development
 def get_db_url():
@@ -43,21 +46,170 @@ def get_db_url():
         logger.info(f"SQLite Database URL: {url}")
         return url
 
-# Create single engine instance
-engine = create_engine(get_db_url())
-
-# Test the connection (only in development and not during imports)
-if os.getenv("FLASK_ENV") != "production" and __name__ != "__main__":
-    try:
-        with engine.connect() as conn:
-            logger.info("Successfully connected to the database!")
-    except Exception as e:
-        logger.error(f"Failed to connect to the database: {e}")
-        # For SQLite, this is usually not a critical error during setup
-        if "sqlite" not in get_db_url():
-            logger.warning("Database connection failed - this may cause issues")
-else:
-    logger.info("Skipping database connection test")
-
-# Initialize Flask-SQLAlchemy with the same URL
-# db.init_app(None)  # You'll need to pass your Flask app here if you have one
\ No newline at end of file
+def _env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+def get_pool_settings():
+    """
+    Connection pool settings, tunable from the environment:
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (seconds to wait for a
+    connection), DB_POOL_RECYCLE (seconds), DB_POOL_PRE_PING and
+    DB_STATEMENT_TIMEOUT_MS (Postgres statement_timeout, 0 = none).
+    """
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),   # below Railway's idle connection cutoff
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        'statement_timeout_ms': _env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+    }
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.reset_wait_stats()
+
+    def reset_wait_stats(self):
+        with self._wait_lock:
+            self.checkouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+def get_engine_options(url):
+    """create_engine() keyword arguments for url, from get_pool_settings()"""
+    settings = get_pool_settings()
+    url = make_url(url)
+    options = {'pool_pre_ping': settings['pool_pre_ping']}
+
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # In-memory SQLite keeps SQLAlchemy's single-connection pool
+        return options
+
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': settings['pool_size'],
+        'max_overflow': settings['max_overflow'],
+        'pool_timeout': settings['pool_timeout'],
+        'pool_recycle': settings['pool_recycle']
+    })
+    if url.get_backend_name() == 'postgresql' and settings['statement_timeout_ms'] > 0:
+        # connect_args replaces an ?options= given in the URL (e.g. a search_path), so keep it
+        pg_options = f"-c statement_timeout={settings['statement_timeout_ms']}"
+        url_options = url.query.get('options')
+        if url_options:
+            pg_options = f"{url_options if isinstance(url_options, str) else ' '.join(url_options)} {pg_options}"
+        options['connect_args'] = {'options': pg_options}
+    return options
+
+_engines = {}
+_engine_options = {}    # url -> options the cached engine was created with
+_engines_lock = threading.Lock()
+
+# create_engine() defaults for options Flask-SQLAlchemy always passes explicitly
+_CREATE_ENGINE_DEFAULTS = {'echo': False, 'echo_pool': False}
+
+def _conflicting_options(existing, requested):
+    """Requested options that differ from those the cached engine was built with"""
+    return {
+        key: (existing.get(key, _CREATE_ENGINE_DEFAULTS.get(key)), value)
+        for key, value in requested.items()
+        if existing.get(key, _CREATE_ENGINE_DEFAULTS.get(key)) != value
+    }
+
+def create_db_engine(url=None, **overrides):
+    """
+    Engine factory shared by Flask-SQLAlchemy, ETL, scripts and Streamlit.
+    One engine (and pool) per URL per process; overrides only apply to the
+    call that creates it, and later calls asking for different options get
+    the cached engine with a warning.
+    """
+    url = make_url(url or get_db_url()).render_as_string(hide_password=False)
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            options = get_engine_options(url)
+            options.update(overrides)
+            engine = create_engine(url, **options)
+            _engines[url] = engine
+            _engine_options[url] = options
+        elif overrides:
+            conflicts = _conflicting_options(_engine_options[url], overrides)
+            if conflicts:
+                details = ', '.join(f"{key}={new!r} (engine has {old!r})"
+                                    for key, (old, new) in sorted(conflicts.items()))
+                logger.warning(f"Engine for {engine.url} already exists; ignoring {details}")
+        return engine
+
+def pool_stats(engine):
+    """Live pool statistics: size, checked in/out, overflow and checkout wait times"""
+    pool = engine.pool
+    stats = {'pool_class': type(pool).__name__, 'status': pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout()
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._wait_lock:
+            stats.update({
+                'checkouts': pool.checkouts,
+                'avg_wait_ms': (pool.total_wait / pool.checkouts * 1000) if pool.checkouts else 0.0,
+                'max_wait_ms': pool.max_wait * 1000,
+                'timeouts': pool.timeouts
+            })
+    return stats
+
+class _SharedEngineSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy whose engines come from create_db_engine()"""
+
+    def _make_engine(self, bind_key, options, app):
+        url = options.pop('url')
+        return create_db_engine(url, **options)
+
+# Create SQLAlchemy instance
+db = _SharedEngineSQLAlchemy()
+
+def get_engine():
+    """The default engine (created on first use, never at import)"""
+    return create_db_engine()
+
+def dispose_engines():
+    """
+    Drop pooled connections inherited from a parent process without closing
+    them (gunicorn post_fork with --preload); each worker reconnects lazily.
+    """
+    with _engines_lock:
+        engines = list(_engines.values())
+    for engine in engines:
+        engine.dispose(close=False)
+
+def __getattr__(name):
+    # `from db.db_config import engine` keeps working for ETL and scripts, but the
+    # engine is only built when first asked for; importing this module does no I/O
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -11,9 +11,27 @@
 -- - migration_remove_customer_uid_from_activities.sql
 -- - migration_simplify_task_assignment.sql
 -- - migration_fix_customer_schema.sql (adds bd_in_charge to customer, removes date_converted)
+-- - migration_add_trading_volume_fact.sql (materialized long-format trading volume)
+-- - migration_add_table_change_version.sql (per-table change versions for cache invalidation)
+-- - migration_add_activity_analytics_index.sql (covering index for activity analytics)
+-- - migration_add_conversion_rate_indexes.sql (lead/customer date_created indexes)
+-- - migration_add_lead_search.sql (pg_trgm and tsvector indexes for lead search)
+
+-- Extensions
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Drop tables if they exist (for rebuilds)
 DROP TABLE IF EXISTS activity CASCADE;
+DROP TABLE IF EXISTS trading_volume_fact CASCADE;
+DO $$
+BEGIN
+    -- table_change_version used to be a trigger-bumped table; it is a view now
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'table_change_version' AND relkind = 'r') THEN
+        DROP TABLE table_change_version CASCADE;
+    END IF;
+END $$;
+DROP VIEW IF EXISTS table_change_version;
+DROP FUNCTION IF EXISTS bump_table_change_version() CASCADE;
 DROP TABLE IF EXISTS daily_trading_volume CASCADE;
 DROP TABLE IF EXISTS vip_history CASCADE;
 DROP TABLE IF EXISTS contact CASCADE;
@@ -121,6 +139,22 @@ CREATE TABLE IF NOT EXISTS "activity" (
 COMMENT ON TABLE "daily_trading_volume" IS 'Composite PK ensures unique daily trading record per customer';
 COMMENT ON TABLE "activity" IS 'Activities and tasks are lead-centric. Customer activities are accessed via the lead-customer relationship through the contact table.';
 
+-- Lead search (api/services/lead_search.py): weighted tsvector + trigram indexes
+ALTER TABLE "lead" ADD COLUMN "search_vector" tsvector
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(full_name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(company_name, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(email, '')), 'C')
+  ) STORED;
+CREATE INDEX IF NOT EXISTS idx_lead_search_vector ON lead USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_lead_full_name_trgm ON lead USING GIN (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_lead_company_name_trgm ON lead USING GIN (company_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_lead_email_trgm ON lead USING GIN (email gin_trgm_ops);
+
+-- Indexes for monthly conversion rate (lead/customer by month and BD)
+CREATE INDEX IF NOT EXISTS idx_lead_date_created_bd ON lead(date_created, bd_in_charge) INCLUDE (source);
+CREATE INDEX IF NOT EXISTS idx_customer_date_created_bd ON customer(date_created, bd_in_charge);
+
 -- Enhanced Activity table foreign keys and indexes
 ALTER TABLE "activity" ADD FOREIGN KEY ("lead_id") REFERENCES "lead" ("lead_id") ON DELETE CASCADE;
 
@@ -133,6 +167,8 @@ CREATE INDEX IF NOT EXISTS idx_activity_status ON activity(status);
 CREATE INDEX IF NOT EXISTS idx_activity_due_date ON activity(due_date);
 CREATE INDEX IF NOT EXISTS idx_activity_assigned_to ON activity(assigned_to);
 CREATE INDEX IF NOT EXISTS idx_activity_priority ON activity(priority);
+-- Covering index for activity analytics (single scan over manual activities by date/BD)
+CREATE INDEX IF NOT EXISTS idx_activity_category_date_assigned ON activity(activity_category, date_created, assigned_to) INCLUDE (activity_type, status);
 
 -- Functions
 
@@ -484,64 +520,92 @@ FROM activity a
 JOIN lead l ON a.lead_id = l.lead_id
 WHERE a.activity_category = 'manual';
 
--- views for trading volume
+-- Materialized trading volume (long format, maintained by triggers on daily_trading_volume)
+-- One row per customer/day/type/side with volume > 0
+CREATE TABLE IF NOT EXISTS "trading_volume_fact" (
+  "date" date NOT NULL,
+  "customer_uid" INTEGER NOT NULL,
+  "trade_type" varchar(20) NOT NULL, -- 'spot', 'futures'
+  "trade_side" varchar(20) NOT NULL, -- 'maker', 'taker'
+  "volume" numeric(18,2) NOT NULL,
+  "fees" numeric(6,2),
+  "customer_name" varchar(120) NOT NULL, -- denormalized from customer
+  "bd_in_charge" varchar(20), -- denormalized from customer
+  PRIMARY KEY ("date", "customer_uid", "trade_type", "trade_side"),
+  FOREIGN KEY ("customer_uid") REFERENCES "customer" ("customer_uid") ON DELETE CASCADE
+);
+
+COMMENT ON TABLE "trading_volume_fact" IS 'Long-format trading volume maintained from daily_trading_volume by triggers';
+
+CREATE INDEX IF NOT EXISTS idx_trading_volume_fact_customer_date ON trading_volume_fact(customer_uid, date);
+CREATE INDEX IF NOT EXISTS idx_trading_volume_fact_bd_date ON trading_volume_fact(bd_in_charge, date);
+
+-- Re-derive the fact rows for one daily_trading_volume row
+CREATE OR REPLACE FUNCTION sync_trading_volume_fact()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM trading_volume_fact
+        WHERE customer_uid = OLD.customer_uid AND date = OLD.date;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO trading_volume_fact (
+            date, customer_uid, trade_type, trade_side, volume, fees, customer_name, bd_in_charge
+        )
+        SELECT NEW.date, NEW.customer_uid, v.trade_type, v.trade_side, v.volume, v.fees, c.name, c.bd_in_charge
+        FROM customer c
+        CROSS JOIN (VALUES
+            ('spot', 'maker', NEW.spot_maker_trading_volume, NEW.spot_maker_fees),
+            ('spot', 'taker', NEW.spot_taker_trading_volume, NEW.spot_taker_fees),
+            ('futures', 'maker', NEW.futures_maker_trading_volume, NEW.futures_maker_fees),
+            ('futures', 'taker', NEW.futures_taker_trading_volume, NEW.futures_taker_fees)
+        ) AS v(trade_type, trade_side, volume, fees)
+        WHERE c.customer_uid = NEW.customer_uid
+        AND v.volume > 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keep denormalized customer columns current
+CREATE OR REPLACE FUNCTION sync_trading_volume_fact_customer()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE trading_volume_fact
+    SET customer_name = NEW.name,
+        bd_in_charge = NEW.bd_in_charge
+    WHERE customer_uid = NEW.customer_uid;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trading_volume_fact_sync
+    AFTER INSERT OR UPDATE OR DELETE ON daily_trading_volume
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_trading_volume_fact();
+
+CREATE TRIGGER trading_volume_fact_customer_sync
+    AFTER UPDATE OF name, bd_in_charge ON customer
+    FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.bd_in_charge IS DISTINCT FROM NEW.bd_in_charge)
+    EXECUTE FUNCTION sync_trading_volume_fact_customer();
+
+-- views for trading volume (thin projection of the materialized fact table)
 CREATE OR REPLACE VIEW v_trading_volume_detail AS
-SELECT
-    dtv.date,
-    dtv.customer_uid,
-    c.name as customer_name,
-    'spot' as trade_type,
-    'maker' as trade_side,
-    dtv.spot_maker_trading_volume as volume,
-    dtv.spot_maker_fees as fees,
-    c.bd_in_charge
-FROM daily_trading_volume dtv
-JOIN customer c ON dtv.customer_uid = c.customer_uid
-WHERE dtv.spot_maker_trading_volume > 0
-
-UNION ALL
-
-SELECT
-    dtv.date,
-    dtv.customer_uid,
-    c.name as customer_name,
-    'spot' as trade_type,
-    'taker' as trade_side,
-    dtv.spot_taker_trading_volume as volume,
-    dtv.spot_taker_fees as fees,
-    c.bd_in_charge
-FROM daily_trading_volume dtv
-JOIN customer c ON dtv.customer_uid = c.customer_uid
-WHERE dtv.spot_taker_trading_volume > 0
-
-UNION ALL
-
-SELECT
-    dtv.date,
-    dtv.customer_uid,
-    c.name as customer_name,
-    'futures' as trade_type,
-    'maker' as trade_side,
-    dtv.futures_maker_trading_volume as volume,
-    dtv.futures_maker_fees as fees,
-    c.bd_in_charge
-FROM daily_trading_volume dtv
-JOIN customer c ON dtv.customer_uid = c.customer_uid
-WHERE dtv.futures_maker_trading_volume > 0
-
-UNION ALL
-
-SELECT
-    dtv.date,
-    dtv.customer_uid,
-    c.name as customer_name,
-    'futures' as trade_type,
-    'taker' as trade_side,
-    dtv.futures_taker_trading_volume as volume,
-    dtv.futures_taker_fees as fees,
-    c.bd_in_charge
-FROM daily_trading_volume dtv
-JOIN customer c ON dtv.customer_uid = c.customer_uid
-WHERE dtv.futures_taker_trading_volume > 0
-
-ORDER BY date DESC, customer_uid ASC;
\ No newline at end of file
+SELECT date, customer_uid, customer_name, trade_type, trade_side, volume, fees, bd_in_charge
+FROM trading_volume_fact;
+
+-- Per-table change versions (cache invalidation), see
+-- migration_add_table_change_version.sql for why these are statistics counters
+CREATE OR REPLACE VIEW table_change_version AS
+SELECT relname::varchar(63) AS table_name,
+       n_tup_ins + n_tup_upd + n_tup_del AS version,
+       n_live_tup AS live_rows,
+       relid
+FROM pg_stat_user_tables
+WHERE schemaname = current_schema();
+
+COMMENT ON VIEW table_change_version IS 'Per-table write counters (pg_stat_user_tables); used for cache invalidation';
@@ -0,0 +1,26 @@
+-- Migration: Covering index for activity analytics
+-- Purpose: Let get_activity_analytics (single GROUPING SETS scan over manual
+--          activities filtered by date and BD) run as an index-only scan.
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_activity_category_date_assigned
+    ON activity(activity_category, date_created, assigned_to)
+    INCLUDE (activity_type, status);
+
+ANALYZE activity;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_indexes
+        WHERE tablename = 'activity' AND indexname = 'idx_activity_category_date_assigned'
+    ) THEN
+        RAISE EXCEPTION 'idx_activity_category_date_assigned was not created';
+    END IF;
+
+    RAISE NOTICE 'Migration Validation Report:';
+    RAISE NOTICE '- idx_activity_category_date_assigned created';
+END $$;
+
+COMMIT;
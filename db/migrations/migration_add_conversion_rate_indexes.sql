@@ -0,0 +1,31 @@
+-- Migration: Indexes for the monthly conversion rate query
+-- Purpose: get_monthly_lead_conversion_rate aggregates lead and customer by
+--          month of date_created, optionally filtered by bd_in_charge.
+--          These indexes let both sides be read by date range (and BD) instead
+--          of scanning the full tables.
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_lead_date_created_bd ON lead(date_created, bd_in_charge) INCLUDE (source);
+CREATE INDEX IF NOT EXISTS idx_customer_date_created_bd ON customer(date_created, bd_in_charge);
+
+ANALYZE lead;
+ANALYZE customer;
+
+DO $$
+DECLARE
+    created_indexes INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO created_indexes
+    FROM pg_indexes
+    WHERE indexname IN ('idx_lead_date_created_bd', 'idx_customer_date_created_bd');
+
+    RAISE NOTICE 'Migration Validation Report:';
+    RAISE NOTICE '- Conversion rate indexes present: % of 2', created_indexes;
+
+    IF created_indexes <> 2 THEN
+        RAISE EXCEPTION 'Conversion rate indexes were not created';
+    END IF;
+END $$;
+
+COMMIT;
@@ -0,0 +1,44 @@
+-- Migration: Indexed lead search
+-- Purpose: Replace sequential scans for the leads search box
+--          (ILIKE '%term%' on full_name, company_name, email) with:
+--          - pg_trgm GIN indexes, so the substring ILIKE predicates use an index
+--          - a weighted tsvector column with a GIN index for word/prefix matching
+--            and ts_rank relevance ordering (api/services/lead_search.py)
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE lead ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(full_name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(company_name, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(email, '')), 'C')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_lead_search_vector ON lead USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_lead_full_name_trgm ON lead USING GIN (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_lead_company_name_trgm ON lead USING GIN (company_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_lead_email_trgm ON lead USING GIN (email gin_trgm_ops);
+
+ANALYZE lead;
+
+DO $$
+DECLARE
+    search_indexes INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO search_indexes
+    FROM pg_indexes
+    WHERE tablename = 'lead'
+    AND indexname IN ('idx_lead_search_vector', 'idx_lead_full_name_trgm',
+                      'idx_lead_company_name_trgm', 'idx_lead_email_trgm');
+
+    RAISE NOTICE 'Migration Validation Report:';
+    RAISE NOTICE '- Lead search indexes present: % of 4', search_indexes;
+
+    IF search_indexes <> 4 THEN
+        RAISE EXCEPTION 'Lead search indexes were not created';
+    END IF;
+END $$;
+
+COMMIT;
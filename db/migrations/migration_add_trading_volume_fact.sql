@@ -0,0 +1,135 @@
+-- Migration: Materialized long-format trading volume table
+-- Purpose: Replace reads from the 4-way UNION ALL view v_trading_volume_detail with a
+--          physical, indexed trading_volume_fact table keyed by
+--          (date, customer_uid, trade_type, trade_side).
+--          The table is kept in sync incrementally by triggers on daily_trading_volume
+--          (ingest) and customer (name / bd_in_charge changes).
+
+BEGIN;
+
+-- Long-format trading volume (one row per customer/day/type/side with volume > 0)
+CREATE TABLE IF NOT EXISTS "trading_volume_fact" (
+  "date" date NOT NULL,
+  "customer_uid" INTEGER NOT NULL,
+  "trade_type" varchar(20) NOT NULL, -- 'spot', 'futures'
+  "trade_side" varchar(20) NOT NULL, -- 'maker', 'taker'
+  "volume" numeric(18,2) NOT NULL,
+  "fees" numeric(6,2),
+  "customer_name" varchar(120) NOT NULL, -- denormalized from customer
+  "bd_in_charge" varchar(20), -- denormalized from customer
+  PRIMARY KEY ("date", "customer_uid", "trade_type", "trade_side"),
+  FOREIGN KEY ("customer_uid") REFERENCES "customer" ("customer_uid") ON DELETE CASCADE
+);
+
+COMMENT ON TABLE "trading_volume_fact" IS 'Long-format trading volume maintained from daily_trading_volume by triggers';
+
+CREATE INDEX IF NOT EXISTS idx_trading_volume_fact_customer_date ON trading_volume_fact(customer_uid, date);
+CREATE INDEX IF NOT EXISTS idx_trading_volume_fact_bd_date ON trading_volume_fact(bd_in_charge, date);
+
+-- Re-derive the fact rows for one daily_trading_volume row
+CREATE OR REPLACE FUNCTION sync_trading_volume_fact()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM trading_volume_fact
+        WHERE customer_uid = OLD.customer_uid AND date = OLD.date;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO trading_volume_fact (
+            date, customer_uid, trade_type, trade_side, volume, fees, customer_name, bd_in_charge
+        )
+        SELECT NEW.date, NEW.customer_uid, v.trade_type, v.trade_side, v.volume, v.fees, c.name, c.bd_in_charge
+        FROM customer c
+        CROSS JOIN (VALUES
+            ('spot', 'maker', NEW.spot_maker_trading_volume, NEW.spot_maker_fees),
+            ('spot', 'taker', NEW.spot_taker_trading_volume, NEW.spot_taker_fees),
+            ('futures', 'maker', NEW.futures_maker_trading_volume, NEW.futures_maker_fees),
+            ('futures', 'taker', NEW.futures_taker_trading_volume, NEW.futures_taker_fees)
+        ) AS v(trade_type, trade_side, volume, fees)
+        WHERE c.customer_uid = NEW.customer_uid
+        AND v.volume > 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keep denormalized customer columns current
+CREATE OR REPLACE FUNCTION sync_trading_volume_fact_customer()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE trading_volume_fact
+    SET customer_name = NEW.name,
+        bd_in_charge = NEW.bd_in_charge
+    WHERE customer_uid = NEW.customer_uid;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trading_volume_fact_sync ON daily_trading_volume;
+CREATE TRIGGER trading_volume_fact_sync
+    AFTER INSERT OR UPDATE OR DELETE ON daily_trading_volume
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_trading_volume_fact();
+
+DROP TRIGGER IF EXISTS trading_volume_fact_customer_sync ON customer;
+CREATE TRIGGER trading_volume_fact_customer_sync
+    AFTER UPDATE OF name, bd_in_charge ON customer
+    FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.bd_in_charge IS DISTINCT FROM NEW.bd_in_charge)
+    EXECUTE FUNCTION sync_trading_volume_fact_customer();
+
+-- Backfill from existing history
+TRUNCATE trading_volume_fact;
+INSERT INTO trading_volume_fact (
+    date, customer_uid, trade_type, trade_side, volume, fees, customer_name, bd_in_charge
+)
+SELECT dtv.date, dtv.customer_uid, v.trade_type, v.trade_side, v.volume, v.fees, c.name, c.bd_in_charge
+FROM daily_trading_volume dtv
+JOIN customer c ON dtv.customer_uid = c.customer_uid
+CROSS JOIN LATERAL (VALUES
+    ('spot', 'maker', dtv.spot_maker_trading_volume, dtv.spot_maker_fees),
+    ('spot', 'taker', dtv.spot_taker_trading_volume, dtv.spot_taker_fees),
+    ('futures', 'maker', dtv.futures_maker_trading_volume, dtv.futures_maker_fees),
+    ('futures', 'taker', dtv.futures_taker_trading_volume, dtv.futures_taker_fees)
+) AS v(trade_type, trade_side, volume, fees)
+WHERE v.volume > 0;
+
+ANALYZE trading_volume_fact;
+
+-- Keep the legacy view for ad-hoc queries, now a thin projection of the fact table
+-- (column types change from text literals to varchar, so the view must be recreated)
+DROP VIEW IF EXISTS v_trading_volume_detail;
+CREATE VIEW v_trading_volume_detail AS
+SELECT date, customer_uid, customer_name, trade_type, trade_side, volume, fees, bd_in_charge
+FROM trading_volume_fact;
+
+-- Validate that the backfill matches the source table
+DO $$
+DECLARE
+    expected_rows INTEGER;
+    fact_rows INTEGER;
+BEGIN
+    SELECT
+        COUNT(*) FILTER (WHERE dtv.spot_maker_trading_volume > 0) +
+        COUNT(*) FILTER (WHERE dtv.spot_taker_trading_volume > 0) +
+        COUNT(*) FILTER (WHERE dtv.futures_maker_trading_volume > 0) +
+        COUNT(*) FILTER (WHERE dtv.futures_taker_trading_volume > 0)
+    INTO expected_rows
+    FROM daily_trading_volume dtv
+    JOIN customer c ON dtv.customer_uid = c.customer_uid;
+
+    SELECT COUNT(*) INTO fact_rows FROM trading_volume_fact;
+
+    RAISE NOTICE 'Migration Validation Report:';
+    RAISE NOTICE '- Expected long-format rows: %', expected_rows;
+    RAISE NOTICE '- Rows in trading_volume_fact: %', fact_rows;
+
+    IF expected_rows <> fact_rows THEN
+        RAISE EXCEPTION 'trading_volume_fact backfill mismatch: expected %, got %', expected_rows, fact_rows;
+    END IF;
+END $$;
+
+COMMIT;
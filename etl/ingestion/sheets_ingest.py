@@ -1,6 +1,6 @@
 from etl.extract import extract_sheet, get_sheet, update_sheet_status
 from etl.transform import clean_leads, clean_daily_trading_volume
-from etl.load import load_to_postgres
+from etl.load import load_to_postgres, load_leads_staged, REJECT_DUPLICATE
 from db.db_config import engine
 import pandas as pd
 
@@ -39,39 +39,31 @@ def ingest_leads():
             print(f"No new data to load")
             return
         
-        # 3. Load and start a transaction
-        successful_indices = []
-        failed_indices = []
-        
-        with engine.begin() as connection:
-            try:
-                # Process each row individually
-                for idx, row in leads_df.iterrows():
-                    try:
-                        # Create a single-row DataFrame
-                        row_df = pd.DataFrame([row])
-                        # Load single row
-                        load_to_postgres(row_df, 'lead')
-                        successful_indices.append(original_indices[idx])
-                    except Exception as e:
-                        print(f"Error processing row {idx}: {e}")
-                        failed_indices.append(original_indices[idx])
-                
-                # Update status in Google Sheets
-                if successful_indices:
-                    update_sheet_status(sheet, successful_indices, 'PROCESSED')
-                    print(f"{str(len(successful_indices))} successfully saved to Database.")
-                if failed_indices:
-                    update_sheet_status(sheet, failed_indices, 'ERROR')
-                    print(f"{str(len(failed_indices))} failed saving to Database.")
-            
-            except Exception as e:
-                print(f"Error during loading: {e}")
-                # Mark all remaining rows as ERROR
-                remaining_indices = [idx for idx in original_indices if idx not in successful_indices]
-                if remaining_indices:
-                    update_sheet_status(sheet, remaining_indices, 'ERROR')
-                raise
+        # 3. Load the whole batch set-based in one transaction; sheet row
+        # numbers are the DataFrame index labels (as for duplicates above)
+        try:
+            with engine.begin() as connection:
+                inserted, rejected = load_leads_staged(leads_df, connection)
+        except Exception as e:
+            print(f"Error during loading: {e}")
+            update_sheet_status(sheet, list(leads_df.index), 'ERROR')
+            raise
+
+        for idx, (code, message) in rejected.items():
+            print(f"Rejected row {idx}: {message}")
+
+        # Update status in Google Sheets once the transaction has committed
+        duplicate_rows = [idx for idx, (code, message) in rejected.items() if code == REJECT_DUPLICATE]
+        failed_rows = [idx for idx in rejected if idx not in duplicate_rows]
+        if inserted:
+            update_sheet_status(sheet, list(inserted), 'PROCESSED')
+            print(f"{len(inserted)} successfully saved to Database.")
+        if duplicate_rows:
+            update_sheet_status(sheet, duplicate_rows, 'DUPLICATES')
+            print(f"{len(duplicate_rows)} already in Database.")
+        if failed_rows:
+            update_sheet_status(sheet, failed_rows, 'ERROR')
+            print(f"{len(failed_rows)} failed saving to Database.")
 
     except Exception as e:
         print(f"Error occurred in leads ingestion: {e}")
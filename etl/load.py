@@ -1,3 +1,5 @@
+import io
+
 from db.db_config import engine
 
 def load_to_postgres(df, table_name):
@@ -15,4 +17,152 @@ def load_to_postgres(df, table_name):
         )
     except Exception as e:
         print(f"Error loading data to {table_name}: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+# Values Postgres accepts as boolean input
+BOOLEAN_VALUES = ('true', 'false', 't', 'f', 'yes', 'no', 'y', 'n', '1', '0')
+
+# Columns checked against existing leads; a match rejects the row
+LEAD_UNIQUE_COLUMNS = ('email', 'telegram')
+
+# Reject codes returned by load_leads_staged with each rejected row
+REJECT_REQUIRED = 'required'
+REJECT_TOO_LONG = 'too_long'
+REJECT_INVALID = 'invalid'
+REJECT_DUPLICATE = 'duplicate'
+REJECT_CONFLICT = 'conflict'
+REJECT_CODES = (REJECT_REQUIRED, REJECT_TOO_LONG, REJECT_INVALID, REJECT_DUPLICATE, REJECT_CONFLICT)
+
+# Session-local helper: does a staged text value cast to the column type?
+# A value like '2025-02-30' matches the date pattern but fails the cast, and a
+# failed cast inside the INSERT ... SELECT would abort the whole batch.
+CASTABLE_FUNCTION = """
+    CREATE OR REPLACE FUNCTION pg_temp.castable(value text, type_name text)
+    RETURNS boolean AS $$
+    BEGIN
+        EXECUTE format('SELECT %L::%s', value, type_name);
+        RETURN TRUE;
+    EXCEPTION WHEN others THEN
+        RETURN FALSE;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+def _reject(code, message):
+    """SQL array literal holding a reject code and its message"""
+    return f"ARRAY['{code}', '{message}']"
+
+def _reject_reasons(columns, meta):
+    """
+    SQL CASE branches giving the first reason a staged row can't be inserted,
+    from the target table's column definitions. Each branch yields
+    ARRAY[code, message] with code one of REJECT_CODES.
+    """
+    branches = []
+    for col in columns:
+        data_type, max_length, nullable, default = meta[col]
+        value = f's."{col}"'
+        if not nullable and default is None:
+            branches.append(f"WHEN {value} IS NULL THEN {_reject(REJECT_REQUIRED, f'{col} is required')}")
+        if max_length:
+            branches.append(f"WHEN length({value}) > {max_length} "
+                            f"THEN {_reject(REJECT_TOO_LONG, f'{col} is longer than {max_length} characters')}")
+        if data_type == 'boolean':
+            branches.append(f"WHEN lower({value}) NOT IN {BOOLEAN_VALUES} "
+                            f"THEN {_reject(REJECT_INVALID, f'{col} is not true/false')}")
+        elif data_type in ('integer', 'bigint', 'smallint'):
+            branches.append(f"WHEN {value} !~ '^-?[0-9]+$' "
+                            f"THEN {_reject(REJECT_INVALID, f'{col} is not a whole number')}")
+            branches.append(f"WHEN NOT pg_temp.castable({value}, '{data_type}') "
+                            f"THEN {_reject(REJECT_INVALID, f'{col} is out of range')}")
+        elif data_type.startswith('timestamp') or data_type == 'date':
+            branches.append(f"WHEN {value} !~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}' "
+                            f"THEN {_reject(REJECT_INVALID, f'{col} is not a date (YYYY-MM-DD)')}")
+            branches.append(f"WHEN NOT pg_temp.castable({value}, '{data_type}') "
+                            f"THEN {_reject(REJECT_INVALID, f'{col} is not a valid date')}")
+    for col in LEAD_UNIQUE_COLUMNS:
+        if col in columns:
+            # Uncorrelated IN: one hashed scan of lead, not a lookup per staged row
+            branches.append(
+                f"WHEN lower(s.\"{col}\") IN (SELECT lower(l.\"{col}\") FROM lead l WHERE l.\"{col}\" IS NOT NULL) "
+                f"THEN {_reject(REJECT_DUPLICATE, f'{col} already exists')}"
+            )
+    return branches
+
+def load_leads_staged(df, connection):
+    """
+    Set-based load of cleaned leads inside the caller's transaction.
+
+    COPY the batch into a temp staging table, flag rows that would fail
+    (missing required values, too long, bad booleans/dates, values that don't
+    cast to the column type, email or telegram already in the database) in one
+    UPDATE, then INSERT ... SELECT the rest
+    with ON CONFLICT DO NOTHING RETURNING lead_id to learn which rows landed.
+
+    Returns (inserted, rejected): {df index: lead_id}, {df index: (code, message)}
+    """
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT column_name, data_type, character_maximum_length, is_nullable = 'YES', column_default
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'lead'
+        """)
+        meta = {name: (data_type, max_length, nullable, default)
+                for name, data_type, max_length, nullable, default in cursor.fetchall()}
+
+        columns = [col for col in df.columns if col != 'lead_id']
+        unknown = [col for col in columns if col not in meta]
+        if unknown:
+            raise ValueError(f"Columns not in lead table: {', '.join(unknown)}")
+
+        # lead_id is drawn up front so RETURNING maps back to the staged row
+        staged = ', '.join(f'"{col}" text' for col in columns)
+        cursor.execute(f"""
+            CREATE TEMP TABLE lead_staging (
+                row_index bigint NOT NULL,
+                lead_id integer NOT NULL DEFAULT nextval(pg_get_serial_sequence('lead', 'lead_id')),
+                reject text[],
+                {staged}
+            ) ON COMMIT DROP
+        """)
+
+        # Blank cells arrive as NULL (unquoted empty CSV fields)
+        buffer = io.StringIO()
+        df[columns].to_csv(buffer, header=False, index=True)
+        buffer.seek(0)
+        column_list = ', '.join(f'"{col}"' for col in columns)
+        cursor.copy_expert(f"COPY lead_staging (row_index, {column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+        branches = _reject_reasons(columns, meta)
+        if branches:
+            cursor.execute(CASTABLE_FUNCTION)
+            cursor.execute(f"UPDATE lead_staging s SET reject = CASE {' '.join(branches)} END")
+
+        casts = ', '.join(f's."{col}"::{meta[col][0]}' for col in columns)
+        cursor.execute(f"""
+            WITH inserted AS (
+                INSERT INTO lead (lead_id, {column_list})
+                SELECT s.lead_id, {casts}
+                FROM lead_staging s
+                WHERE s.reject IS NULL
+                ORDER BY s.row_index
+                ON CONFLICT DO NOTHING
+                RETURNING lead_id
+            )
+            SELECT s.row_index, s.reject, i.lead_id
+            FROM lead_staging s
+            LEFT JOIN inserted i ON i.lead_id = s.lead_id
+            ORDER BY s.row_index
+        """)
+
+        inserted, rejected = {}, {}
+        for row_index, reject, lead_id in cursor.fetchall():
+            if lead_id is not None:
+                inserted[row_index] = lead_id
+            else:
+                # Rows skipped by ON CONFLICT hit a unique constraint the checks above don't cover
+                rejected[row_index] = tuple(reject) if reject else (REJECT_CONFLICT, 'conflicts with an existing lead')
+        return inserted, rejected
+    finally:
+        cursor.close()
@@ -10,6 +10,35 @@ export const useDemo = () => {
   return context;
 };
 
+const JOB_POLL_INTERVAL_MS = 2000;
+// Jobs live in the worker process that started them; with several gunicorn
+// workers a poll can land on another worker and get a 404, so keep retrying
+const JOB_NOT_FOUND_GRACE_MS = 120000;
+
+const waitForJob = async (jobId) => {
+  let notFoundSince = null;
+  for (;;) {
+    const response = await fetch(`/api/jobs/${jobId}`);
+    if (response.status === 404) {
+      notFoundSince = notFoundSince ?? Date.now();
+      if (Date.now() - notFoundSince > JOB_NOT_FOUND_GRACE_MS) {
+        throw new Error('Lost track of demo initialization job');
+      }
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+      continue;
+    }
+    if (!response.ok) {
+      throw new Error('Lost track of demo initialization job');
+    }
+    notFoundSince = null;
+    const job = await response.json();
+    if (job.status === 'succeeded' || job.status === 'failed') {
+      return job.result || { status: 'error', message: job.error };
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+};
+
 export const DemoProvider = ({ children }) => {
   const [isLoading, setIsLoading] = useState(false);
 
@@ -28,7 +57,12 @@ export const DemoProvider = ({ children }) => {
         throw new Error('Failed to initialize demo environment');
       }
 
-      const result = await response.json();
+      let result = await response.json();
+
+      // Demo data is generated by a background job (202 + job_id); wait for it
+      if (response.status === 202 && result.job_id) {
+        result = await waitForJob(result.job_id);
+      }
       
       if (result.status === 'success') {
         // Set demo mode but DON'T set user - let UserContext handle that
@@ -0,0 +1,17 @@
+"""
+Gunicorn hooks, picked up automatically from the project root.
+
+The default start command (`gunicorn run:app`) is unchanged. To build the
+app once in the master and fork ready workers, use the factory instead:
+
+    gunicorn "api.app:create_app()" --preload --bind 0.0.0.0:$PORT
+
+Importing the app opens no database connections; post_fork still drops any
+pooled connection the master opened so workers never share a socket.
+(The log listener thread restarts itself in each worker via os.register_at_fork.)
+"""
+
+
+def post_fork(server, worker):
+    from db.db_config import dispose_engines
+    dispose_engines()
@@ -7,84 +7,85 @@ sys.path.append(project_root)
 import requests
 from etl.extract import get_sheet, extract_sheet, update_sheet_status
 from db.db_config import engine
+from sqlalchemy import bindparam, text
 import pandas as pd
 import time
-import json
 
-def validate_request_data(data):
-    """Validate request data before sending to API"""
-    print("\nValidating request data:")
-    print(f"customer_uid: {data['customer_uid']} (type: {type(data['customer_uid'])})")
-    print(f"type: {data['type']} (type: {type(data['type'])})")
-    print(f"name: {data['name']} (type: {type(data['name'])})")
-    print(f"country: {data['country']} (type: {type(data['country'])})")
-    print(f"is_closed: {data['is_closed']} (type: {type(data['is_closed'])})")
-    return True
+API_URL = os.getenv('LEADFI_API_URL', 'http://127.0.0.1:5000')
+BATCH_SIZE = 500
 
-def convert_lead(lead_id, request_data):
-    """Convert a single lead to customer"""
-    url = f"http://127.0.0.1:5000/api/leads/{lead_id}"  # Changed from localhost to 127.0.0.1
-    headers = {
-        'Content-Type': 'application/json',
-        'Accept': 'application/json'
-    }
-    
-    # First, try a simple GET request to check if API is accessible
-    try:
-        test_response = requests.get("http://localhost:5000/api/leads")
-        print(f"API test response: {test_response.status_code}")
-    except Exception as e:
-        print(f"API not accessible: {str(e)}")
-        return False, {'message': 'API not accessible'}
-    
-    print(f"\nSending request to: {url}")
-    print(f"Request headers: {json.dumps(headers, indent=2)}")
-    print(f"Request data: {json.dumps(request_data, indent=2)}")
-    
-    try:
-        response = requests.post(url, json=request_data, headers=headers)
-        print(f"Response status: {response.status_code}")
-        print(f"Response headers: {json.dumps(dict(response.headers), indent=2)}")
-        
-        if response.status_code == 403:
-            print("Access forbidden - checking for validation errors")
+def converted_lead_ids(lead_ids):
+    """Return the subset of lead_ids that are already converted in the database."""
+    lead_ids = list(lead_ids)
+    if not lead_ids:
+        return set()
+    query = text("SELECT lead_id FROM lead WHERE is_converted = TRUE AND lead_id IN :ids")
+    with engine.connect() as conn:
+        rows = conn.execute(query.bindparams(bindparam('ids', expanding=True)), {'ids': lead_ids})
+        return {row.lead_id for row in rows}
+
+def convert_leads_batch(conversions, max_retries=3):
+    """
+    Convert leads to customers with the batch endpoint (one request per BATCH_SIZE leads).
+    Returns {lead_id: result} from the per-item results.
+
+    Only connection errors are retried. After a timeout or any other failure,
+    and for items a retried request reports as failed, the server may already
+    have committed the conversion, so those leads are re-checked in the
+    database and the ones found converted are reported as converted.
+    """
+    url = f"{API_URL}/api/leads/batch/convert"
+    results = {}
+
+    for start in range(0, len(conversions), BATCH_SIZE):
+        chunk = conversions[start:start + BATCH_SIZE]
+        response = None
+        for attempt in range(max_retries):
             try:
-                response_data = response.json()
-                print(f"Response body: {json.dumps(response_data, indent=2)}")
-            except:
-                print("No JSON response - checking request data")
-                print(f"Request data validation:")
-                for key, value in request_data.items():
-                    print(f"{key}: {value} (type: {type(value)})")
-            return False, {'message': 'Access forbidden - check validation'}
-        
+                response = requests.post(url, json={'conversions': chunk}, timeout=120)
+                break
+            except requests.ConnectionError as e:
+                # ConnectTimeout is a ConnectionError; ReadTimeout is not and falls through below
+                print(f"Connection error (attempt {attempt + 1} of {max_retries}): {str(e)}")
+                error = e
+                if attempt < max_retries - 1:
+                    time.sleep(2)
+            except requests.RequestException as e:
+                print(f"Request error, checking which leads were converted: {str(e)}")
+                error = e
+                break
+
+        if response is None:
+            converted = converted_lead_ids(item['lead_id'] for item in chunk)
+            for item in chunk:
+                if item['lead_id'] in converted:
+                    results[item['lead_id']] = {'status': 'converted', 'lead_id': item['lead_id']}
+                else:
+                    results[item['lead_id']] = {'status': 'error', 'errors': {'_schema': [str(error)]}}
+            continue
         try:
             response_data = response.json()
-            print(f"Response body: {json.dumps(response_data, indent=2)}")
-        except:
-            print(f"Raw response text: {response.text}")
+        except ValueError:
             response_data = {}
-        
-        return response.status_code == 200, response_data
-        
-    except Exception as e:
-        print(f"Request error: {str(e)}")
-        return False, {'message': str(e)}
+        if 'results' not in response_data:
+            print(f"Batch failed with status {response.status_code}: {response.text[:500]}")
+            for item in chunk:
+                results[item['lead_id']] = {'status': 'error', 'errors': response_data or response.text}
+            continue
 
-def convert_lead_with_retry(lead_id, request_data, max_retries=3):
-    """Convert a lead with retry mechanism"""
-    for attempt in range(max_retries):
-        print(f"\nAttempt {attempt + 1} of {max_retries}")
-        success, response_data = convert_lead(lead_id, request_data)
-        
-        if success:
-            return True, response_data
-            
-        if attempt < max_retries - 1:
-            print(f"Retrying in 2 seconds...")
-            time.sleep(2)
-    
-    return False, response_data
+        print(f"Batch of {len(chunk)}: {response_data['succeeded']} converted, {response_data['failed']} failed")
+        # A connection dropped after sending may have converted leads the retry now reports as failed
+        retried = attempt > 0
+        converted = converted_lead_ids(
+            item['lead_id'] for item, result in zip(chunk, response_data['results'])
+            if result['status'] == 'error'
+        ) if retried else set()
+        for item, result in zip(chunk, response_data['results']):
+            if item['lead_id'] in converted:
+                result = {'status': 'converted', 'lead_id': item['lead_id']}
+            results[item['lead_id']] = result
+
+    return results
 
 def batch_convert_leads():
     print("Starting batch conversion of leads")
@@ -119,23 +120,16 @@ def batch_convert_leads():
         print("Normalized sheet columns:", sheet_data.columns.tolist())
         
         sheet = get_sheet("Leads")
-        successful_indices = []
-        failed_indices = []
         
+        conversions = []
+        sheet_indices = {}   # lead_id -> matching sheet row index
+
         for _, row in db_leads.iterrows():
-            sheet_row = None
             try:
-                print(f"\n{'='*50}")
-                print(f"Processing lead: {row['company_name']}")
-                
                 # Clean and normalize email and telegram values
                 db_email = str(row['email']).strip().lower() if pd.notna(row['email']) else ''
                 db_telegram = str(row['telegram']).strip().lower() if pd.notna(row['telegram']) else ''
                 
-                print(f"DB Email: {db_email}")
-                print(f"DB Telegram: {db_telegram}")
-                print(f"Lead Id: {row['lead_id']}")
-                
                 # Find matching row in sheet
                 sheet_row = sheet_data[
                     (
@@ -153,45 +147,38 @@ def batch_convert_leads():
                 # Verify we have the correct row
                 if sheet_row['email'].iloc[0].lower() != db_email and sheet_row['telegram'].iloc[0].lower() != db_telegram:
                     print(f"Warning: Sheet row mismatch for {row['company_name']}")
-                    print(f"Expected email: {db_email}, Found: {sheet_row['email'].iloc[0]}")
-                    print(f"Expected telegram: {db_telegram}, Found: {sheet_row['telegram'].iloc[0]}")
-                    continue
-                
-                print(f"Found matching sheet row: {sheet_row.to_dict('records')[0]}")
-                
-                # Prepare request data
-                request_data = {
-                    "customer_uid": int(sheet_row['customer_uid'].iloc[0]),
-                    "type": row['type'].lower() if pd.notna(row['type']) else None,  # Normalize type
-                    "name": row['company_name'],
-                    "country": None if pd.isna(row['country']) or row['country'] == "" else row['country'],
-                    "is_closed": False
-                }
-                
-                # Validate request data
-                if not validate_request_data(request_data):
-                    print(f"Validation failed for {row['company_name']}")
-                    failed_indices.append(sheet_row.index[0])
                     continue
                 
-                # Convert lead with retry
-                success, response_data = convert_lead_with_retry(row['lead_id'], request_data)
-                
-                if success:
-                    successful_indices.append(sheet_row.index[0])
-                    print(f"Successfully converted: {row['company_name']}")
-                else:
-                    failed_indices.append(sheet_row.index[0])
-                    error_message = response_data.get('message', 'Unknown error')
-                    print(f"Failed to convert: {row['company_name']}")
-                    print(f"Error: {error_message}")
-                
-                time.sleep(1)  # Avoid API rate limits
+                lead_id = int(row['lead_id'])
+                sheet_indices[lead_id] = sheet_row.index[0]
+                conversions.append({
+                    "lead_id": lead_id,
+                    "customer": {
+                        "customer_uid": int(sheet_row['customer_uid'].iloc[0]),
+                        "type": row['type'].lower() if pd.notna(row['type']) else None,  # Normalize type
+                        "name": row['company_name'],
+                        "country": None if pd.isna(row['country']) or row['country'] == "" else row['country'],
+                        "is_closed": False
+                    }
+                })
                 
             except Exception as e:
-                print(f"Error processing {row['company_name']}: {str(e)}")
-                if sheet_row is not None and not sheet_row.empty:
-                    failed_indices.append(sheet_row.index[0])
+                print(f"Error preparing {row['company_name']}: {str(e)}")
+
+        print(f"Converting {len(conversions)} matched leads")
+        results = convert_leads_batch(conversions)
+
+        successful_indices = []
+        failed_indices = []
+        for lead_id, result in results.items():
+            if result['status'] == 'converted':
+                successful_indices.append(sheet_indices[lead_id])
+            elif result['status'] == 'locked':
+                # Another run holds the lead; leave the row PENDING for the next run
+                print(f"Lead {lead_id} is being converted elsewhere, leaving it pending")
+            else:
+                failed_indices.append(sheet_indices[lead_id])
+                print(f"Failed to convert lead {lead_id}: {result.get('errors')}")
         
         # 3. Update sheet status
         if successful_indices:
@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+"""
+API Load Test and Benchmark Suite for LeadFi
+
+Seeds a dedicated database at production scale with a deterministic
+generator, drives the main read endpoints with concurrent clients, and
+records throughput and latency percentiles per endpoint to JSON. Results
+can be compared against a stored baseline so regressions fail the run.
+
+Usage:
+    python scripts/benchmark_api.py seed --scale medium
+    python scripts/benchmark_api.py run --requests 200 --concurrency 8
+    python scripts/benchmark_api.py run --baseline benchmark_baseline.json
+    python scripts/benchmark_api.py run --save-baseline
+    python scripts/benchmark_api.py compare benchmark_results.json benchmark_baseline.json
+
+Scales (leads / activities / years of trading volume for N traders):
+    small   10k / 50k / 1 year, 200 traders
+    medium  100k / 1.2M / 3 years, 500 traders
+    large   1M / 3M / 5 years, 1000 traders
+
+Options common to seed and run:
+    --database-url   defaults to $BENCHMARK_DATABASE_URL, else
+                     postgresql://localhost/leadfi_benchmark (never the application
+                     database); pass sqlite:///benchmark.db to opt into SQLite
+    --seed           RNG seed; the same seed and scale always produce the same rows
+
+`seed` generates activities and trading volume column-wise with NumPy
+(scripts/synthetic_data.py) and loads them with COPY on Postgres, into the
+schema from db/init.sql; with --parquet DIR it writes one Parquet file per
+table instead.
+
+`run` drives the app in-process through the Flask test client by default;
+pass --url http://host:port to load a running server over HTTP instead.
+Scenarios whose SQL only runs on Postgres are skipped on other databases,
+and a 200 response with an {"error": ...} body counts as an error.
+When --baseline names a file that does not exist yet, the run is saved there
+as the new baseline instead of being compared.
+Exit status is 1 when a baseline comparison finds a regression, 2 when
+`compare` is given a results or baseline file that does not exist.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+# Benchmarks measure the request path, not log output
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import synthetic_data
+from synthetic_data import copy_buffer, copy_statement, write_parquet
+
+DEFAULT_RESULTS = project_root / 'benchmark_results.json'
+DEFAULT_BASELINE = project_root / 'benchmark_baseline.json'
+# Results are only comparable with production on Postgres; SQLite is an explicit opt-in
+DEFAULT_DATABASE_URL = 'postgresql://localhost/leadfi_benchmark'
+
+SCALES = {
+    'small': {'leads': 10_000, 'activities': 50_000, 'conversion_rate': 0.10, 'traders': 200, 'years': 1},
+    'medium': {'leads': 100_000, 'activities': 1_200_000, 'conversion_rate': 0.10, 'traders': 500, 'years': 3},
+    'large': {'leads': 1_000_000, 'activities': 3_000_000, 'conversion_rate': 0.05, 'traders': 1000, 'years': 5},
+}
+
+# Fixed so that a seed reproduces the same dates on any day
+ANCHOR_DATE = date(2025, 6, 30)
+CHUNK_SIZE = 10_000
+CUSTOMER_UID_BASE = 100_000
+SEEDED_TABLES = ['trading_volume_fact', 'activity', 'contact', 'customer', 'lead']
+# Per-row triggers on Postgres that would add a second lead_created/customer_created activity
+ACTIVITY_TRIGGERS = [('lead', 'lead_activity_tracker'), ('customer', 'customer_activity_tracker')]
+
+BD_TEAM = ['Alex Chen', 'Sarah Johnson', 'Michael Rodriguez', 'Emma Thompson',
+           'David Kim', 'Lisa Wang', 'James Miller', 'Anna Petrov']
+COUNTRIES = ['United States', 'Singapore', 'United Kingdom', 'Hong Kong', 'Canada',
+             'Australia', 'Germany', 'Switzerland', 'Japan', 'South Korea']
+SOURCES = ['company', 'apollo', 'linkedin', 'hubspot', 'event', 'research', 'referral']
+STATUSES = ['1. lead generated', '2. proposal', '3. negotiation', '4. registration',
+            '5. integration', '6. closed won', '7. lost']
+LEAD_TYPES = ['liquidity provider', 'vip', 'institution', 'api', 'broker', 'otc',
+              'project mm', 'asset manager', 'venture capital', 'prop trader', 'hft']
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda',
+               'William', 'Elizabeth', 'David', 'Barbara', 'Alex', 'Emma', 'Chris', 'Anna']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Wilson', 'Anderson', 'Taylor', 'Moore', 'Lee', 'Walker', 'King', 'Nguyen']
+COMPANY_WORDS = ['Quantum', 'Alpha', 'Nexus', 'Prime', 'Velocity', 'Apex', 'Delta', 'Summit',
+                 'Golden', 'Platinum', 'Metro', 'Global', 'Stream', 'Bridge', 'Pinnacle', 'Crown']
+COMPANY_SUFFIXES = ['Capital', 'Trading', 'Markets', 'Holdings', 'Partners', 'Fund', 'Group']
+
+# (name, path template); {lead_id}, {customer_uid}, {search}, {start}, {end} are filled per request
+SCENARIOS = [
+    ('leads_list', '/api/leads?per_page=50'),
+    ('leads_search', '/api/leads?search={search}&per_page=20'),
+    ('lead_detail', '/api/leads/{lead_id}'),
+    ('customers_list', '/api/customers?per_page=50'),
+    ('activities_list', '/api/activities?per_page=50'),
+    ('activity_timeline', '/api/activities/timeline?lead_id={lead_id}'),
+    ('activity_stats', '/api/activities/stats'),
+    ('conversion_rate', '/api/analytics/monthly-lead-conversion-rate'),
+    ('activity_analytics', '/api/analytics/activity-analytics'),
+    ('lead_funnel', '/api/analytics/lead-funnel'),
+    ('trading_summary', '/api/trading-summary?start_date={start}&end_date={end}'),
+    ('trading_time_series', '/api/trading-volume-time-series?start_date={start}&end_date={end}'),
+    ('top_customers', '/api/analytics/trading-volume-top-customers?start_date={start}&end_date={end}'),
+]
+
+# Scenarios backed by Postgres-only SQL (DATE_TRUNC, GROUPING SETS, generate_series)
+POSTGRES_ONLY_SCENARIOS = {'conversion_rate', 'activity_analytics', 'trading_time_series'}
+
+
+def get_database_url(args):
+    return args.database_url or os.getenv('BENCHMARK_DATABASE_URL') or DEFAULT_DATABASE_URL
+
+
+def make_app(database_url):
+    from api.app import create_app
+    return create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+
+
+# ---------------------------------------------------------------------------
+# Deterministic data generation
+# ---------------------------------------------------------------------------
+
+def _random_datetime(rng, start, days):
+    return datetime.combine(start, datetime.min.time()) + timedelta(seconds=rng.randrange(days * 86400))
+
+
+def generate_leads(rng, config, start):
+    """Lead rows with explicit ids 1..N, yielded in chunks"""
+    days = (ANCHOR_DATE - start).days
+    converted_every = max(1, round(1 / config['conversion_rate']))
+    chunk = []
+    for lead_id in range(1, config['leads'] + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        company = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+        converted = lead_id % converted_every == 0
+        chunk.append({
+            'lead_id': lead_id,
+            'full_name': f"{first} {last}",
+            'title': rng.choice(['CEO', 'CTO', 'Head of Trading', 'Portfolio Manager', None]),
+            'email': f"{first}.{last}{lead_id}@{company.split()[0]}.com".lower(),
+            'telegram': None,
+            'phone_number': None,
+            'source': rng.choice(SOURCES),
+            'status': '6. closed won' if converted else rng.choice(STATUSES),
+            'date_created': _random_datetime(rng, start, days),
+            'linkedin_url': None,
+            'company_name': company,
+            'country': rng.choice(COUNTRIES),
+            'bd_in_charge': rng.choice(BD_TEAM),
+            'background': None,
+            'is_converted': converted,
+            'type': rng.choice(LEAD_TYPES),
+        })
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _parquet_sink(directory):
+    """Write each table to <directory>/<table>.parquet instead of a database"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    def load(name, tables):
+        return write_parquet(tables, directory / f"{name}.parquet")
+
+    return load, lambda: None, f"Parquet files in {directory}", False
+
+
+def _apply_schema(engine):
+    """Recreate the production schema (tables, triggers, indexes) from db/init.sql"""
+    raw = engine.raw_connection()
+    try:
+        # Raw DB-API cursor: init.sql holds % and : that driver paramstyles would parse
+        raw.cursor().execute((project_root / 'db' / 'init.sql').read_text())
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def _database_sink(database_url):
+    """
+    Reset the benchmark database and return a loader for it.
+
+    On Postgres the schema comes from db/init.sql, which includes every
+    migration, so triggers and indexes match production; trading volume is
+    loaded into daily_trading_volume and the fact-sync trigger derives
+    trading_volume_fact. Elsewhere (SQLite) the ORM tables are created and
+    trading_volume_fact is loaded directly.
+    """
+    from sqlalchemy import insert, text
+    from db.db_config import db
+
+    app = make_app(database_url)
+    context = app.app_context()
+    context.push()
+    engine = db.engine
+    postgres = engine.dialect.name == 'postgresql'
+    tables = {table.name: table for table in db.metadata.sorted_tables}
+
+    if postgres:
+        _apply_schema(engine)
+        with engine.begin() as conn:
+            # The generated activities already hold each lead's lead_created row
+            for table, trigger in ACTIVITY_TRIGGERS:
+                conn.execute(text(f'ALTER TABLE "{table}" DISABLE TRIGGER {trigger}'))
+    else:
+        db.create_all()
+        with engine.begin() as conn:
+            for name in reversed(SEEDED_TABLES):
+                conn.execute(tables[name].delete())
+
+    def load(name, chunks):
+        total = 0
+        for chunk in chunks:
+            if postgres:
+                raw = engine.raw_connection()
+                try:
+                    raw.cursor().copy_expert(copy_statement(name, chunk), copy_buffer(chunk))
+                    raw.commit()
+                finally:
+                    raw.close()
+            else:
+                chunk = chunk.select([column for column in chunk.column_names if column in tables[name].c])
+                if 'activity_metadata' in chunk.column_names:
+                    # jsonb on Postgres, but plain text here, which the activity schema can't load as a dict
+                    chunk = chunk.drop(['activity_metadata'])
+                with engine.begin() as conn:
+                    conn.execute(insert(tables[name]), chunk.to_pylist())
+            total += chunk.num_rows
+        return total
+
+    def finish():
+        if postgres:
+            # Explicit ids were inserted; move the sequences past them
+            with engine.begin() as conn:
+                for table, trigger in ACTIVITY_TRIGGERS:
+                    conn.execute(text(f'ALTER TABLE "{table}" ENABLE TRIGGER {trigger}'))
+                for table, column in (('lead', 'lead_id'), ('contact', 'contact_id'), ('activity', 'activity_id')):
+                    conn.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('\"{table}\"', '{column}'), "
+                        f"COALESCE((SELECT MAX({column}) FROM \"{table}\"), 1))"
+                    ))
+                facts = conn.execute(text("SELECT COUNT(*) FROM trading_volume_fact")).scalar()
+                print(f"  trading_volume_fact: {facts:,} rows derived by trigger")
+                conn.execute(text("ANALYZE"))
+        context.pop()
+
+    return load, finish, engine.url.render_as_string(), postgres
+
+
+def seed(args):
+    """Replace the benchmark data set (database, or Parquet files with --parquet)"""
+    config = SCALES[args.scale]
+    rng = random.Random(args.seed)
+    np_rng = np.random.default_rng(args.seed)
+    start = ANCHOR_DATE - timedelta(days=365 * config['years'])
+    started = time.perf_counter()
+
+    if args.parquet:
+        load, finish, target, fact_by_trigger = _parquet_sink(args.parquet)
+    else:
+        load, finish, target, fact_by_trigger = _database_sink(get_database_url(args))
+    print(f"🌱 Seeding '{args.scale}' data set (seed {args.seed}) into {target}")
+
+    counts = {}
+
+    def write(name, tables):
+        table_started = time.perf_counter()
+        counts[name] = load(name, tables)
+        print(f"  {name}: {counts[name]:,} rows in {time.perf_counter() - table_started:.1f}s")
+
+    lead_dates, lead_bds, converted = [], [], []
+
+    def lead_tables():
+        for chunk in generate_leads(rng, config, start):
+            for row in chunk:
+                lead_dates.append(row['date_created'])
+                lead_bds.append(row['bd_in_charge'])
+                if row['is_converted']:
+                    converted.append((row['lead_id'], row['full_name'], row['bd_in_charge'], row['date_created']))
+            yield pa.Table.from_pylist(chunk)
+
+    write('lead', lead_tables())
+
+    customers = [
+        {'customer_uid': CUSTOMER_UID_BASE + index, 'name': name,
+         'registered_email': f"customer{index}@example.com", 'type': rng.choice(LEAD_TYPES),
+         'country': rng.choice(COUNTRIES), 'is_closed': False, 'date_closed': None,
+         'bd_in_charge': bd, 'date_created': created}
+        for index, (_, name, bd, created) in enumerate(converted)
+    ]
+    write('customer', [pa.Table.from_pylist(customers[i:i + CHUNK_SIZE])
+                       for i in range(0, len(customers), CHUNK_SIZE)])
+    contacts = [
+        {'customer_uid': CUSTOMER_UID_BASE + index, 'lead_id': lead_id,
+         'is_primary_contact': True, 'date_added': created}
+        for index, (lead_id, _, _, created) in enumerate(converted)
+    ]
+    write('contact', [pa.Table.from_pylist(contacts[i:i + CHUNK_SIZE])
+                      for i in range(0, len(contacts), CHUNK_SIZE)])
+
+    mean_extra = max(0.0, config['activities'] / config['leads'] - 1)
+    write('activity', synthetic_data.activities(
+        np_rng, np.arange(1, config['leads'] + 1), lead_dates, lead_bds,
+        end=datetime.combine(ANCHOR_DATE, datetime.min.time()), mean_extra=mean_extra))
+
+    traders = converted[:config['traders']]
+    trader_uids = [CUSTOMER_UID_BASE + index for index in range(len(traders))]
+    trader_names = [name for _, name, _, _ in traders]
+    trader_bds = [bd for _, _, bd, _ in traders]
+    daily = synthetic_data.daily_trading_volume(np_rng, trader_uids, start, ANCHOR_DATE,
+                                                trading_rate=0.65, volume_median=60_000.0)
+    if fact_by_trigger:
+        write('daily_trading_volume', daily)
+    else:
+        write('trading_volume_fact', (
+            synthetic_data.trading_volume_fact(wide, trader_uids, trader_names, trader_bds) for wide in daily
+        ))
+
+    finish()
+    elapsed = time.perf_counter() - started
+    print(f"✅ Seeded {sum(counts.values()):,} rows in {elapsed:.1f}s")
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def summarize(latencies, errors, wall_seconds):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        'latency_ms': {
+            'mean': round(statistics.fmean(ordered), 2) if ordered else 0.0,
+            'p50': round(percentile(ordered, 0.50), 2),
+            'p90': round(percentile(ordered, 0.90), 2),
+            'p95': round(percentile(ordered, 0.95), 2),
+            'p99': round(percentile(ordered, 0.99), 2),
+            'max': round(ordered[-1], 2) if ordered else 0.0,
+        }
+    }
+
+
+class _Client:
+    """Per-thread client: Flask test client in-process, or an HTTP session"""
+
+    def __init__(self, app=None, base_url=None):
+        if base_url:
+            import requests
+            self._session = requests.Session()
+            self._get = lambda path: self._session.get(base_url.rstrip('/') + path, timeout=60)
+        else:
+            self._get = app.test_client().get
+
+    def get(self, path):
+        """Return the response; the body is read but not parsed"""
+        return self._get(path)
+
+
+def is_error(response):
+    """
+    A 4xx/5xx, or a 200 whose JSON body is {'error': ...}: several services
+    catch their exceptions and return the error as the result.
+    """
+    if response.status_code >= 400:
+        return True
+    try:
+        body = response.get_json(silent=True) if hasattr(response, 'get_json') else response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and 'error' in body
+
+
+def run_scenario(path_for, total, concurrency, app, base_url, warmup, cold):
+    """Issue total GETs from concurrency threads; returns latencies (ms), error count, wall time"""
+    local = threading.local()
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = _Client(app, base_url)
+        return local.client
+
+    def one(index, record=True):
+        path = path_for(index)
+        if cold:
+            from api.utils.cache import clear_caches
+            clear_caches()
+        started = time.perf_counter()
+        try:
+            response = client().get(path)
+        except Exception:
+            response = None
+        elapsed = (time.perf_counter() - started) * 1000
+        if record:
+            # Parsed after the clock stops, so checking the body doesn't skew latency
+            failed = response is None or is_error(response)
+            with lock:
+                latencies.append(elapsed)
+                if failed:
+                    errors[0] += 1
+
+    for index in range(warmup):
+        one(-1 - index, record=False)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def run(args):
+    """Drive every scenario and write the results JSON"""
+    from sqlalchemy import func, select
+    from sqlalchemy.engine import make_url
+    # Checked before the load run, so a fresh checkout records its first baseline
+    if args.baseline and not args.save_baseline and not Path(args.baseline).exists():
+        print(f"ℹ️ No baseline at {args.baseline} yet; this run will be saved as the baseline")
+        args.save_baseline = True
+    database_url = get_database_url(args)
+    app = None if args.url else make_app(database_url)
+
+    max_lead_id, date_range = 1, (ANCHOR_DATE - timedelta(days=90), ANCHOR_DATE)
+    if app is not None:
+        from db.db_config import db
+        from api.models.lead import Lead
+        with app.app_context():
+            max_lead_id = db.session.scalar(select(func.max(Lead.lead_id))) or 1
+    else:
+        max_lead_id = args.max_lead_id
+
+    scenarios = [s for s in SCENARIOS if not args.only or s[0] in args.only]
+    skipped = []
+    if app is not None and make_url(database_url).get_backend_name() != 'postgresql':
+        skipped = [name for name, _ in scenarios if name in POSTGRES_ONLY_SCENARIOS]
+        scenarios = [s for s in scenarios if s[0] not in POSTGRES_ONLY_SCENARIOS]
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'target': args.url or 'flask-test-client',
+            'database': 'external' if args.url else database_url.split('://')[0],
+            'requests_per_scenario': args.requests,
+            'concurrency': args.concurrency,
+            'warmup': args.warmup,
+            'cold_cache': args.cold,
+            'seed': args.seed,
+            'max_lead_id': max_lead_id,
+            'skipped_scenarios': skipped,
+            'python': platform.python_version(),
+        },
+        'scenarios': {}
+    }
+
+    print(f"🚀 {len(scenarios)} scenarios x {args.requests} requests, concurrency {args.concurrency}")
+    if skipped:
+        print(f"⏭️  Skipping Postgres-only scenarios on {make_url(database_url).get_backend_name()}: "
+              f"{', '.join(skipped)}")
+    for name, template in scenarios:
+        rng = random.Random(f"{args.seed}:{name}")
+        params = [
+            {'lead_id': rng.randint(1, max_lead_id), 'search': rng.choice(LAST_NAMES),
+             'start': date_range[0].isoformat(), 'end': date_range[1].isoformat()}
+            for _ in range(args.requests + args.warmup)
+        ]
+        path_for = lambda index, params=params, template=template: template.format(**params[index])
+        latencies, errors, wall = run_scenario(path_for, args.requests, args.concurrency, app,
+                                               args.url, args.warmup, args.cold)
+        summary = summarize(latencies, errors, wall)
+        results['scenarios'][name] = summary
+        latency = summary['latency_ms']
+        print(f"  {name:22} {summary['throughput_rps']:8.1f} req/s  p50 {latency['p50']:8.1f}ms  "
+              f"p95 {latency['p95']:8.1f}ms  p99 {latency['p99']:8.1f}ms  errors {errors}")
+
+    output = Path(args.output)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"📄 Results written to {output}")
+
+    if args.save_baseline:
+        Path(args.baseline or DEFAULT_BASELINE).write_text(json.dumps(results, indent=2))
+        print(f"📌 Baseline saved to {args.baseline or DEFAULT_BASELINE}")
+        return 0
+    if args.baseline:
+        return 1 if compare(results, json.loads(Path(args.baseline).read_text()),
+                            args.tolerance, args.min_delta_ms) else 0
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+
+def compare(results, baseline, tolerance=0.2, min_delta_ms=5.0):
+    """
+    Print a per-scenario comparison and return the regressions: p95 latency
+    more than tolerance (and min_delta_ms) above the baseline, throughput more
+    than tolerance below it, or new errors.
+    """
+    regressions = []
+    print(f"\n📊 Compared with baseline from {baseline.get('meta', {}).get('timestamp', 'unknown')}"
+          f" (tolerance {tolerance:.0%})")
+    for name, current in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            print(f"  {name:22} (no baseline)")
+            continue
+        p95, base_p95 = current['latency_ms']['p95'], base['latency_ms']['p95']
+        rps, base_rps = current['throughput_rps'], base['throughput_rps']
+        problems = []
+        if p95 > base_p95 * (1 + tolerance) and p95 - base_p95 > min_delta_ms:
+            problems.append(f"p95 {base_p95:.1f} -> {p95:.1f}ms")
+        if base_rps and rps < base_rps * (1 - tolerance):
+            problems.append(f"throughput {base_rps:.1f} -> {rps:.1f} req/s")
+        if current['errors'] > base['errors']:
+            problems.append(f"errors {base['errors']} -> {current['errors']}")
+        status = '❌ ' + ', '.join(problems) if problems else '✅'
+        print(f"  {name:22} p95 {base_p95:8.1f} -> {p95:8.1f}ms   {status}")
+        if problems:
+            regressions.append({'scenario': name, 'problems': problems})
+
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} scenario(s) regressed")
+    else:
+        print("\n🎉 No regressions")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LeadFi API load test and benchmark suite')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def common(command):
+        command.add_argument('--database-url', help=f'benchmark database (default: $BENCHMARK_DATABASE_URL or {DEFAULT_DATABASE_URL})')
+        command.add_argument('--seed', type=int, default=42, help='RNG seed (default 42)')
+
+    seed_parser = sub.add_parser('seed', help='generate the deterministic data set')
+    common(seed_parser)
+    seed_parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    seed_parser.add_argument('--parquet', metavar='DIR', help='write Parquet files to DIR instead of the database')
+
+    run_parser = sub.add_parser('run', help='load the main endpoints and record percentiles')
+    common(run_parser)
+    run_parser.add_argument('--url', help='load a running server over HTTP instead of the test client')
+    run_parser.add_argument('--max-lead-id', type=int, default=1000, help='lead id range for --url runs')
+    run_parser.add_argument('--requests', type=int, default=200, help='measured requests per scenario')
+    run_parser.add_argument('--concurrency', type=int, default=4)
+    run_parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per scenario')
+    run_parser.add_argument('--cold', action='store_true', help='clear in-process caches before every request')
+    run_parser.add_argument('--only', nargs='+', metavar='SCENARIO', help='run only these scenarios')
+    run_parser.add_argument('--output', default=str(DEFAULT_RESULTS))
+    run_parser.add_argument('--baseline', help='compare with this results file (exit 1 on regression)')
+    run_parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    run_parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown (default 0.2)')
+    run_parser.add_argument('--min-delta-ms', type=float, default=5.0, help='ignore p95 increases below this')
+
+    compare_parser = sub.add_parser('compare', help='compare two results files')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('baseline', nargs='?', default=str(DEFAULT_BASELINE))
+    compare_parser.add_argument('--tolerance', type=float, default=0.2)
+    compare_parser.add_argument('--min-delta-ms', type=float, default=5.0)
+
+    args = parser.parse_args()
+    if args.command == 'seed':
+        seed(args)
+        sys.exit(0)
+    if args.command == 'run':
+        sys.exit(run(args))
+    for path in (args.results, args.baseline):
+        if not Path(path).exists():
+            print(f"❌ {path} not found (record a baseline with: run --save-baseline)")
+            sys.exit(2)
+    regressions = compare(json.loads(Path(args.results).read_text()),
+                          json.loads(Path(args.baseline).read_text()),
+                          args.tolerance, args.min_delta_ms)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
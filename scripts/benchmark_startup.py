@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Startup time benchmark for the LeadFi API
+
+Each run starts a fresh Python interpreter and measures:
+- import:        `import api.app` (should do no I/O and build nothing)
+- create_app:    the application factory
+- first_request: the first GET /api/health through the test client
+- first_db_request: the first GET that touches the database (/api/leads)
+
+plus how many database engines exist right after the import (expected: 0).
+
+Medians over all runs are printed as JSON, so before/after numbers for an
+import or factory change can be compared directly.
+
+Usage:
+    python scripts/benchmark_startup.py [--runs 5] [--path /api/leads?per_page=1]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter; prints one JSON object of timings in ms
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import api.app
+imported = time.perf_counter()
+from db.db_config import _engines
+engines_after_import = len(_engines)
+app = api.app.create_app()
+created = time.perf_counter()
+client = app.test_client()
+health = client.get('/api/health')
+first = time.perf_counter()
+db_response = client.get(sys.argv[1])
+first_db = time.perf_counter()
+print(json.dumps({
+    'import': (imported - started) * 1000,
+    'create_app': (created - imported) * 1000,
+    'first_request': (first - created) * 1000,
+    'first_db_request': (first_db - first) * 1000,
+    'total': (first_db - started) * 1000,
+    'statuses': [health.status_code, db_response.status_code],
+    'engines_after_import': engines_after_import,
+}))
+'''
+
+
+def run_once(path):
+    """Run the probe in a fresh interpreter and return its timings"""
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, path],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, 'LOG_LEVEL': os.getenv('LOG_LEVEL', 'WARNING')}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Probe failed:\n{result.stderr}")
+    # Logging may share stdout; the timings are the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure API import and first-request latency')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreter runs (default 5)')
+    parser.add_argument('--path', default='/api/leads?per_page=1',
+                        help='database-backed path for the first DB request')
+    args = parser.parse_args()
+
+    runs = [run_once(args.path) for _ in range(args.runs)]
+    phases = ['import', 'create_app', 'first_request', 'first_db_request', 'total']
+    summary = {
+        'runs': args.runs,
+        'db_path': args.path,
+        'statuses': runs[-1]['statuses'],
+        'engines_after_import': max(run['engines_after_import'] for run in runs),
+        'median_ms': {phase: round(statistics.median(run[phase] for run in runs), 1) for phase in phases},
+        'max_ms': {phase: round(max(run[phase] for run in runs), 1) for phase in phases},
+    }
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
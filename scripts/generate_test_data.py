@@ -14,13 +14,22 @@ Usage:
 
 Environment Variables:
     CLEAR_EXISTING_DATA: Set to 'true' to clear existing data before generating new data
-    DATA_VOLUME: 'small' (50 leads), 'medium' (150 leads), 'large' (300 leads)
+    DATA_VOLUME: 'small' (50 leads), 'medium' (150 leads), 'large' (300 leads), 'xlarge' (100k leads)
+    INSERT_METHOD: 'copy' (COPY FROM STDIN, default), 'values' (multi-row INSERT via execute_values)
+                   or 'row' (one INSERT per row)
+    INSERT_BATCH_SIZE: rows per COPY / INSERT statement (default 10000)
+    DEFER_TRIGGERS: Set to 'true' to disable the per-row activity tracker and trading fact triggers
+                    during the load and create their rows with one set-based INSERT each afterwards
+    VECTORIZED: Set to 'true' to generate activities and trading data column-wise with NumPy
+                (scripts/synthetic_data.py) and COPY them as CSV straight from Arrow
+    GENERATOR_SEED: seed for the vectorized generator (default: unseeded)
 """
 
 import os
 import sys
 import random
 import json
+import io
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 from typing import List, Dict, Any, Optional
@@ -30,7 +39,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db.db_config import engine, get_db_url
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+
+# Per-row triggers whose rows are derived set-based afterwards when DEFER_TRIGGERS=true
+DEFERRED_TRIGGERS = [
+    ('lead', 'lead_activity_tracker'),
+    ('customer', 'customer_activity_tracker'),
+    ('daily_trading_volume', 'trading_volume_fact_sync'),
+]
 
 class TestDataGenerator:
     def __init__(self):
@@ -59,6 +75,11 @@ class TestDataGenerator:
         self.data_volume = os.getenv('DATA_VOLUME', 'medium')  # small, medium, large
         self.clear_existing = os.getenv('CLEAR_EXISTING_DATA', 'false').lower() == 'true'
         self.demo_mode = os.getenv('DEMO_MODE', 'false').lower() == 'true'
+        self.insert_method = os.getenv('INSERT_METHOD', 'copy').lower()  # copy, values, row
+        self.batch_size = int(os.getenv('INSERT_BATCH_SIZE', '10000'))
+        self.defer_triggers = os.getenv('DEFER_TRIGGERS', 'false').lower() == 'true'
+        self.vectorized = os.getenv('VECTORIZED', 'false').lower() == 'true'
+        self.generator_seed = int(os.environ['GENERATOR_SEED']) if os.getenv('GENERATOR_SEED') else None
         
         # Set DEMO_MODE for API schema override
         if self.demo_mode:
@@ -68,7 +89,8 @@ class TestDataGenerator:
         self.volume_settings = {
             'small': {'leads': 50, 'days': 180},      # 6 months
             'medium': {'leads': 150, 'days': 180},    # 6 months  
-            'large': {'leads': 300, 'days': 180}      # 6 months
+            'large': {'leads': 300, 'days': 180},     # 6 months
+            'xlarge': {'leads': 100000, 'days': 180}  # 6 months, load testing
         }
         
         # Date range (6 months of historical data)
@@ -219,6 +241,120 @@ class TestDataGenerator:
                 
         self.conn.commit()
         print("✅ Data cleared successfully")
+
+    def _copy_value(self, value: Any) -> str:
+        """Render one value in the COPY text format"""
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+
+    def bulk_insert(self, table: str, columns: List[str], rows: List[tuple]) -> None:
+        """Insert row tuples in batches with COPY FROM STDIN, or execute_values as fallback"""
+        column_list = ', '.join(columns)
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            if self.insert_method == 'copy':
+                buffer = io.StringIO()
+                buffer.writelines('\t'.join(self._copy_value(v) for v in row) + '\n' for row in batch)
+                buffer.seek(0)
+                self.cursor.execute("SAVEPOINT bulk_copy")
+                try:
+                    self.cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN", buffer)
+                    self.cursor.execute("RELEASE SAVEPOINT bulk_copy")
+                    continue
+                except psycopg2.Error as e:
+                    # e.g. COPY not permitted through a connection pooler
+                    self.cursor.execute("ROLLBACK TO SAVEPOINT bulk_copy")
+                    print(f"   COPY into {table} failed ({e}), falling back to execute_values")
+                    self.insert_method = 'values'
+            execute_values(self.cursor, f"INSERT INTO {table} ({column_list}) VALUES %s",
+                           batch, page_size=self.batch_size)
+
+    def copy_arrow(self, table: str, chunks) -> int:
+        """Load Arrow tables from synthetic_data with COPY (CSV), or execute_values as fallback"""
+        import synthetic_data
+        
+        total = 0
+        for chunk in chunks:
+            if self.insert_method == 'copy':
+                self.cursor.copy_expert(synthetic_data.copy_statement(table, chunk),
+                                        synthetic_data.copy_buffer(chunk))
+            else:
+                rows = list(zip(*(column.to_pylist() for column in chunk.columns)))
+                self.bulk_insert(table, chunk.column_names, rows)
+            total += chunk.num_rows
+        self.conn.commit()
+        return total
+
+    def reserve_ids(self, table: str, column: str, count: int) -> List[int]:
+        """Draw ids from a serial column's sequence, one round trip per batch"""
+        ids = []
+        for start in range(0, count, self.batch_size):
+            self.cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) AS id FROM generate_series(1, %s)",
+                (table, column, min(self.batch_size, count - start))
+            )
+            ids.extend(row['id'] for row in self.cursor.fetchall())
+        return ids
+
+    def set_deferred_triggers(self, enabled: bool) -> None:
+        """Enable or disable the per-row triggers listed in DEFERRED_TRIGGERS"""
+        action = 'ENABLE' if enabled else 'DISABLE'
+        for table, trigger in DEFERRED_TRIGGERS:
+            self.cursor.execute(f"ALTER TABLE {table} {action} TRIGGER {trigger}")
+        self.conn.commit()
+
+    def create_deferred_rows(self, lead_ids: List[int], customer_uids: List[int]) -> None:
+        """Create the rows the deferred triggers would have written, one statement per trigger"""
+        print("⚙️  Creating deferred trigger rows...")
+        # lead_activity_tracker: a 'lead_created' system activity per lead
+        self.cursor.execute("""
+            INSERT INTO activity (
+                lead_id, activity_type, activity_category, description, activity_metadata,
+                created_by, assigned_to, status, date_created, date_completed
+            )
+            SELECT l.lead_id, 'lead_created', 'system',
+                   'Lead created: ' || l.full_name || ' (' || l.company_name || ')',
+                   jsonb_build_object(
+                       'event_type', 'lead_created', 'lead_id', l.lead_id, 'full_name', l.full_name,
+                       'company_name', l.company_name, 'status', l.status, 'bd_in_charge', l.bd_in_charge
+                   ),
+                   'system', l.bd_in_charge, 'completed', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+            FROM lead l
+            WHERE l.lead_id = ANY(%s)
+        """, (lead_ids,))
+        activity_count = self.cursor.rowcount
+
+        # customer_activity_tracker writes nothing here: customers are inserted
+        # before their contacts, so the trigger finds no primary lead.
+
+        # trading_volume_fact_sync: one fact row per non-zero trade leg
+        self.cursor.execute("""
+            INSERT INTO trading_volume_fact (
+                date, customer_uid, trade_type, trade_side, volume, fees, customer_name, bd_in_charge
+            )
+            SELECT d.date, d.customer_uid, v.trade_type, v.trade_side, v.volume, v.fees, c.name, c.bd_in_charge
+            FROM daily_trading_volume d
+            JOIN customer c ON c.customer_uid = d.customer_uid
+            CROSS JOIN LATERAL (VALUES
+                ('spot', 'maker', d.spot_maker_trading_volume, d.spot_maker_fees),
+                ('spot', 'taker', d.spot_taker_trading_volume, d.spot_taker_fees),
+                ('futures', 'maker', d.futures_maker_trading_volume, d.futures_maker_fees),
+                ('futures', 'taker', d.futures_taker_trading_volume, d.futures_taker_fees)
+            ) AS v(trade_type, trade_side, volume, fees)
+            WHERE d.customer_uid = ANY(%s)
+            AND v.volume > 0
+            ON CONFLICT DO NOTHING
+        """, (customer_uids,))
+        fact_count = self.cursor.rowcount
+
+        self.conn.commit()
+        print(f"✅ Created {activity_count} system activities and {fact_count} trading fact rows")
         
     def generate_random_date(self, start_date: datetime = None, end_date: datetime = None) -> datetime:
         """Generate a random datetime between start_date and end_date"""
@@ -345,6 +481,23 @@ class TestDataGenerator:
         """Insert leads into database and return lead IDs"""
         print("💾 Inserting leads into database...")
         
+        if self.insert_method != 'row':
+            # COPY returns no ids, so take them from the sequence up front
+            lead_ids = self.reserve_ids('lead', 'lead_id', len(leads))
+            columns = ['lead_id', 'full_name', 'title', 'email', 'telegram', 'phone_number', 'source',
+                       'status', 'date_created', 'linkedin_url', 'company_name', 'country',
+                       'bd_in_charge', 'background', 'is_converted', 'type']
+            rows = [
+                (lead_id, *(lead[c] for c in columns[1:8]),
+                 lead['date_created'] if self.demo_mode else None,  # NULL: the trigger sets now()
+                 *(lead[c] for c in columns[9:]))
+                for lead_id, lead in zip(lead_ids, leads)
+            ]
+            self.bulk_insert('lead', columns, rows)
+            self.conn.commit()
+            print(f"✅ Inserted {len(lead_ids)} leads")
+            return lead_ids
+        
         lead_ids = []
         
         for lead in leads:
@@ -397,8 +550,12 @@ class TestDataGenerator:
         converted_leads = [(lead, lead_id) for lead, lead_id in zip(leads, lead_ids) 
                           if lead['status'] == '6. closed won']
         
+        used_uids = set()
         for lead, lead_id in converted_leads:
             customer_uid = random.randint(10000000, 99999999)  # 8-digit customer ID
+            while customer_uid in used_uids:
+                customer_uid = random.randint(10000000, 99999999)
+            used_uids.add(customer_uid)
             
             customer = {
                 'customer_uid': customer_uid,
@@ -421,6 +578,22 @@ class TestDataGenerator:
         """Insert customers and their contact relationships"""
         print("💾 Inserting customers into database...")
         
+        if self.insert_method != 'row':
+            columns = ['customer_uid', 'registered_email', 'type', 'name', 'is_closed', 'date_closed',
+                       'country', 'bd_in_charge', 'date_created']
+            rows = [
+                (*(customer[c] for c in columns[:-1]),
+                 customer['date_created'] if self.demo_mode else None)
+                for customer in customers
+            ]
+            self.bulk_insert('customer', columns, rows)
+            # date_added keeps its CURRENT_TIMESTAMP default
+            self.bulk_insert('contact', ['customer_uid', 'lead_id', 'is_primary_contact'],
+                             [(customer_uid, lead_id, True) for customer_uid, lead_id in customer_lead_mapping])
+            self.conn.commit()
+            print(f"✅ Inserted {len(customers)} customers with contact relationships")
+            return [customer['customer_uid'] for customer in customers]
+        
         customer_uids = []
         
         # Insert customers
@@ -619,10 +792,32 @@ class TestDataGenerator:
         
         return descriptions.get(activity_type, f"System performed {activity_type}")
         
+    def insert_vectorized_activities(self, lead_ids: List[int], leads: List[Dict]) -> None:
+        """Generate and COPY activities column-wise (VECTORIZED=true)"""
+        import numpy as np
+        import synthetic_data
+        
+        print("📝 Generating and inserting activities (vectorized)...")
+        rng = np.random.default_rng(self.generator_seed)
+        count = self.copy_arrow('activity', synthetic_data.activities(
+            rng, lead_ids, [lead['date_created'] for lead in leads],
+            [lead['bd_in_charge'] for lead in leads], end=self.end_date, mean_extra=4.0
+        ))
+        print(f"✅ Inserted {count} activities")
+        
     def insert_activities(self, activities: List[Dict]) -> None:
         """Insert activities into database"""
         print("💾 Inserting activities into database...")
         
+        if self.insert_method != 'row':
+            columns = ['lead_id', 'activity_type', 'activity_category', 'description', 'activity_metadata',
+                       'date_created', 'created_by', 'is_visible_to_bd', 'due_date', 'status', 'priority',
+                       'assigned_to', 'date_completed']
+            self.bulk_insert('activity', columns, [tuple(a[c] for c in columns) for a in activities])
+            self.conn.commit()
+            print(f"✅ Inserted {len(activities)} activities")
+            return
+        
         for activity in activities:
             try:
                 insert_query = """
@@ -700,10 +895,35 @@ class TestDataGenerator:
                 
         return trading_data
         
+    def insert_vectorized_trading_data(self, customer_uids: List[int]) -> None:
+        """Generate and COPY daily trading volume column-wise (VECTORIZED=true)"""
+        import numpy as np
+        import synthetic_data
+        
+        print("📈 Generating and inserting trading volume data (vectorized)...")
+        # Offset so activities and trading data don't share one random stream
+        rng = np.random.default_rng(None if self.generator_seed is None else self.generator_seed + 1)
+        end = self.end_date.date()
+        # ~24 trading days in the last 60, as in generate_trading_data
+        count = self.copy_arrow('daily_trading_volume', synthetic_data.daily_trading_volume(
+            rng, customer_uids, end - timedelta(days=60), end, trading_rate=0.4
+        ))
+        print(f"✅ Inserted {count} trading records")
+        
     def insert_trading_data(self, trading_data: List[Dict]) -> None:
         """Insert trading volume data"""
         print("💾 Inserting trading volume data...")
         
+        if self.insert_method != 'row':
+            columns = ['customer_uid', 'date', 'spot_maker_trading_volume', 'spot_taker_trading_volume',
+                       'spot_maker_fees', 'spot_taker_fees', 'futures_maker_trading_volume',
+                       'futures_taker_trading_volume', 'futures_maker_fees', 'futures_taker_fees',
+                       'user_assets']
+            self.bulk_insert('daily_trading_volume', columns, [tuple(r[c] for c in columns) for r in trading_data])
+            self.conn.commit()
+            print(f"✅ Inserted {len(trading_data)} trading records")
+            return
+        
         for record in trading_data:
             try:
                 insert_query = """
@@ -763,6 +983,13 @@ class TestDataGenerator:
         """Insert VIP history data"""
         print("💾 Inserting VIP history...")
         
+        if self.insert_method != 'row':
+            columns = ['customer_uid', 'date', 'vip_level', 'spot_mm_level', 'futures_mm_level']
+            self.bulk_insert('vip_history', columns, [tuple(r[c] for c in columns) for r in vip_data])
+            self.conn.commit()
+            print(f"✅ Inserted {len(vip_data)} VIP history records")
+            return
+        
         for record in vip_data:
             try:
                 insert_query = """
@@ -840,6 +1067,9 @@ class TestDataGenerator:
             if self.clear_existing:
                 self.clear_existing_data()
                 
+            if self.defer_triggers:
+                self.set_deferred_triggers(enabled=False)
+                
             # Generate leads
             leads = self.generate_leads()
             lead_ids = self.insert_leads(leads)
@@ -849,18 +1079,28 @@ class TestDataGenerator:
             customer_uids = self.insert_customers(customers, customer_lead_mapping)
             
             # Generate activities
-            activities = self.generate_activities(lead_ids, leads)
-            self.insert_activities(activities)
+            if self.vectorized:
+                self.insert_vectorized_activities(lead_ids, leads)
+            else:
+                activities = self.generate_activities(lead_ids, leads)
+                self.insert_activities(activities)
             
             # Generate trading data for customers
             if customer_uids:
-                trading_data = self.generate_trading_data(customer_uids)
-                self.insert_trading_data(trading_data)
+                if self.vectorized:
+                    self.insert_vectorized_trading_data(customer_uids)
+                else:
+                    trading_data = self.generate_trading_data(customer_uids)
+                    self.insert_trading_data(trading_data)
                 
                 # Generate VIP history
                 vip_data = self.generate_vip_history(customer_uids)
                 self.insert_vip_history(vip_data)
             
+            if self.defer_triggers:
+                self.set_deferred_triggers(enabled=True)
+                self.create_deferred_rows(lead_ids, customer_uids)
+                
             # Generate summary
             self.generate_summary_stats()
             
@@ -869,6 +1109,8 @@ class TestDataGenerator:
         except Exception as e:
             print(f"\n❌ Error during data generation: {e}")
             self.conn.rollback()
+            if self.defer_triggers:
+                self.set_deferred_triggers(enabled=True)
             raise
         finally:
             self.cursor.close()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Precompress the React build for the static asset layer
+
+Writes a .gz (and, when the optional `brotli` package is installed, a .br)
+next to every compressible file in frontend/build, so the API can send
+compressed bytes straight from disk instead of compressing per request.
+A variant is only kept when it is smaller than the original.
+
+Usage:
+    python scripts/precompress_assets.py [build_dir]
+"""
+
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants only
+    brotli = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMPRESSIBLE = ('.js', '.css', '.html', '.json', '.map', '.svg', '.txt', '.ico')
+MIN_SIZE = 1024
+
+
+def _write_variant(path, suffix, data):
+    variant = path + suffix
+    with open(variant, 'wb') as f:
+        f.write(data)
+    # Same mtime as the original keeps variant ETags stable across rebuilds of unchanged files
+    stat = os.stat(path)
+    os.utime(variant, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return len(data)
+
+
+def precompress(build_dir):
+    """Compress every eligible file under build_dir; returns (files, bytes before, bytes after)"""
+    files, before, after = 0, 0, 0
+    for directory, _, filenames in os.walk(build_dir):
+        for filename in filenames:
+            if not filename.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(directory, filename)
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < MIN_SIZE:
+                continue
+
+            smallest = len(data)
+            gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gzipped) < len(data):
+                smallest = min(smallest, _write_variant(path, '.gz', gzipped))
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    smallest = min(smallest, _write_variant(path, '.br', compressed))
+
+            files += 1
+            before += len(data)
+            after += smallest
+    return files, before, after
+
+
+def main():
+    build_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(PROJECT_ROOT, 'frontend', 'build')
+    if not os.path.isdir(build_dir):
+        print(f"❌ Build directory not found: {build_dir}")
+        sys.exit(1)
+
+    files, before, after = precompress(build_dir)
+    encodings = 'gzip + brotli' if brotli is not None else 'gzip (install brotli for .br)'
+    print(f"✅ Precompressed {files} files with {encodings}: {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+Vectorized synthetic data generation for LeadFi with NumPy.
+
+Whole columns are drawn at once from a seeded ``numpy.random.Generator``
+instead of building one Python dict (and Decimal) per row:
+
+- trading days per customer ~ Poisson(trading_rate * days), placed on random days
+- daily volume = customer size (lognormal) x daily factor (lognormal) x leg share
+- fees = volume x a fee rate drawn from FEE_RATE_RANGES, capped to numeric(6,2)
+- activities per lead = the lead_created row + Poisson(mean_extra) follow-ups
+
+Generators yield pyarrow Tables of at most ``chunk_rows`` rows, so memory stays
+bounded however large the data set. ``write_parquet`` streams them to a
+Parquet file; ``copy_buffer`` renders one as CSV for
+``COPY ... FROM STDIN WITH (FORMAT csv)``.
+
+Used by scripts/generate_test_data.py (VECTORIZED=true) and
+scripts/benchmark_api.py.
+"""
+
+import io
+from datetime import date, datetime
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 500_000
+
+TRADE_LEGS = ('spot_maker', 'spot_taker', 'futures_maker', 'futures_taker')
+
+# Share of a customer's daily volume per trade leg, and the fee rate charged on it
+LEG_SHARE_RANGES = {
+    'spot_maker': (0.3, 0.7),
+    'spot_taker': (0.2, 0.5),
+    'futures_maker': (0.1, 0.8),
+    'futures_taker': (0.1, 0.6),
+}
+FEE_RATE_RANGES = {
+    'spot_maker': (0.0001, 0.001),
+    'spot_taker': (0.0002, 0.002),
+    'futures_maker': (0.0001, 0.001),
+    'futures_taker': (0.0002, 0.002),
+}
+MAX_FEES = 9999.99  # fees columns are numeric(6,2)
+
+DAILY_TRADING_VOLUME_SCHEMA = pa.schema(
+    [('customer_uid', pa.int64()), ('date', pa.date32())]
+    + [field for leg in TRADE_LEGS
+       for field in ((f'{leg}_trading_volume', pa.float64()), (f'{leg}_fees', pa.float64()))]
+    + [('user_assets', pa.float64())]
+)
+
+TRADING_VOLUME_FACT_SCHEMA = pa.schema([
+    ('date', pa.date32()),
+    ('customer_uid', pa.int64()),
+    ('trade_type', pa.string()),
+    ('trade_side', pa.string()),
+    ('volume', pa.float64()),
+    ('fees', pa.float64()),
+    ('customer_name', pa.string()),
+    ('bd_in_charge', pa.string()),
+])
+
+ACTIVITY_SCHEMA = pa.schema([
+    ('lead_id', pa.int64()),
+    ('activity_type', pa.string()),
+    ('activity_category', pa.string()),
+    ('description', pa.string()),
+    ('activity_metadata', pa.string()),
+    ('date_created', pa.timestamp('s')),
+    ('created_by', pa.string()),
+    ('is_visible_to_bd', pa.bool_()),
+    ('due_date', pa.timestamp('s')),
+    ('status', pa.string()),
+    ('priority', pa.string()),
+    ('assigned_to', pa.string()),
+    ('date_completed', pa.timestamp('s')),
+])
+
+MANUAL_ACTIVITY_TYPES = ['call', 'email', 'meeting', 'linkedin_message', 'telegram_message',
+                         'follow_up', 'proposal_sent', 'demo', 'negotiation', 'onboarding']
+SYSTEM_ACTIVITY_TYPES = ['lead_updated', 'status_changed', 'stage_changed', 'lead_converted']
+
+
+def daily_trading_volume(rng: np.random.Generator, customer_uids: Sequence[int], start: date, end: date,
+                         trading_rate: float = 0.7, volume_median: float = 100_000.0,
+                         volume_sigma: float = 1.0, daily_sigma: float = 0.5,
+                         chunk_rows: int = CHUNK_ROWS) -> Iterator[pa.Table]:
+    """Wide daily_trading_volume rows, one per customer and trading day, sorted by customer and date"""
+    days = (end - start).days + 1
+    first_day = np.datetime64(start, 'D')
+    customer_uids = np.asarray(customer_uids, dtype=np.int64)
+    block = max(1, chunk_rows // days)
+
+    for offset in range(0, len(customer_uids), block):
+        uids = customer_uids[offset:offset + block]
+        trading_days = np.minimum(rng.poisson(trading_rate * days, len(uids)), days)
+        # argsort of uniforms is a random permutation per customer: its first
+        # trading_days slots are the days that customer trades
+        trades = rng.random((len(uids), days)).argsort(axis=1) < trading_days[:, None]
+        cust_idx, day_idx = np.nonzero(trades)
+        rows = len(cust_idx)
+        size = rng.lognormal(np.log(volume_median), volume_sigma, len(uids))[cust_idx]
+        daily = size * rng.lognormal(0.0, daily_sigma, rows)
+
+        columns = [uids[cust_idx], first_day + day_idx]
+        for leg in TRADE_LEGS:
+            volume = np.round(daily * rng.uniform(*LEG_SHARE_RANGES[leg], rows), 2)
+            fees = np.minimum(np.round(volume * rng.uniform(*FEE_RATE_RANGES[leg], rows), 2), MAX_FEES)
+            columns += [volume, fees]
+        columns.append(np.round(rng.uniform(50_000, 2_000_000, rows), 2))
+        yield pa.Table.from_arrays([pa.array(c) for c in columns], schema=DAILY_TRADING_VOLUME_SCHEMA)
+
+
+def trading_volume_fact(wide: pa.Table, customer_uids: Sequence[int], customer_names: Sequence[str],
+                        bd_in_charge: Sequence[str]) -> pa.Table:
+    """The long trading_volume_fact rows the sync trigger derives from a daily_trading_volume table"""
+    order = np.argsort(np.asarray(customer_uids, dtype=np.int64))
+    sorted_uids = np.asarray(customer_uids, dtype=np.int64)[order]
+    names = np.asarray(customer_names, dtype=object)[order]
+    bds = np.asarray(bd_in_charge, dtype=object)[order]
+
+    uid = wide['customer_uid'].to_numpy()
+    day = wide['date'].to_numpy()
+    parts = []
+    for leg in TRADE_LEGS:
+        trade_type, trade_side = leg.split('_')
+        volume = wide[f'{leg}_trading_volume'].to_numpy()
+        keep = volume > 0
+        idx = np.searchsorted(sorted_uids, uid[keep])
+        parts.append(pa.Table.from_arrays([
+            pa.array(day[keep]),
+            pa.array(uid[keep]),
+            pa.array(np.full(keep.sum(), trade_type, dtype=object), type=pa.string()),
+            pa.array(np.full(keep.sum(), trade_side, dtype=object), type=pa.string()),
+            pa.array(volume[keep]),
+            pa.array(wide[f'{leg}_fees'].to_numpy()[keep]),
+            pa.array(names[idx], type=pa.string()),
+            pa.array(bds[idx], type=pa.string()),
+        ], schema=TRADING_VOLUME_FACT_SCHEMA))
+    return pa.concat_tables(parts)
+
+
+def activities(rng: np.random.Generator, lead_ids: Sequence[int], lead_dates: Sequence[datetime],
+               bd_in_charge: Sequence[str], end: datetime, mean_extra: float = 4.0,
+               manual_share: float = 0.7, chunk_rows: int = CHUNK_ROWS) -> Iterator[pa.Table]:
+    """
+    Activity rows per lead: a completed lead_created system activity at the
+    lead's creation, then Poisson(mean_extra) activities 1-30 days later
+    (manual_share manual, owned by the lead's BD; the rest system). Activities
+    dated after end are open (pending / in progress) or completed.
+    """
+    lead_ids = np.asarray(lead_ids, dtype=np.int64)
+    lead_dates = np.asarray(lead_dates, dtype='datetime64[s]')
+    bd_in_charge = np.asarray(bd_in_charge, dtype=object)
+    end = np.datetime64(end, 's')
+
+    # Vocabulary: code 0 is lead_created, then manual types, then system types
+    types = np.array(['lead_created'] + MANUAL_ACTIVITY_TYPES + SYSTEM_ACTIVITY_TYPES, dtype=object)
+    descriptions = np.array(
+        ['Lead created']
+        + [f"Performed {t} activity" for t in MANUAL_ACTIVITY_TYPES]
+        + [f"System performed {t}" for t in SYSTEM_ACTIVITY_TYPES], dtype=object)
+    metadata = np.array(
+        ['{"event_type": "lead_created"}']
+        + [None] * len(MANUAL_ACTIVITY_TYPES)
+        + [f'{{"event_type": "{t}"}}' for t in SYSTEM_ACTIVITY_TYPES], dtype=object)
+    n_manual = len(MANUAL_ACTIVITY_TYPES)
+    statuses = np.array(['completed', 'pending', 'in_progress'], dtype=object)
+    priorities = np.array(['low', 'medium', 'high'], dtype=object)
+
+    block = max(1, int(chunk_rows // (mean_extra + 1)))
+    for offset in range(0, len(lead_ids), block):
+        ids = lead_ids[offset:offset + block]
+        counts = 1 + rng.poisson(mean_extra, len(ids))
+        lead_idx = np.repeat(np.arange(len(ids)), counts)
+        rows = len(lead_idx)
+        is_first = np.zeros(rows, dtype=bool)
+        is_first[np.cumsum(counts) - counts] = True
+
+        offset_seconds = rng.integers(1, 31, rows) * 86400 + rng.integers(0, 86400, rows)
+        created = lead_dates[offset:offset + block][lead_idx] + np.where(is_first, 0, offset_seconds)
+        manual = ~is_first & (rng.random(rows) < manual_share)
+        code = np.where(
+            is_first, 0,
+            np.where(manual, 1 + rng.integers(0, n_manual, rows),
+                     1 + n_manual + rng.integers(0, len(SYSTEM_ACTIVITY_TYPES), rows)))
+
+        status = np.where(manual & (created > end), statuses[rng.integers(0, 3, rows)], 'completed')
+        completed = status == 'completed'
+        pending = status == 'pending'
+        owner = np.where(manual, bd_in_charge[offset:offset + block][lead_idx], 'system')
+        due = created + rng.integers(1, 8, rows) * 86400
+
+        yield pa.Table.from_arrays([
+            pa.array(ids[lead_idx]),
+            pa.array(types[code], type=pa.string()),
+            pa.array(np.where(manual, 'manual', 'system').astype(object), type=pa.string()),
+            pa.array(descriptions[code], type=pa.string()),
+            pa.array(metadata[code], type=pa.string()),
+            pa.array(created),
+            pa.array(owner, type=pa.string()),
+            pa.array(np.ones(rows, dtype=bool)),
+            pa.array(due, mask=~pending),
+            pa.array(status.astype(object), type=pa.string()),
+            pa.array(priorities[rng.integers(0, 3, rows)], type=pa.string()),
+            pa.array(owner, type=pa.string()),
+            pa.array(created, mask=~completed),
+        ], schema=ACTIVITY_SCHEMA)
+
+
+def write_parquet(tables: Iterable[pa.Table], path) -> int:
+    """Stream tables into one Parquet file; returns the number of rows written"""
+    writer = None
+    rows = 0
+    try:
+        for table in tables:
+            if writer is None:
+                writer = pq.ParquetWriter(str(path), table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def copy_buffer(table: pa.Table) -> io.BytesIO:
+    """Headerless CSV of table for COPY ... FROM STDIN WITH (FORMAT csv); nulls are empty fields"""
+    buffer = io.BytesIO()
+    pa_csv.write_csv(table, buffer, pa_csv.WriteOptions(include_header=False))
+    buffer.seek(0)
+    return buffer
+
+
+def copy_statement(table_name: str, table: pa.Table) -> str:
+    return f"COPY {table_name} ({', '.join(table.column_names)}) FROM STDIN WITH (FORMAT csv)"
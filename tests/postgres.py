@@ -0,0 +1,44 @@
+"""
+PostgreSQL fixtures for tests of Postgres-only SQL (triggers, GROUPING SETS, COPY)
+
+Set TEST_POSTGRES_URL to a scratch database to run them; they are skipped
+otherwise. Each test class gets db/init.sql applied in its own schema, which
+is dropped afterwards.
+"""
+
+import os
+import unittest
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+POSTGRES_URL = os.getenv('TEST_POSTGRES_URL')
+INIT_SQL = Path(__file__).resolve().parent.parent / 'db' / 'init.sql'
+
+
+@unittest.skipUnless(POSTGRES_URL, 'TEST_POSTGRES_URL is not set')
+class PostgresTestCase(unittest.TestCase):
+    """Base class running its tests against a fresh init.sql schema"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.schema = f'leadfi_test_{uuid.uuid4().hex[:8]}'
+        # public stays on the path for extensions (pg_trgm) installed there
+        options = quote(f'-csearch_path={cls.schema},public')
+        cls.url = f"{POSTGRES_URL}{'&' if '?' in POSTGRES_URL else '?'}options={options}"
+        cls.engine = create_engine(cls.url, poolclass=NullPool)
+        with cls.engine.begin() as conn:
+            conn.execute(text(f'CREATE SCHEMA "{cls.schema}"'))
+            # Raw DB-API cursor: init.sql holds % and : that driver paramstyles would parse
+            cursor = conn.connection.cursor()
+            cursor.execute(INIT_SQL.read_text())
+            cursor.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.engine.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA "{cls.schema}" CASCADE'))
+        cls.engine.dispose()
@@ -9,6 +9,8 @@ import tempfile
 import os
 from unittest.mock import patch, MagicMock
 
+from sqlalchemy import text
+
 # Add project root to path
 import sys
 from pathlib import Path
@@ -21,6 +23,7 @@ from api.models.customer import Customer
 from api.models.activity import Activity
 from api.models.contact import Contact
 from api.models.trading_volume import TradingVolume
+from tests.postgres import PostgresTestCase
 
 
 class TestAPIBase(unittest.TestCase):
@@ -197,6 +200,889 @@ class TestAnalyticsAPI(TestAPIBase):
         data = json.loads(response.data)
         self.assertIsInstance(data, list)
 
+    def test_conversion_rate_rejects_unknown_breakdown(self):
+        """Test that only the supported conversion rate breakdowns are accepted"""
+        response = self.app.get('/api/analytics/monthly-lead-conversion-rate?breakdown=country')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('breakdown', json.loads(response.data)['error'])
+
+
+class TestCursorPagination(TestAPIBase):
+    """Test keyset (cursor) pagination on list endpoints"""
+
+    def create_test_data(self):
+        """Create enough leads to span several pages"""
+        for i in range(5):
+            db.session.add(Lead(
+                full_name=f"Cursor Lead {i}",
+                email=f"cursor{i}@example.com",
+                source="apollo",
+                status="1. lead generated",
+                bd_in_charge="demo_user",
+                type="vip"
+            ))
+        db.session.commit()
+
+    def test_leads_cursor_walks_all_pages(self):
+        """Test that following next_cursor returns every lead exactly once"""
+        seen = []
+        cursor = ''
+        while True:
+            response = self.app.get(f'/api/leads?per_page=2&cursor={cursor}')
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            self.assertNotIn('total', data)
+            seen.extend(lead['lead_id'] for lead in data['leads'])
+            if not data['has_next']:
+                self.assertIsNone(data['next_cursor'])
+                break
+            cursor = data['next_cursor']
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_cursor_includes_null_sort_values(self):
+        """Test that rows with a NULL date_created are paged last in both directions"""
+        Lead.query.filter(Lead.full_name.in_(["Cursor Lead 1", "Cursor Lead 3"])).update(
+            {'date_created': None}, synchronize_session=False
+        )
+        db.session.add(Customer(customer_uid=5000, name="Dated"))
+        db.session.add(Customer(customer_uid=5001, name="Undated"))
+        db.session.commit()
+        Customer.query.filter_by(customer_uid=5001).update({'date_created': None})
+        db.session.commit()
+
+        for url, key, field in (('/api/leads', 'leads', 'lead_id'),
+                                ('/api/customers', 'customer', 'customer_uid')):
+            for sort_order in ('desc', 'ASC'):
+                seen, cursor = [], ''
+                while True:
+                    response = self.app.get(f'{url}?per_page=1&sort_order={sort_order}&cursor={cursor}')
+                    self.assertEqual(response.status_code, 200)
+                    data = json.loads(response.data)
+                    seen.extend(data[key])
+                    if not data['has_next']:
+                        break
+                    cursor = data['next_cursor']
+                expected = 5 if key == 'leads' else 2
+                self.assertEqual(len({row[field] for row in seen}), expected)
+                self.assertIsNone(seen[-1]['date_created'])
+
+        self.assertEqual(self.app.get('/api/leads?cursor=&sort_order=up').status_code, 400)
+        self.assertEqual(self.app.get('/api/customers?cursor=&sort_order=up').status_code, 400)
+        self.assertEqual(self.app.get('/api/activities?cursor=&sort_order=up').status_code, 400)
+
+    def test_leads_cursor_optional_total(self):
+        """Test that include_total adds the filtered count"""
+        response = self.app.get('/api/leads?per_page=2&cursor=&include_total=true')
+        data = json.loads(response.data)
+        self.assertEqual(data['total'], 5)
+
+    def test_tampered_cursor_rejected(self):
+        """Test that a modified cursor is rejected"""
+        response = self.app.get('/api/leads?per_page=2&cursor=')
+        cursor = json.loads(response.data)['next_cursor']
+        response = self.app.get(f'/api/leads?per_page=2&cursor={cursor}x')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_bound_to_sort_order(self):
+        """Test that a cursor cannot be reused with a different sort"""
+        response = self.app.get('/api/leads?per_page=2&cursor=')
+        cursor = json.loads(response.data)['next_cursor']
+        response = self.app.get(f'/api/leads?per_page=2&sort_order=asc&cursor={cursor}')
+        self.assertEqual(response.status_code, 400)
+
+    def test_trading_volume_cursor_shape_rejected(self):
+        """Test that a signed cursor with the wrong number of key values is a client error"""
+        from api.utils.pagination import encode_cursor
+        cursor = encode_cursor(['2025-01-01'], 'trading_volume:date:desc')
+        response = self.app.get(f'/api/trading-volume?cursor={cursor}')
+        self.assertEqual(response.status_code, 400)
+
+    def test_activities_cursor(self):
+        """Test cursor pagination on the activities endpoint"""
+        lead = Lead.query.first()
+        for i in range(3):
+            Activity.create_manual_activity(lead.lead_id, 'call', f'Call {i}')
+        db.session.commit()
+
+        response = self.app.get('/api/activities?per_page=2&cursor=')
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['activities']), 2)
+        self.assertTrue(data['has_next'])
+
+        response = self.app.get(f"/api/activities?per_page=2&cursor={data['next_cursor']}")
+        data = json.loads(response.data)
+        self.assertEqual(len(data['activities']), 1)
+        self.assertFalse(data['has_next'])
+
+
+class TestCustomerListProjection(TestAPIBase):
+    """Test that the customer list resolves primary lead fields in bulk"""
+
+    def create_test_data(self):
+        """Create converted leads with primary contacts"""
+        for i in range(4):
+            lead = Lead(
+                full_name=f"Converted Lead {i}",
+                email=f"converted{i}@example.com",
+                source="referral",
+                status="6. closed won",
+                bd_in_charge=f"bd_{i}",
+                type="vip",
+                is_converted=True
+            )
+            db.session.add(lead)
+            db.session.flush()
+            db.session.add(Customer(customer_uid=1000 + i, name=f"Customer {i}"))
+            db.session.add(Contact(customer_uid=1000 + i, lead_id=lead.lead_id))
+        db.session.commit()
+
+    def test_list_matches_per_row_serialization(self):
+        """Test that batched fields match the per-row model lookups"""
+        response = self.app.get('/api/customers')
+        self.assertEqual(response.status_code, 200)
+        listed = {c['customer_uid']: c for c in json.loads(response.data)['customer']}
+        self.assertEqual(len(listed), 4)
+
+        for customer in Customer.query.all():
+            expected = customer.to_dict()
+            self.assertEqual(listed[customer.customer_uid]['lead_status'], expected['lead_status'])
+            self.assertEqual(listed[customer.customer_uid]['bd_in_charge'], expected['bd_in_charge'])
+
+    def test_list_query_count_is_constant(self):
+        """Test that serializing a page does not issue per-row queries"""
+        from sqlalchemy import event
+        statements = []
+
+        def count_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            self.app.get('/api/customers?per_page=20')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+        # count + page + primary lead projection
+        self.assertLessEqual(len(statements), 3)
+
+
+class TestActivityBulkSerialization(TestAPIBase):
+    """Test that activity lists preload leads and customers in bulk"""
+
+    def create_test_data(self):
+        """Create leads (one converted) each with a few activities"""
+        for i in range(3):
+            lead = Lead(
+                full_name=f"Activity Lead {i}",
+                email=f"activity{i}@example.com",
+                source="event",
+                status="2. proposal",
+                bd_in_charge="demo_user",
+                type="otc"
+            )
+            db.session.add(lead)
+            db.session.flush()
+            for j in range(3):
+                Activity.create_manual_activity(lead.lead_id, 'email', f'Email {j}')
+            if i == 0:
+                db.session.add(Customer(customer_uid=2000, name="Activity Customer"))
+                db.session.add(Contact(customer_uid=2000, lead_id=lead.lead_id))
+        db.session.commit()
+
+    def test_bulk_matches_per_row_serialization(self):
+        """Test that preloaded fields match the per-row schema output"""
+        from api.schemas.activity_schema import ActivitySchema
+        response = self.app.get('/api/activities?per_page=50')
+        self.assertEqual(response.status_code, 200)
+        listed = {a['activity_id']: a for a in json.loads(response.data)['activities']}
+
+        expected = ActivitySchema(many=True).dump(Activity.query.all())
+        self.assertEqual(len(listed), len(expected))
+        for row in expected:
+            for field in ('related_entity_name', 'related_entity_type', 'customer_info'):
+                self.assertEqual(listed[row['activity_id']][field], row[field])
+
+    def test_timeline_query_count_is_constant(self):
+        """Test that the timeline does not issue per-activity queries"""
+        from sqlalchemy import event
+        customer_lead = Contact.query.first().lead_id
+        statements = []
+
+        def count_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        db.session.expire_all()
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            response = self.app.get(f'/api/activities/timeline?lead_id={customer_lead}')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+        data = json.loads(response.data)
+        self.assertEqual(data['activities'][0]['customer_info']['customer_uid'], 2000)
+        # activities + leads + contact/customer join
+        self.assertLessEqual(len(statements), 3)
+
+
+class TestTradingVolumeCube(TestAPIBase):
+    """Test that the in-process trading volume cube matches the SQL aggregates"""
+
+    def create_test_data(self):
+        """Create two customers with a few days of long-format trading volume"""
+        from datetime import date
+        db.session.add(Customer(customer_uid=3000, name="Cube A"))
+        db.session.add(Customer(customer_uid=3001, name="Cube B"))
+        for day in range(1, 5):
+            for uid, scale in ((3000, 100), (3001, 40)):
+                for trade_type in ('spot', 'futures'):
+                    for trade_side in ('maker', 'taker'):
+                        if uid == 3001 and trade_type == 'futures' and day % 2:
+                            continue
+                        db.session.add(TradingVolume(
+                            date=date(2024, 1, day), customer_uid=uid,
+                            customer_name=f"Cube {'A' if uid == 3000 else 'B'}",
+                            trade_type=trade_type, trade_side=trade_side,
+                            volume=scale * day + (7 if trade_side == 'taker' else 0),
+                            fees=day * 0.5, bd_in_charge='alice' if uid == 3000 else 'bob'
+                        ))
+        db.session.commit()
+
+    def _load_cube(self):
+        from api.services.trading_volume_cube import TradingVolumeCube
+        cube = TradingVolumeCube(refresh_seconds=3600)
+        cube.load()
+        return cube
+
+    def test_aggregates_match_sql(self):
+        """Test each cube aggregate against the SQL fallback"""
+        cube = self._load_cube()
+        for filters in ({}, {'start_date': '2024-01-02', 'end_date': '2024-01-03'},
+                        {'bd_in_charge': 'bob'}, {'customer_uid': 3000}):
+            sql_summary = TradingVolume.get_summary_stats(**filters)
+            cube_summary = cube.summary_stats(**filters)
+            # SQLite truncates the SQL averages (integer division), so compare totals only
+            for key in ('total_volume', 'total_fees', 'total_trades', 'unique_customers', 'trading_days'):
+                self.assertAlmostEqual(cube_summary[key], sql_summary[key], places=6)
+            self.assertAlmostEqual(cube_summary['avg_daily_volume'],
+                                   cube_summary['total_volume'] / cube_summary['trading_days'])
+            self.assertEqual(cube.breakdown_by_type(**filters),
+                             TradingVolume.get_breakdown_by_type(**filters))
+            self.assertEqual(cube.breakdown_by_side(**filters),
+                             TradingVolume.get_breakdown_by_side(**filters))
+
+        daily = cube.daily_volumes(start_date='2024-01-02', end_date=None, customer_uid=3001)
+        self.assertEqual([row['date'] for row in daily], ['2024-01-02', '2024-01-03', '2024-01-04'])
+        self.assertEqual((daily[0]['maker_volume'], daily[0]['taker_volume']), (160.0, 174.0))
+        self.assertEqual((daily[1]['maker_volume'], daily[1]['taker_volume']), (120.0, 127.0))
+        self.assertEqual(
+            cube.top_customers(trade_type='futures', trade_side='maker'),
+            TradingVolume.get_top_customers(trade_type='futures', trade_side='maker')
+        )
+
+    def test_incremental_refresh_by_watermark(self):
+        """Test that refresh picks up rows on or after the loaded watermark"""
+        from datetime import date
+        cube = self._load_cube()
+        before = cube.summary_stats()['total_volume']
+
+        db.session.add(TradingVolume(
+            date=date(2024, 1, 5), customer_uid=3001, customer_name="Cube B",
+            trade_type='spot', trade_side='maker', volume=1000, fees=1,
+            bd_in_charge='bob'
+        ))
+        db.session.commit()
+        cube.refresh()
+
+        self.assertAlmostEqual(cube.summary_stats()['total_volume'], before + 1000)
+        self.assertEqual(cube.summary_stats()['trading_days'], 5.0)
+        self.assertEqual(cube.top_customers()[0]['customer_uid'], 3000)
+
+    def test_historic_changes_rebuild(self):
+        """Test that corrections to old rows and BD reassignments rebuild the cube"""
+        from datetime import date
+        cube = self._load_cube()
+        self.assertFalse(cube.is_stale())
+
+        row = TradingVolume.query.filter_by(date=date(2024, 1, 1), customer_uid=3000,
+                                            trade_type='spot', trade_side='maker').first()
+        row.volume = 5000
+        TradingVolume.query.filter_by(customer_uid=3001).update({'bd_in_charge': 'alice'})
+        db.session.commit()
+        self.assertTrue(cube.is_stale())
+
+        cube.maybe_refresh()
+        cube.wait()
+        self.assertFalse(cube.is_stale())
+        self.assertAlmostEqual(cube.summary_stats()['total_volume'],
+                               TradingVolume.get_summary_stats()['total_volume'])
+        for bd in ('alice', 'dave'):
+            self.assertEqual(cube.breakdown_by_type(bd_in_charge=bd),
+                             TradingVolume.get_breakdown_by_type(bd_in_charge=bd))
+        self.assertEqual(cube.summary_stats(bd_in_charge='bob')['total_trades'], 0)
+
+    def test_customer_changes_remap(self):
+        """Test that customer renames and BD reassignments are remapped without a rebuild"""
+        from datetime import date
+        # A customer whose rows disagree on the BD keeps its per-row BDs
+        TradingVolume.query.filter_by(customer_uid=3000, date=date(2024, 1, 1)).update({'bd_in_charge': 'dave'})
+        db.session.commit()
+        cube = self._load_cube()
+        rows_loaded = len(cube._snapshot)
+
+        # As trading_volume_fact_customer_sync does on Postgres: the customer
+        # write, then one UPDATE of the customer's fact rows
+        db.session.get(Customer, 3001).name = "Cube B Renamed"
+        db.session.commit()
+        TradingVolume.query.filter_by(customer_uid=3001).update(
+            {'customer_name': "Cube B Renamed", 'bd_in_charge': 'carol'})
+        db.session.commit()
+        self.assertFalse(cube.is_stale())
+        self.assertTrue(cube.customers_changed())
+
+        cube.maybe_refresh()
+        cube.wait()
+        self.assertFalse(cube.customers_changed())
+        self.assertEqual(len(cube._snapshot), rows_loaded)
+        self.assertEqual(cube.top_customers(customer_uid=3001)[0]['customer_name'], "Cube B Renamed")
+        self.assertEqual(cube.summary_stats(bd_in_charge='bob')['total_trades'], 0)
+        self.assertEqual(cube.breakdown_by_type(bd_in_charge='carol'),
+                         TradingVolume.get_breakdown_by_type(bd_in_charge='carol'))
+        for bd in ('alice', 'dave'):
+            self.assertEqual(cube.breakdown_by_type(bd_in_charge=bd),
+                             TradingVolume.get_breakdown_by_type(bd_in_charge=bd))
+
+
+class TestAnalyticsCache(TestAPIBase):
+    """Test the analytics result cache (LRU, TTL, write invalidation, counters)"""
+
+    def test_repeat_calls_hit_and_writes_invalidate(self):
+        """Test that identical calls are served from cache until a lead write"""
+        from api.services.analytics_service import get_lead_funnel
+        from api.utils.cache import analytics_cache
+        before = analytics_cache.stats()
+
+        first = get_lead_funnel(bd_in_charge='demo_user')
+        second = get_lead_funnel(bd_in_charge=' demo_user ')
+        self.assertEqual(first, second)
+        stats = analytics_cache.stats()
+        self.assertEqual(stats['hits'] - before['hits'], 1)
+        self.assertEqual(stats['misses'] - before['misses'], 1)
+
+        db.session.add(Lead(full_name="Cache Lead", email="cache@example.com",
+                            source="event", status="Qualified",
+                            bd_in_charge="demo_user", type="otc"))
+        db.session.commit()
+
+        self.assertEqual(get_lead_funnel(bd_in_charge='demo_user')['Qualified'],
+                         first['Qualified'] + 1)
+
+    def test_lru_bound_and_ttl(self):
+        """Test that the cache evicts least recently used entries and expires by TTL"""
+        from api.utils.cache import ResultCache
+        cache = ResultCache(max_entries=2, ttl_seconds=60)
+        calls = []
+
+        @cache.cached('lead')
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        square(1), square(2), square(1), square(3)   # 2 is least recently used
+        self.assertEqual(cache.stats()['evictions'], 1)
+        square(1)
+        square(2)
+        self.assertEqual(calls, [1, 2, 3, 2])
+
+        import time
+        cache.ttl_seconds = 0.01
+        cache.clear()
+        square(4)
+        time.sleep(0.02)
+        square(4)
+        self.assertEqual(calls[-2:], [4, 4])
+
+    def test_version_poll_errors(self):
+        """Test that only a missing version view disables polling, not transient errors"""
+        from sqlalchemy.exc import OperationalError
+        from api.utils import cache
+
+        def poll(error):
+            cache._db_versions_supported, cache._db_versions_polled_at = True, 0.0
+            with patch.object(cache.db.engine, 'connect', side_effect=error):
+                return cache.db_table_versions(max_age=60)
+
+        transient = OperationalError('SELECT', {}, Exception('QueuePool limit reached'))
+        self.assertIsNone(poll(transient))
+        self.assertTrue(cache._db_versions_supported)
+
+        # Entries are not served while versions are unknown
+        results = cache.ResultCache(max_entries=4, ttl_seconds=60)
+        results.set('key', 'value', ('lead',))
+        self.assertIs(results.get('key'), cache._MISSING)
+
+        cache._db_versions_polled_at = 0.0
+        self.assertEqual(cache.db_table_versions(max_age=60), {})   # SQLite: no such table
+        self.assertFalse(cache._db_versions_supported)
+
+    def test_cache_stats_endpoint(self):
+        """Test that cache counters are exposed over the API"""
+        response = self.app.get('/api/analytics/cache-stats')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        for field in ('hits', 'misses', 'size', 'evictions', 'invalidations'):
+            self.assertIn(field, data)
+
+
+class TestLeadSearch(TestAPIBase):
+    """Test indexed lead search (FTS5 on the SQLite fallback)"""
+
+    def create_test_data(self):
+        """Create leads with overlapping names, companies and emails"""
+        for full_name, company_name, email in (
+            ("Alice Johnson", "Acme Corp", "alice@acme.io"),
+            ("Bob Stone", "Johnson Capital", "bob@jc.io"),
+            ("Carol White", "Wonder Labs", "carol@wonder.io"),
+        ):
+            db.session.add(Lead(full_name=full_name, company_name=company_name, email=email,
+                                source="event", status="1. lead generated",
+                                bd_in_charge="demo_user", type="otc"))
+        db.session.commit()
+
+    def _search(self, query):
+        response = self.app.get(f'/api/leads?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [lead['full_name'] for lead in json.loads(response.data)['leads']]
+
+    def test_substring_search_across_columns(self):
+        """Test that search matches substrings of name, company and email"""
+        self.assertEqual(sorted(self._search('search=johns')), ['Alice Johnson', 'Bob Stone'])
+        self.assertEqual(self._search('search=WONDER.io'), ['Carol White'])
+        self.assertEqual(sorted(self._search('search=io')), ['Alice Johnson', 'Bob Stone', 'Carol White'])
+
+    def test_search_index_follows_writes(self):
+        """Test that updated and deleted leads are reflected in search"""
+        lead = Lead.query.filter_by(full_name="Carol White").first()
+        lead.company_name = "Johnson Wonder"
+        db.session.commit()
+        self.assertIn('Carol White', self._search('search=johnson'))
+
+        db.session.delete(lead)
+        db.session.commit()
+        self.assertNotIn('Carol White', self._search('search=johnson'))
+
+    def test_index_check_once_and_like_fallback(self):
+        """Test that the FTS5 index is checked once and LIKE is used without trigram support"""
+        from sqlalchemy import event
+        from api.services import lead_search
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            self._search('search=johns')
+            self._search('search=wonder')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertLessEqual(sum('sqlite_master' in s for s in statements), 1)
+
+        with patch.object(lead_search, '_sqlite_trigram', False):
+            self.assertEqual(sorted(self._search('search=johns')), ['Alice Johnson', 'Bob Stone'])
+
+    def test_ranked_search(self):
+        """Test that rank=true orders by relevance and cannot be combined with cursors"""
+        names = self._search('search=acme&rank=true')
+        self.assertEqual(names, ['Alice Johnson'])
+        self.assertEqual(len(self._search('search=johnson&sort_by=relevance')), 2)
+
+        response = self.app.get('/api/leads?search=acme&rank=true&cursor=')
+        self.assertEqual(response.status_code, 400)
+
+
+class TestListCounts(TestAPIBase):
+    """Test cached and estimated totals on list endpoints"""
+
+    def create_test_data(self):
+        """Create a few leads so there is more than one page"""
+        for i in range(3):
+            db.session.add(Lead(full_name=f"Count Lead {i}", email=f"count{i}@example.com",
+                                source="event", status="1. lead generated",
+                                bd_in_charge="demo_user", type="otc"))
+        db.session.commit()
+
+    def _count_statements(self, url):
+        from sqlalchemy import event
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = self.app.get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(response.status_code, 200)
+        counts = [s for s in statements if 'count(' in s.lower()]
+        return json.loads(response.data), counts
+
+    def test_total_is_cached_until_write(self):
+        """Test that page turns reuse the cached total and writes refresh it"""
+        first, counts = self._count_statements('/api/leads?page=1&per_page=1')
+        self.assertEqual(len(counts), 1)
+        again, counts = self._count_statements('/api/leads?page=2&per_page=1')
+        self.assertEqual(counts, [])
+        self.assertEqual(again['total'], first['total'])
+
+        db.session.add(Lead(full_name="Count Lead 3", email="count3@example.com",
+                            source="event", status="1. lead generated",
+                            bd_in_charge="demo_user", type="otc"))
+        db.session.commit()
+        after, counts = self._count_statements('/api/leads?page=1&per_page=1')
+        self.assertEqual(len(counts), 1)
+        self.assertEqual(after['total'], first['total'] + 1)
+
+    def test_count_mode(self):
+        """Test count=estimate falls back to exact totals off Postgres and bad modes are rejected"""
+        data, _ = self._count_statements('/api/leads?count=estimate')
+        self.assertEqual(data['total'], Lead.query.count())
+        self.assertFalse(data['total_is_estimate'])
+
+        self.assertEqual(self.app.get('/api/leads?count=fuzzy').status_code, 400)
+        self.assertEqual(self.app.get('/api/activities?count=fuzzy').status_code, 400)
+
+
+class TestConditionalGet(TestAPIBase):
+    """Test ETag / If-None-Match handling on read endpoints"""
+
+    def test_not_modified_until_write(self):
+        """Test that a matching ETag gets 304 until the table is written"""
+        response = self.app.get('/api/leads?per_page=5')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertFalse(etag.startswith('W/'))
+
+        cached = self.app.get('/api/leads?per_page=5', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b'')
+        self.assertEqual(cached.headers['ETag'], etag)
+
+        # A different query is a different representation
+        other = self.app.get('/api/leads?per_page=10', headers={'If-None-Match': etag})
+        self.assertEqual(other.status_code, 200)
+
+        db.session.add(Lead(full_name="ETag Lead", email="etag@example.com",
+                            source="event", status="1. lead generated",
+                            bd_in_charge="demo_user", type="otc"))
+        db.session.commit()
+        changed = self.app.get('/api/leads?per_page=5', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_customer_etag_follows_linked_lead(self):
+        """Test that changing a customer's primary lead invalidates the customer ETag"""
+        lead = Lead(full_name="Linked Lead", email="linked@example.com", source="event",
+                    status="5. integration", bd_in_charge="demo_user", type="otc",
+                    is_converted=True)
+        db.session.add(lead)
+        db.session.flush()
+        db.session.add(Customer(customer_uid=4000, name="Linked Customer"))
+        db.session.add(Contact(customer_uid=4000, lead_id=lead.lead_id))
+        db.session.commit()
+
+        response = self.app.get('/api/customers/4000')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertEqual(
+            self.app.get('/api/customers/4000', headers={'If-None-Match': etag}).status_code, 304
+        )
+
+        updated = self.app.put(f'/api/leads/{lead.lead_id}',
+                               data=json.dumps({'status': '6. closed won'}),
+                               content_type='application/json')
+        self.assertEqual(updated.status_code, 200)
+
+        changed = self.app.get('/api/customers/4000', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(json.loads(changed.data)['customer']['lead_status'], '6. closed won')
+
+    def test_unreadable_versions_skip_not_modified(self):
+        """Test that a transient version poll failure serves a full response"""
+        response = self.app.get('/api/leads?per_page=5')
+        etag = response.headers['ETag']
+        with patch('api.utils.conditional.table_version_token', return_value=None):
+            response = self.app.get('/api/leads?per_page=5', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_analytics_and_content_hash_etags(self):
+        """Test ETags on analytics resources and the content-hash fallback"""
+        response = self.app.get('/api/analytics/lead-funnel')
+        etag = response.headers['ETag']
+        cached = self.app.get('/api/analytics/lead-funnel', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+
+        # Endpoints without a table version still revalidate on their body
+        response = self.app.get('/api/health')
+        etag = response.headers['ETag']
+        cached = self.app.get('/api/health', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_errors_are_not_tagged(self):
+        """Test that error responses carry no ETag"""
+        response = self.app.get('/api/leads/99999')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+
+class TestExport(TestAPIBase):
+    """Test streaming bulk export"""
+
+    def create_test_data(self):
+        """Create leads owned by two BDs"""
+        for i in range(5):
+            db.session.add(Lead(full_name=f"Export Lead {i}", email=f"export{i}@example.com",
+                                source="event", status="1. lead generated",
+                                bd_in_charge="demo_user" if i % 2 else "other_bd", type="otc"))
+        db.session.commit()
+
+    def test_csv_and_ndjson(self):
+        """Test CSV and NDJSON exports stream every (filtered) row"""
+        response = self.app.get('/api/export/leads?format=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+        lines = response.data.decode('utf-8').strip().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['lead_id', 'full_name'])
+        self.assertEqual(len(lines), 6)
+
+        response = self.app.get('/api/export/leads?format=ndjson&bd_in_charge=demo_user')
+        rows = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(all(row['bd_in_charge'] == 'demo_user' for row in rows))
+
+    def test_parquet_row_groups(self):
+        """Test that Parquet exports write one row group per cursor batch"""
+        import io
+        import pyarrow.parquet as pq
+        from api.services.export_service import stream_export
+
+        parquet = pq.ParquetFile(io.BytesIO(b''.join(stream_export('leads', 'parquet', batch_size=2))))
+        self.assertEqual(parquet.metadata.num_rows, 5)
+        self.assertEqual(parquet.metadata.num_row_groups, 3)
+
+        response = self.app.get('/api/export/leads?format=parquet')
+        self.assertEqual(pq.read_table(io.BytesIO(response.data)).num_rows, 5)
+
+    def test_invalid_entity_and_format(self):
+        """Test unknown entities and formats are rejected"""
+        self.assertEqual(self.app.get('/api/export/unknown').status_code, 404)
+        self.assertEqual(self.app.get('/api/export/leads?format=xml').status_code, 400)
+
+
+class TestLeadBatch(TestAPIBase):
+    """Test batch lead create/update"""
+
+    def _lead(self, i, **overrides):
+        lead = {'full_name': f"Batch Lead {i}", 'email': f"batch{i}@example.com",
+                'source': 'event', 'status': '1. lead generated',
+                'bd_in_charge': 'demo_user', 'type': 'otc'}
+        lead.update(overrides)
+        return lead
+
+    def test_batch_create(self):
+        """Test that valid leads are inserted together and invalid ones reported per item"""
+        from sqlalchemy import event
+        inserts = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith('INSERT INTO LEAD'):
+                inserts.append(statement)
+
+        items = [self._lead(i) for i in range(50)]
+        items.insert(3, self._lead(99, source='carrier pigeon'))
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = self.app.post('/api/leads/batch', json={'leads': items})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        self.assertEqual(response.status_code, 207)
+        data = json.loads(response.data)
+        self.assertEqual((data['succeeded'], data['failed']), (50, 1))
+        self.assertEqual(data['results'][3]['status'], 'error')
+        self.assertIn('source', data['results'][3]['errors'])
+        self.assertEqual(len(inserts), 1)
+
+        created = data['results'][4]
+        self.assertEqual(Lead.query.get(created['lead_id']).full_name, "Batch Lead 3")
+        self.assertEqual(Lead.query.count(), 51)
+
+    def test_batch_update(self):
+        """Test partial batch updates with unknown and duplicate ids"""
+        lead_id = Lead.query.first().lead_id
+        response = self.app.patch('/api/leads/batch', json=[
+            {'lead_id': lead_id, 'status': '2. proposal'},
+            {'lead_id': 99999, 'status': '2. proposal'},
+            {'lead_id': lead_id, 'country': 'SG'},
+            {'status': '2. proposal'}
+        ])
+        self.assertEqual(response.status_code, 207)
+        results = json.loads(response.data)['results']
+        self.assertEqual([r['status'] for r in results], ['updated', 'error', 'error', 'error'])
+        db.session.expire_all()
+        self.assertEqual(Lead.query.get(lead_id).status, '2. proposal')
+
+        response = self.app.patch('/api/leads/batch', json=[{'lead_id': lead_id, 'country': 'SG'}])
+        self.assertEqual(response.status_code, 200)
+
+    def test_batch_rejects_empty_payload(self):
+        """Test that an empty batch is a validation error"""
+        self.assertEqual(self.app.post('/api/leads/batch', json=[]).status_code, 400)
+        self.assertEqual(self.app.patch('/api/leads/batch', json={'leads': 'nope'}).status_code, 400)
+
+    def test_batch_convert(self):
+        """Test batch conversion with per-item outcomes"""
+        lead_ids = [Lead.query.first().lead_id]
+        for i in range(2):
+            lead = Lead(**self._lead(i))
+            db.session.add(lead)
+            db.session.commit()
+            lead_ids.append(lead.lead_id)
+        db.session.add(Customer(customer_uid=500, name="Existing Customer"))
+        db.session.commit()
+
+        response = self.app.post('/api/leads/batch/convert', json={'conversions': [
+            {'lead_id': lead_ids[0], 'customer': {'customer_uid': 101, 'name': 'First'}},
+            {'lead_id': lead_ids[1], 'customer': {'customer_uid': 102, 'name': 'Second', 'type': 'otc'}},
+            {'lead_id': lead_ids[2], 'customer': {'customer_uid': 500, 'name': 'Taken'}},
+            {'lead_id': 99999, 'customer': {'customer_uid': 103, 'name': 'Missing'}},
+            {'lead_id': lead_ids[0], 'customer': {'customer_uid': 104, 'name': 'Duplicate'}},
+            {'lead_id': lead_ids[2], 'customer': {'name': 'No UID'}}
+        ]})
+        self.assertEqual(response.status_code, 207)
+        results = json.loads(response.data)['results']
+        self.assertEqual([r['status'] for r in results],
+                         ['converted', 'converted', 'error', 'error', 'error', 'error'])
+        self.assertIn('customer_uid', results[2]['errors'])
+
+        db.session.expire_all()
+        self.assertTrue(Lead.query.get(lead_ids[0]).is_converted)
+        self.assertFalse(Lead.query.get(lead_ids[2]).is_converted)
+        contact = Contact.query.get(results[1]['contact_id'])
+        self.assertEqual((contact.lead_id, contact.customer_uid), (lead_ids[1], 102))
+
+        # Converting again is reported per item, not as a request failure
+        response = self.app.post('/api/leads/batch/convert', json=[
+            {'lead_id': lead_ids[0], 'customer': {'customer_uid': 105, 'name': 'Again'}}
+        ])
+        self.assertEqual(json.loads(response.data)['results'][0]['status'], 'error')
+
+
+class TestBackgroundJobs(TestAPIBase):
+    """Test the background job runner and /api/jobs"""
+
+    def test_job_lifecycle(self):
+        """Test that submitted jobs report progress and results"""
+        from api.services.jobs import job_runner
+
+        def work(job, count):
+            job.update(0.5, 'Counting leads')
+            return {'status': 'success', 'leads': Lead.query.count() + count}
+
+        job = job_runner.submit('test:count', work, 1)
+        job_runner.wait(job.id, timeout=10)
+
+        response = self.app.get(f'/api/jobs/{job.id}')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['status'], 'succeeded')
+        self.assertEqual(data['progress'], 1.0)
+        self.assertEqual(data['result']['leads'], 2)
+        self.assertIn(job.id, [j['job_id'] for j in json.loads(self.app.get('/api/jobs').data)['jobs']])
+
+    def test_failed_jobs(self):
+        """Test that exceptions and error results mark jobs failed"""
+        from api.services.jobs import job_runner
+
+        def crash(job):
+            raise RuntimeError('boom')
+
+        def error(job):
+            return {'status': 'error', 'error': 'script failed'}
+
+        for func, message in ((crash, 'boom'), (error, 'script failed')):
+            job = job_runner.wait(job_runner.submit('test:fail', func).id, timeout=10)
+            self.assertEqual((job.status, job.error), ('failed', message))
+
+        self.assertEqual(self.app.get('/api/jobs/unknown').status_code, 404)
+
+
+class TestStaticAssets(TestAPIBase):
+    """Test the React build file layer (cache headers, precompressed variants)"""
+
+    def setUp(self):
+        super().setUp()
+        from api.utils.static_assets import StaticAssets
+        self.build_dir = tempfile.TemporaryDirectory()
+        files = {
+            'index.html': b'<html>app</html>',
+            'static/js/main.e14791c1.js': b'console.log(1);' * 100,
+            'static/js/main.e14791c1.js.gz': b'gzipped',
+        }
+        for name, data in files.items():
+            path = os.path.join(self.build_dir.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        self.assets = StaticAssets(self.build_dir.name)
+        self.assets.scan()
+
+    def tearDown(self):
+        self.build_dir.cleanup()
+        super().tearDown()
+
+    def _serve(self, path, headers=None):
+        with app.test_request_context('/' + path, headers=headers or {}):
+            response = self.assets.serve(path)
+            response.direct_passthrough = False
+            data = response.get_data()
+            response.close()
+            return response, data
+
+    def test_hashed_asset_is_immutable(self):
+        """Test that content-hashed files are cached for a year, index.html is revalidated"""
+        response, data = self._serve('static/js/main.e14791c1.js')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertEqual(response.content_length, len(data))
+        index, _ = self._serve('')
+        self.assertEqual(index.headers['Cache-Control'], 'no-cache')
+
+    def test_precompressed_variant_and_revalidation(self):
+        """Test that .gz is sent when accepted and a matching ETag gets a 304"""
+        response, data = self._serve('static/js/main.e14791c1.js', {'Accept-Encoding': 'gzip, br;q=0'})
+        self.assertEqual(response.content_encoding, 'gzip')
+        self.assertEqual(data, b'gzipped')
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+
+        etag = response.headers['ETag']
+        cached, _ = self._serve('static/js/main.e14791c1.js',
+                                {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_spa_fallback_and_missing_asset(self):
+        """Test that client routes get index.html and missing hashed files 404"""
+        from werkzeug.exceptions import NotFound
+        _, data = self._serve('leads/42')
+        self.assertEqual(data, b'<html>app</html>')
+        with self.assertRaises(NotFound):
+            self._serve('static/js/main.deadbeef.js')
+
 
 class TestErrorHandling(TestAPIBase):
     """Test error handling and edge cases"""
@@ -283,5 +1169,93 @@ class TestDatabaseOperations(TestAPIBase):
             self.assertEqual(response.status_code, 400)
 
 
+class TestActivityAnalyticsGroupingSets(PostgresTestCase):
+    """Test that the single GROUPING SETS scan matches separate per-group queries"""
+
+    # The total / by-type / by-status queries the GROUPING SETS scan replaced
+    PER_GROUP_SQL = {
+        'total': """
+            SELECT TO_CHAR(DATE_TRUNC('{trunc}', date_created), '{fmt}') AS period, assigned_to, COUNT(*)
+            FROM activity WHERE activity_category = 'manual' {bd}
+            GROUP BY 1, 2
+        """,
+        'activity_by_type': """
+            SELECT TO_CHAR(DATE_TRUNC('{trunc}', date_created), '{fmt}') AS period, assigned_to, activity_type, COUNT(*)
+            FROM activity WHERE activity_category = 'manual' {bd}
+            GROUP BY 1, 2, 3
+        """,
+        'activity_by_status': """
+            SELECT TO_CHAR(DATE_TRUNC('{trunc}', date_created), '{fmt}') AS period, assigned_to, status, COUNT(*)
+            FROM activity WHERE activity_category = 'manual' {bd}
+            GROUP BY 1, 2, 3
+        """,
+    }
+    FORMATS = {'day': 'YYYY-MM-DD', 'week': 'IYYY-IW', 'month': 'YYYY-MM'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from api.app import create_app
+        cls.pg_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': cls.url})
+
+    def setUp(self):
+        self.app_context = self.pg_app.app_context()
+        self.app_context.push()
+
+        from api.utils.cache import clear_caches
+        clear_caches()
+
+        db.session.execute(text("""
+            INSERT INTO lead (lead_id, full_name, source, bd_in_charge, type)
+            VALUES (1, 'Lead One', 'linkedin', 'alice', 'Prospect'), (2, 'Lead Two', 'referral', 'bob', 'Prospect')
+        """))
+        db.session.execute(text("""
+            INSERT INTO activity (lead_id, activity_type, status, assigned_to, date_created, due_date)
+            SELECT 1 + i % 2,
+                   (ARRAY['call', 'email', 'meeting'])[1 + i % 3],
+                   (ARRAY['completed', 'pending', 'cancelled'])[1 + (i / 3) % 3],
+                   CASE WHEN i % 7 = 0 THEN NULL WHEN i % 2 = 0 THEN 'alice' ELSE 'bob' END,
+                   TIMESTAMP '2025-01-01' + i * INTERVAL '29 hours',
+                   TIMESTAMP '2025-06-01'
+            FROM generate_series(1, 120) AS i
+        """))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.execute(text("TRUNCATE activity, lead CASCADE"))
+        db.session.commit()
+        db.session.remove()
+        self.app_context.pop()
+
+    def per_group(self, group_by, bd_in_charge=None):
+        bd = "AND assigned_to = :bd" if bd_in_charge else ""
+        params = {'bd': bd_in_charge} if bd_in_charge else {}
+        expected = {}
+        for key, sql in self.PER_GROUP_SQL.items():
+            sql = sql.format(trunc=group_by, fmt=self.FORMATS[group_by], bd=bd)
+            for row in db.session.execute(text(sql), params):
+                entry = expected.setdefault((row[0], row[1]), {
+                    'period': row[0], 'bd_in_charge': row[1], 'total_activities': None,
+                    'activity_by_type': {}, 'activity_by_status': {}
+                })
+                if key == 'total':
+                    entry['total_activities'] = row[2]
+                else:
+                    entry[key][row[2]] = row[3]
+        return expected
+
+    def test_matches_per_group_queries(self):
+        """Test every granularity, with and without a BD filter"""
+        from api.services.analytics_service import get_activity_analytics
+        for group_by in ('day', 'week', 'month'):
+            for bd_in_charge in (None, 'alice'):
+                with self.subTest(group_by=group_by, bd_in_charge=bd_in_charge):
+                    result = get_activity_analytics(bd_in_charge=bd_in_charge, group_by=group_by)
+                    self.assertIsInstance(result, list)
+                    expected = self.per_group(group_by, bd_in_charge)
+                    self.assertEqual({(row['period'], row['bd_in_charge']): row for row in result}, expected)
+                    self.assertEqual(len(result), len(expected))
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Load benchmark tests for LeadFi CRM
+Tests the deterministic data generators and the baseline comparison
+"""
+
+import unittest
+
+# Add project root to path
+import sys
+from pathlib import Path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """Test the load benchmark generator and baseline comparison"""
+
+    def setUp(self):
+        sys.path.insert(0, str(project_root / 'scripts'))
+        import benchmark_api
+        self.benchmark = benchmark_api
+
+    def test_generator_is_deterministic(self):
+        """Test that the same seed produces the same leads"""
+        import random
+        config = dict(self.benchmark.SCALES['small'], leads=50)
+        start = self.benchmark.ANCHOR_DATE.replace(year=2024)
+        first = next(self.benchmark.generate_leads(random.Random(7), config, start))
+        second = next(self.benchmark.generate_leads(random.Random(7), config, start))
+        self.assertEqual(first, second)
+        self.assertEqual([row['lead_id'] for row in first], list(range(1, 51)))
+
+    def test_vectorized_generators_are_seeded(self):
+        """Test that NumPy-generated chunks repeat per seed and stay within column limits"""
+        import numpy as np
+        from datetime import date, datetime
+        import synthetic_data
+
+        def trading(seed):
+            rng = np.random.default_rng(seed)
+            return list(synthetic_data.daily_trading_volume(rng, [1, 2, 3], date(2025, 1, 1), date(2025, 3, 31),
+                                                            chunk_rows=100))
+
+        first, second = trading(1), trading(1)
+        self.assertGreater(len(first), 1)  # chunked
+        self.assertTrue(all(a.equals(b) for a, b in zip(first, second)))
+        self.assertLessEqual(max(t['spot_taker_fees'].to_numpy().max() for t in first), synthetic_data.MAX_FEES)
+
+        rng = np.random.default_rng(1)
+        created = [datetime(2025, 1, 1), datetime(2025, 2, 1)]
+        table = next(synthetic_data.activities(rng, [10, 11], created, ['Alex Chen', 'Lisa Wang'],
+                                               end=datetime(2025, 6, 1)))
+        rows = table.to_pylist()
+        for lead_id, lead_created in zip([10, 11], created):
+            lead_rows = [row for row in rows if row['lead_id'] == lead_id]
+            self.assertEqual(lead_rows[0]['activity_type'], 'lead_created')
+            self.assertEqual(lead_rows[0]['date_created'], lead_created)
+
+    def test_error_bodies_count_as_errors(self):
+        """Test that a 200 carrying an error body is counted as a failed request"""
+        from unittest.mock import Mock
+        ok = Mock(status_code=200, spec=['status_code', 'json'])
+        ok.json.return_value = [{'period': '2025-01'}]
+        failed = Mock(status_code=200, spec=['status_code', 'json'])
+        failed.json.return_value = {'error': 'Monthly lead conversion rate error: ...'}
+        self.assertFalse(self.benchmark.is_error(ok))
+        self.assertTrue(self.benchmark.is_error(failed))
+        self.assertTrue(self.benchmark.is_error(Mock(status_code=500)))
+
+    def test_compare_flags_regressions(self):
+        """Test that a slower p95 or new errors fail the baseline comparison"""
+        baseline = {'scenarios': {'leads_list': self.benchmark.summarize([10.0] * 100, 0, 1.0)}}
+        same = {'scenarios': {'leads_list': self.benchmark.summarize([10.5] * 100, 0, 1.0)}}
+        slower = {'scenarios': {'leads_list': self.benchmark.summarize([30.0] * 100, 2, 1.0)}}
+        self.assertEqual(self.benchmark.compare(same, baseline), [])
+        regressions = self.benchmark.compare(slower, baseline)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(len(regressions[0]['problems']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,9 @@ Tests database schema, migrations, data integrity, and PostgreSQL-specific featu
 import unittest
 import tempfile
 import os
+import json
 import sqlite3
+import subprocess
 from pathlib import Path
 
 # Add project root to path
@@ -14,6 +16,8 @@ import sys
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
+from sqlalchemy import text
+
 from db.db_config import engine, get_db_url, db
 from api.app import app
 from api.models.lead import Lead
@@ -21,6 +25,7 @@ from api.models.customer import Customer
 from api.models.activity import Activity
 from api.models.contact import Contact
 from api.models.trading_volume import TradingVolume
+from tests.postgres import PostgresTestCase
 
 
 class TestDatabaseSchema(unittest.TestCase):
@@ -363,5 +368,143 @@ class TestDatabaseBackup(unittest.TestCase):
             os.unlink(db_path)
 
 
+class TestConnectionPool(unittest.TestCase):
+    """Test the shared engine factory and pool statistics"""
+
+    def setUp(self):
+        """Set up test database and client"""
+        self.db_fd, self.db_path = tempfile.mkstemp()
+
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{self.db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def test_flask_and_etl_share_one_engine(self):
+        """Test that Flask-SQLAlchemy and the module-level engine use the same pool"""
+        from db.db_config import create_db_engine
+        self.assertIs(db.engine, engine)
+        self.assertIs(create_db_engine(str(engine.url)), engine)
+
+    def test_conflicting_engine_options_warn(self):
+        """Test that asking a cached engine for different pool options logs a warning"""
+        from db.db_config import create_db_engine
+        url = str(engine.url)
+        with self.assertLogs('db.db_config', level='WARNING') as logs:
+            self.assertIs(create_db_engine(url, pool_size=engine.pool.size() + 1), engine)
+        self.assertIn('pool_size', logs.output[0])
+
+        with self.assertNoLogs('db.db_config', level='WARNING'):
+            create_db_engine(url, echo=False, pool_size=engine.pool.size())
+
+    def test_engine_options_from_environment(self):
+        """Test pool tuning from DB_* environment variables"""
+        from unittest import mock
+        from db.db_config import get_engine_options
+        env = {'DB_POOL_SIZE': '7', 'DB_MAX_OVERFLOW': '3', 'DB_POOL_RECYCLE': '60',
+               'DB_STATEMENT_TIMEOUT_MS': '15000'}
+        with mock.patch.dict(os.environ, env):
+            options = get_engine_options('postgresql://user:pw@localhost/leadfi')
+            memory_options = get_engine_options('sqlite://')
+            path_options = get_engine_options('postgresql://user:pw@localhost/leadfi?options=-csearch_path%3Dcrm')
+        self.assertEqual((options['pool_size'], options['max_overflow'], options['pool_recycle']), (7, 3, 60))
+        self.assertEqual(options['connect_args'], {'options': '-c statement_timeout=15000'})
+        self.assertEqual(path_options['connect_args'], {'options': '-csearch_path=crm -c statement_timeout=15000'})
+        self.assertNotIn('pool_size', memory_options)
+
+    def test_pool_stats_endpoint(self):
+        """Test that pool statistics are exposed"""
+        response = self.app.get('/api/db-pool-stats')
+        self.assertEqual(response.status_code, 200)
+        pool = json.loads(response.data)['pool']
+        for key in ('size', 'checked_out', 'overflow', 'avg_wait_ms', 'timeouts'):
+            self.assertIn(key, pool)
+        self.assertGreater(pool['checkouts'], 0)
+
+    def test_import_is_side_effect_free(self):
+        """Test that importing the app builds no app, engine or optional heavy modules"""
+        probe = (
+            "import sys, api.app, db.db_config as c; "
+            "print(len(c._engines), api.app._app is None, 'numpy' in sys.modules, 'pyarrow' in sys.modules)"
+        )
+        root = Path(__file__).resolve().parent.parent
+        output = subprocess.run([sys.executable, '-c', probe], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.split()
+        self.assertEqual(output, ['0', 'True', 'False', 'False'])
+
+
+class TestTradingVolumeFactSync(PostgresTestCase):
+    """Test that the init.sql triggers keep trading_volume_fact in step with daily_trading_volume"""
+
+    # Long format derived straight from the source rows, as the fact table should hold it
+    EXPECTED_SQL = """
+        SELECT d.date, d.customer_uid, v.trade_type, v.trade_side, v.volume, v.fees, c.name, c.bd_in_charge
+        FROM daily_trading_volume d
+        JOIN customer c ON c.customer_uid = d.customer_uid
+        CROSS JOIN LATERAL (VALUES
+            ('spot', 'maker', d.spot_maker_trading_volume, d.spot_maker_fees),
+            ('spot', 'taker', d.spot_taker_trading_volume, d.spot_taker_fees),
+            ('futures', 'maker', d.futures_maker_trading_volume, d.futures_maker_fees),
+            ('futures', 'taker', d.futures_taker_trading_volume, d.futures_taker_fees)
+        ) AS v(trade_type, trade_side, volume, fees)
+        WHERE v.volume > 0
+    """
+    FACT_SQL = """
+        SELECT date, customer_uid, trade_type, trade_side, volume, fees, customer_name, bd_in_charge
+        FROM trading_volume_fact
+    """
+
+    def assertFactInSync(self, conn):
+        expected = set(conn.execute(text(self.EXPECTED_SQL)).fetchall())
+        self.assertEqual(set(conn.execute(text(self.FACT_SQL)).fetchall()), expected)
+        return expected
+
+    def test_insert_update_delete(self):
+        """Test that every write to daily_trading_volume is reflected in the fact rows"""
+        with self.engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                conn.execute(text("""
+                    INSERT INTO customer (customer_uid, name, bd_in_charge)
+                    VALUES (1, 'Acme', 'Alex'), (2, 'Globex', 'Lisa')
+                """))
+                conn.execute(text("""
+                    INSERT INTO daily_trading_volume (customer_uid, date, spot_maker_trading_volume, spot_maker_fees,
+                                                      futures_taker_trading_volume, futures_taker_fees)
+                    VALUES (1, '2025-01-01', 100, 1, 0, 0),
+                           (1, '2025-01-02', 50, 0.5, 20, 0.2),
+                           (2, '2025-01-01', NULL, NULL, 70, 0.7)
+                """))
+                self.assertEqual(len(self.assertFactInSync(conn)), 4)
+
+                conn.execute(text("""
+                    UPDATE daily_trading_volume
+                    SET spot_maker_trading_volume = 0, futures_taker_trading_volume = 30
+                    WHERE customer_uid = 1 AND date = '2025-01-01'
+                """))
+                conn.execute(text("UPDATE daily_trading_volume SET date = '2025-01-03' WHERE customer_uid = 2"))
+                self.assertEqual(len(self.assertFactInSync(conn)), 4)
+
+                conn.execute(text("UPDATE customer SET name = 'Acme Ltd', bd_in_charge = 'Lisa' WHERE customer_uid = 1"))
+                self.assertFactInSync(conn)
+
+                conn.execute(text("DELETE FROM daily_trading_volume WHERE date = '2025-01-02'"))
+                self.assertEqual(len(self.assertFactInSync(conn)), 2)
+            finally:
+                trans.rollback()
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
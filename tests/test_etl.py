@@ -0,0 +1,142 @@
+"""
+ETL tests for LeadFi CRM
+Tests the staged, set-based lead load and its reject reasons
+"""
+
+import unittest
+
+import pandas as pd
+from sqlalchemy import text
+
+# Add project root to path
+import sys
+from pathlib import Path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from etl.load import (
+    _reject_reasons, load_leads_staged,
+    REJECT_REQUIRED, REJECT_TOO_LONG, REJECT_INVALID, REJECT_DUPLICATE
+)
+from tests.postgres import PostgresTestCase
+
+# information_schema rows for lead: (data_type, max_length, nullable, default)
+LEAD_META = {
+    'full_name': ('character varying', 50, False, None),
+    'email': ('character varying', 120, True, None),
+    'telegram': ('character varying', 50, True, None),
+    'source': ('character varying', 50, False, None),
+    'bd_in_charge': ('character varying', 20, False, None),
+    'type': ('character varying', 50, False, None),
+    'background': ('text', None, True, None),
+    'is_converted': ('boolean', None, True, 'false'),
+    'date_created': ('timestamp without time zone', None, False, 'CURRENT_TIMESTAMP'),
+    'customer_uid': ('integer', None, True, None),
+}
+
+
+class TestRejectReasons(unittest.TestCase):
+    """Test the CASE branches built from the lead column definitions"""
+
+    def branches(self, *columns):
+        return _reject_reasons(list(columns), LEAD_META)
+
+    def test_required_only_without_default(self):
+        """Test that NOT NULL columns without a default must be present"""
+        self.assertIn(
+            f"WHEN s.\"full_name\" IS NULL THEN ARRAY['{REJECT_REQUIRED}', 'full_name is required']",
+            self.branches('full_name')
+        )
+        self.assertFalse(any('IS NULL' in branch for branch in self.branches('date_created', 'email')))
+
+    def test_length_limit(self):
+        """Test that varchar columns are checked against their length"""
+        self.assertIn(
+            f"WHEN length(s.\"telegram\") > 50 THEN ARRAY['{REJECT_TOO_LONG}', "
+            f"'telegram is longer than 50 characters']",
+            self.branches('telegram')
+        )
+        self.assertEqual(self.branches('background'), [])
+
+    def test_boolean_values(self):
+        """Test that booleans only accept the spellings Postgres casts"""
+        [branch] = self.branches('is_converted')
+        self.assertTrue(branch.startswith("WHEN lower(s.\"is_converted\") NOT IN ('true', 'false', 't', 'f'"))
+        self.assertTrue(branch.endswith(f"THEN ARRAY['{REJECT_INVALID}', 'is_converted is not true/false']"))
+
+    def test_integer_pattern_then_cast(self):
+        """Test that integers are checked for digits before the range cast"""
+        pattern, cast = self.branches('customer_uid')
+        self.assertIn("s.\"customer_uid\" !~ '^-?[0-9]+$'", pattern)
+        self.assertIn("'customer_uid is not a whole number'", pattern)
+        self.assertIn("NOT pg_temp.castable(s.\"customer_uid\", 'integer')", cast)
+        self.assertIn(f"ARRAY['{REJECT_INVALID}', 'customer_uid is out of range']", cast)
+
+    def test_date_pattern_then_cast(self):
+        """Test that dates are checked for shape, then for a valid calendar date"""
+        pattern, cast = self.branches('date_created')
+        self.assertIn("s.\"date_created\" !~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}'", pattern)
+        self.assertIn("NOT pg_temp.castable(s.\"date_created\", 'timestamp without time zone')", cast)
+        self.assertIn(f"ARRAY['{REJECT_INVALID}', 'date_created is not a valid date']", cast)
+
+    def test_existing_email_and_telegram(self):
+        """Test that email and telegram are matched case-insensitively against existing leads"""
+        branches = self.branches('email', 'telegram', 'full_name')
+        for col in ('email', 'telegram'):
+            self.assertIn(
+                f"WHEN lower(s.\"{col}\") IN (SELECT lower(l.\"{col}\") FROM lead l WHERE l.\"{col}\" IS NOT NULL) "
+                f"THEN ARRAY['{REJECT_DUPLICATE}', '{col} already exists']",
+                branches
+            )
+        # Duplicate checks come last, after every per-value check
+        self.assertTrue(branches[-1].endswith(f"'{REJECT_DUPLICATE}', 'telegram already exists']"))
+
+
+class TestStagedLeadLoad(PostgresTestCase):
+    """Test load_leads_staged against the init.sql lead table"""
+
+    def test_inserts_valid_rows_and_rejects_the_rest(self):
+        """Test that one load inserts the valid rows and returns a reject code for each other row"""
+        base = {'full_name': 'Lead', 'email': None, 'source': 'linkedin', 'bd_in_charge': 'Alex',
+                'type': 'Prospect', 'is_converted': 'false', 'date_created': '2025-03-01'}
+        rows = {
+            2: dict(base, email='new@example.com'),
+            3: dict(base, full_name=None),
+            4: dict(base, full_name='x' * 51),
+            5: dict(base, is_converted='maybe'),
+            6: dict(base, date_created='2025-02-30'),
+            7: dict(base, email='TAKEN@example.com'),
+            8: dict(base, email='other@example.com', date_created='2025-03-02 10:30:00'),
+        }
+        df = pd.DataFrame.from_dict(rows, orient='index')
+
+        with self.engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                conn.execute(text("""
+                    INSERT INTO lead (full_name, email, source, bd_in_charge, type)
+                    VALUES ('Existing', 'taken@example.com', 'referral', 'Alex', 'Prospect')
+                """))
+                inserted, rejected = load_leads_staged(df, conn)
+
+                self.assertEqual(sorted(inserted), [2, 8])
+                self.assertEqual({idx: code for idx, (code, message) in rejected.items()}, {
+                    3: REJECT_REQUIRED,
+                    4: REJECT_TOO_LONG,
+                    5: REJECT_INVALID,
+                    6: REJECT_INVALID,
+                    7: REJECT_DUPLICATE,
+                })
+                self.assertEqual(rejected[6][1], 'date_created is not a valid date')
+
+                stored = conn.execute(text(
+                    "SELECT lead_id, email FROM lead WHERE lead_id IN :ids ORDER BY lead_id"
+                ).bindparams(ids=tuple(inserted.values()))).fetchall()
+                self.assertEqual([row.email for row in stored], ['new@example.com', 'other@example.com'])
+                self.assertEqual(conn.execute(text("SELECT COUNT(*) FROM lead")).scalar(), 3)
+            finally:
+                trans.rollback()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Test data generator tests for LeadFi CRM
+Tests the COPY encoding and that every insert method loads the same rows
+"""
+
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+# Add project root to path
+import sys
+from pathlib import Path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.insert(0, str(project_root / 'scripts'))
+
+import generate_test_data
+from tests.postgres import PostgresTestCase
+
+# Lead dicts as generate_leads() builds them, with text COPY has to escape
+LEADS = [
+    {'full_name': 'Tab\tName', 'title': 'CEO', 'email': 'tab@example.com', 'telegram': '@tab',
+     'phone_number': '+1 555 0100', 'source': 'linkedin', 'status': '1. lead generated',
+     'date_created': datetime(2025, 1, 2, 9, 30), 'linkedin_url': None, 'company_name': 'Back\\slash Ltd',
+     'country': 'Singapore', 'bd_in_charge': 'Alex', 'background': 'Line one\nLine two\r\n',
+     'is_converted': False, 'type': 'Institution'},
+    {'full_name': 'Null Fields', 'title': None, 'email': None, 'telegram': '@null',
+     'phone_number': None, 'source': 'referral', 'status': '2. proposal',
+     'date_created': datetime(2025, 1, 3), 'linkedin_url': 'https://linkedin.com/in/null', 'company_name': 'N',
+     'country': None, 'bd_in_charge': 'Lisa', 'background': '\\N is not NULL here',
+     'is_converted': True, 'type': 'Market Maker'},
+    {'full_name': 'Plain', 'title': 'CTO', 'email': 'plain@example.com', 'telegram': None,
+     'phone_number': '+44 20 0000', 'source': 'conference', 'status': '1. lead generated',
+     'date_created': datetime(2025, 1, 4), 'linkedin_url': None, 'company_name': 'Plain Co',
+     'country': 'UK', 'bd_in_charge': 'Alex', 'background': None, 'is_converted': False, 'type': 'Exchange'},
+]
+
+
+def make_generator(method, dsn=None):
+    """A generator without __init__ (no environment or connection lookup)"""
+    generator = generate_test_data.TestDataGenerator.__new__(generate_test_data.TestDataGenerator)
+    generator.insert_method = method
+    generator.batch_size = 2  # several batches for three rows
+    generator.demo_mode = True
+    if dsn:
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+        generator.conn = psycopg2.connect(dsn)
+        generator.cursor = generator.conn.cursor(cursor_factory=RealDictCursor)
+    return generator
+
+
+class TestCopyValue(unittest.TestCase):
+    """Test rendering of values in the COPY text format"""
+
+    def setUp(self):
+        self.generator = make_generator('copy')
+
+    def test_special_characters_are_escaped(self):
+        """Test that backslash, tab and line breaks can't split a field or row"""
+        self.assertEqual(self.generator._copy_value('a\\b\tc\nd\re'), 'a\\\\b\\tc\\nd\\re')
+        self.assertEqual(self.generator._copy_value('\\N'), '\\\\N')
+
+    def test_null_bool_and_dates(self):
+        """Test NULL, booleans, dates and numbers"""
+        self.assertEqual(self.generator._copy_value(None), '\\N')
+        self.assertEqual(self.generator._copy_value(True), 't')
+        self.assertEqual(self.generator._copy_value(False), 'f')
+        self.assertEqual(self.generator._copy_value(datetime(2025, 1, 2, 9, 30)), '2025-01-02T09:30:00')
+        self.assertEqual(self.generator._copy_value(date(2025, 1, 2)), '2025-01-02')
+        self.assertEqual(self.generator._copy_value(Decimal('12.50')), '12.50')
+        self.assertEqual(self.generator._copy_value(0), '0')
+
+
+class TestInsertMethods(PostgresTestCase):
+    """Test that COPY, execute_values and per-row INSERTs load identical rows"""
+
+    LEAD_SQL = """
+        SELECT full_name, title, email, telegram, phone_number, source, status, date_created,
+               linkedin_url, company_name, country, bd_in_charge, background, is_converted, type
+        FROM lead ORDER BY lead_id
+    """
+    SYSTEM_ACTIVITY_SQL = """
+        SELECT l.email, l.telegram, a.activity_type, a.activity_category, a.description,
+               a.activity_metadata - 'lead_id' AS metadata, a.created_by, a.assigned_to, a.status
+        FROM activity a JOIN lead l ON l.lead_id = a.lead_id
+        WHERE a.activity_category = 'system'
+        ORDER BY l.full_name
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.dsn = make_url(cls.url).set(drivername='postgresql').render_as_string(hide_password=False)
+
+    def tearDown(self):
+        with self.engine.begin() as conn:
+            conn.execute(text("TRUNCATE lead, activity RESTART IDENTITY CASCADE"))
+
+    def load(self, method, defer_triggers=False):
+        """Insert LEADS with one method; return the stored leads and their system activities"""
+        generator = make_generator(method, self.dsn)
+        try:
+            if defer_triggers:
+                generator.set_deferred_triggers(enabled=False)
+            try:
+                lead_ids = generator.insert_leads([dict(lead) for lead in LEADS])
+            finally:
+                if defer_triggers:
+                    generator.set_deferred_triggers(enabled=True)
+            if defer_triggers:
+                generator.create_deferred_rows(lead_ids, [])
+        finally:
+            generator.conn.close()
+
+        with self.engine.connect() as conn:
+            leads = [tuple(row) for row in conn.execute(text(self.LEAD_SQL))]
+            activities = [tuple(row) for row in conn.execute(text(self.SYSTEM_ACTIVITY_SQL))]
+        self.tearDown()
+        return lead_ids, leads, activities
+
+    def test_methods_store_the_same_rows(self):
+        """Test that copy and its values fallback match one INSERT per row"""
+        row_ids, row_leads, row_activities = self.load('row')
+        self.assertEqual(len(row_leads), len(LEADS))
+        self.assertEqual(row_leads[0][0], 'Tab\tName')
+        self.assertEqual(row_leads[1][12], '\\N is not NULL here')
+
+        for method in ('copy', 'values'):
+            with self.subTest(method=method):
+                lead_ids, leads, activities = self.load(method)
+                self.assertEqual(leads, row_leads)
+                self.assertEqual(activities, row_activities)
+
+    def test_reserved_ids_are_used(self):
+        """Test that bulk loads insert under the ids drawn from the sequence"""
+        lead_ids, _, _ = self.load('copy')
+        self.assertEqual(lead_ids, [1, 2, 3])  # RESTART IDENTITY in tearDown
+
+        generator = make_generator('copy', self.dsn)
+        try:
+            self.assertEqual(generator.reserve_ids('lead', 'lead_id', 5), [1, 2, 3, 4, 5])
+        finally:
+            generator.conn.close()
+
+    def test_deferred_rows_match_triggers(self):
+        """Test that create_deferred_rows writes what lead_activity_tracker would have"""
+        _, row_leads, row_activities = self.load('row')
+        self.assertEqual(len(row_activities), len(LEADS))
+        _, leads, activities = self.load('copy', defer_triggers=True)
+        self.assertEqual(leads, row_leads)
+        self.assertEqual(activities, row_activities)
+
+
+if __name__ == '__main__':
+    unittest.main()
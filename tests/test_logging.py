@@ -0,0 +1,44 @@
+"""
+Request logging tests for LeadFi CRM
+Tests the queued logging handlers and request log sampling
+"""
+
+import unittest
+import os
+from unittest.mock import patch
+
+# Add project root to path
+import sys
+from pathlib import Path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from tests.test_api import TestAPIBase
+
+
+class TestRequestLogging(TestAPIBase):
+    """Test the queued, sampled request logging pipeline"""
+
+    def test_loggers_write_through_queue(self):
+        """Test that application loggers only hold a QueueHandler"""
+        import logging
+        import logging.handlers
+        for name in ('', 'api', 'etl'):
+            # Ignore the capture handlers pytest attaches when it runs the suite
+            handlers = [handler for handler in logging.getLogger(name).handlers
+                        if not type(handler).__module__.startswith('_pytest')]
+            self.assertEqual([type(handler) for handler in handlers], [logging.handlers.QueueHandler])
+
+    def test_successful_gets_are_sampled(self):
+        """Test that sampling only drops successful GETs"""
+        from api.utils.logging_config import should_log_request
+        with patch.dict(os.environ, {'LOG_REQUEST_SAMPLE_RATE': '0'}):
+            self.assertFalse(should_log_request('GET', 200))
+            self.assertTrue(should_log_request('GET', 404))
+            self.assertTrue(should_log_request('POST', 201))
+        with patch.dict(os.environ, {'LOG_REQUEST_SAMPLE_RATE': '1'}):
+            self.assertTrue(should_log_request('GET', 200))
+
+
+if __name__ == '__main__':
+    unittest.main()
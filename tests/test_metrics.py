@@ -0,0 +1,51 @@
+"""
+Request metrics tests for LeadFi CRM
+Tests per-endpoint metrics, the /api/metrics endpoint and Server-Timing headers
+"""
+
+import unittest
+import json
+
+# Add project root to path
+import sys
+from pathlib import Path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from tests.test_api import TestAPIBase
+
+
+class TestRequestMetrics(TestAPIBase):
+    """Test per-endpoint metrics, /api/metrics and Server-Timing"""
+
+    def setUp(self):
+        super().setUp()
+        from api.utils.metrics import metrics
+        metrics.reset()
+
+    def test_server_timing_header(self):
+        """Test that responses break down DB, serialization and total time"""
+        response = self.app.get('/api/leads')
+        timing = response.headers['Server-Timing']
+        for phase in ('db;dur=', 'serialize;dur=', 'total;dur='):
+            self.assertIn(phase, timing)
+        self.assertNotIn('desc="0 queries"', timing)
+
+    def test_prometheus_metrics(self):
+        """Test that requests are exposed per URL rule in Prometheus format"""
+        self.app.get('/api/leads')
+        self.app.get('/api/leads/999999')
+        response = self.app.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.data.decode('utf-8')
+        self.assertIn('leadfi_http_requests_total{endpoint="/api/leads",method="GET",status="200"} 1', body)
+        self.assertIn('leadfi_http_request_duration_seconds_bucket{endpoint="/api/leads/<int:id>",method="GET",le="+Inf"} 1', body)
+        self.assertIn('quantile="0.99"', body)
+
+        summary = json.loads(self.app.get('/api/metrics?format=json').data)
+        self.assertEqual(summary['GET /api/leads']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Query profiler tests for LeadFi CRM
+Tests SQL statement normalization, N+1 detection and the profiling header
+"""
+
+import unittest
+import os
+from unittest.mock import patch
+
+# Add project root to path
+import sys
+from pathlib import Path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from api.app import app, db
+from api.models.lead import Lead
+from tests.test_api import TestAPIBase
+
+
+class TestQueryProfiler(TestAPIBase):
+    """Test the per-request SQL profiler and N+1 detection"""
+
+    def test_normalized_statement_shapes(self):
+        """Test that literals, parameters and IN lists collapse to one shape"""
+        from api.utils.query_profiler import normalize_statement
+        self.assertEqual(
+            normalize_statement("SELECT * FROM lead WHERE lead_id IN (?, ?, ?) AND status = 'new'"),
+            normalize_statement("SELECT * FROM lead WHERE lead_id IN (%(id_1)s) AND status = 'won'  ")
+        )
+
+    def test_repeated_statement_raises(self):
+        """Test that a per-row query loop is flagged as N+1"""
+        from api.utils.query_profiler import RequestProfile, NPlusOneError
+        from flask import g
+        with app.test_request_context('/api/leads'):
+            g.sql_profile = RequestProfile(threshold=3, raise_on_repeat=True)
+            with self.assertRaises(NPlusOneError):
+                for lead_id in range(1, 6):
+                    db.session.execute(db.select(Lead).where(Lead.lead_id == lead_id)).first()
+            self.assertEqual(g.sql_profile.query_count, 4)
+
+    def test_debug_header_enables_profile(self):
+        """Test that X-SQL-Profile: 1 profiles the request when SQL_PROFILER=header"""
+        self.assertNotIn('X-SQL-Profile', self.app.get('/api/leads').headers)
+        with patch.dict(os.environ, {'SQL_PROFILER': 'header'}):
+            response = self.app.get('/api/leads', headers={'X-SQL-Profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.headers['X-SQL-Profile'], r'^queries=[1-9]\d*; db_ms=')
+
+
+if __name__ == '__main__':
+    unittest.main()